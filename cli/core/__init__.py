@@ -4,7 +4,30 @@
 # https://creativecommons.org/licenses/by/4.0/
 
 
-from .inference import OcrInferrer
-from .evaluate import OcrResultEvaluator
+import importlib
 
-__all__ = ['OcrInferrer', 'OcrResultEvaluator']
+# public names and the submodules defining them
+# submodules are imported on first access so that each command imports only what it needs
+_LAZY_ATTR_DICT = {
+    'OcrInferrer': '.inference',
+    'OcrResultEvaluator': '.evaluate',
+    'OcrInferenceServer': '.server',
+    'run_sharded_inference': '.parallel',
+    'OcrBenchmark': '.benchmark',
+    'compare_benchmark_result': '.benchmark',
+}
+
+__all__ = ['OcrInferrer', 'OcrResultEvaluator', 'OcrInferenceServer', 'run_sharded_inference',
+           'OcrBenchmark', 'compare_benchmark_result']
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTR_DICT:
+        raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+    value = getattr(importlib.import_module(_LAZY_ATTR_DICT[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
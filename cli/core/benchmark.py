@@ -0,0 +1,640 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import copy
+import cv2
+import datetime
+import os
+import platform
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+import lxml.etree
+import numpy
+
+from . import utils
+from .inference import OcrInferrer
+from .metrics import summarize_values
+from .. import procs
+
+
+# character code range used for synthetic recognition results (hiragana)
+SYNTHETIC_CHAR_START = 0x3042
+SYNTHETIC_CHAR_NUM = 80
+
+
+class SyntheticPageGenerator:
+    """
+    ベンチマーク用の合成ページ画像と、そのレイアウトを表すXMLデータを生成するクラス。
+    同じシード値からは常に同じ画像とXMLデータが生成されます。
+    縦書き・横書きのページ、見開きページ、ルビ付きの行を含みます。
+
+    Attributes
+    ----------
+    seed : int
+        乱数のシード値です。
+    page_height : int
+        1ページ分の画像の高さ(ピクセル)です。
+    page_width : int
+        1ページ分の画像の幅(ピクセル)です。見開きページの画像の幅はこの2倍になります。
+    """
+
+    # (vertical text, two-page spread, with ruby) of each page pattern
+    PAGE_PATTERNS = [
+        (True, True, True),
+        (True, False, False),
+        (False, True, False),
+        (False, False, True),
+    ]
+
+    def __init__(self, seed=0, page_height=1400, page_width=1000):
+        """
+        Parameters
+        ----------
+        seed : int
+            乱数のシード値です。
+        page_height : int
+            1ページ分の画像の高さ(ピクセル)です。
+        page_width : int
+            1ページ分の画像の幅(ピクセル)です。
+        """
+        self.seed = seed
+        self.page_height = page_height
+        self.page_width = page_width
+
+    def generate(self, page_idx):
+        """
+        1枚分の合成画像と、ノド元分割後の各ページのXMLデータを生成します。
+
+        Parameters
+        ----------
+        page_idx : int
+            生成する画像のインデックス。ページの種類と乱数の系列が決まります。
+
+        Returns
+        -------
+        img : numpy.ndarray
+            合成画像(BGR)。見開きの場合は左右2ページ分の画像です。
+        page_list : list
+            (ページ画像, PAGE要素)の組のリスト。見開きの場合は左ページ、右ページの順です。
+        """
+        vertical, spread, ruby = SyntheticPageGenerator.PAGE_PATTERNS[page_idx % len(SyntheticPageGenerator.PAGE_PATTERNS)]
+        rng = numpy.random.RandomState(self.seed * 100003 + page_idx)
+        stem = self.get_img_stem(page_idx)
+
+        page_list = []
+        for page_id in (['L', 'R'] if spread else ['L']):
+            page_img = numpy.full((self.page_height, self.page_width, 3), 255, dtype=numpy.uint8)
+            page = ET.Element('PAGE', {'IMAGENAME': '{0}_{1}.jpg'.format(stem, page_id),
+                                       'WIDTH': str(self.page_width),
+                                       'HEIGHT': str(self.page_height)})
+            self._draw_text_block(page_img, page, rng, vertical, ruby)
+            page_list.append((page_img, page))
+
+        img = numpy.concatenate([page_img for page_img, _ in page_list], axis=1)
+        return img, page_list
+
+    def get_img_stem(self, page_idx):
+        return 'bench{0:05d}'.format(page_idx)
+
+    def write_dataset(self, output_dir, page_num):
+        """
+        合成画像とXMLデータを推論処理の入力ディレクトリの形式で保存します。
+        画像はimgディレクトリ、全ページのレイアウトの正解XMLはxmlディレクトリに保存されます。
+
+        Parameters
+        ----------
+        output_dir : str
+            保存先のディレクトリのパス。
+        page_num : int
+            生成する画像の枚数。
+
+        Returns
+        -------
+        img_path_list : list
+            保存した画像ファイルのパスのリスト。
+        """
+        img_dir = os.path.join(output_dir, 'img')
+        xml_dir = os.path.join(output_dir, 'xml')
+        os.makedirs(img_dir, exist_ok=True)
+        os.makedirs(xml_dir, exist_ok=True)
+
+        root = ET.Element('OCRDATASET')
+        img_path_list = []
+        for page_idx in range(page_num):
+            img, page_list = self.generate(page_idx)
+            img_path = os.path.join(img_dir, self.get_img_stem(page_idx) + '.jpg')
+            cv2.imwrite(img_path, img)
+            img_path_list.append(img_path)
+            for _, page in page_list:
+                root.append(page)
+        utils.save_xml(ET.ElementTree(root), os.path.join(xml_dir, os.path.basename(output_dir) + '.xml'))
+        return img_path_list
+
+    def _draw_text_block(self, page_img, page, rng, vertical, ruby):
+        margin = 80
+        char_size = 26
+        char_gap = 4
+        line_pitch = 52
+        ruby_size = 10
+
+        text_block = ET.SubElement(page, 'TEXTBLOCK', {'X': str(margin), 'Y': str(margin),
+                                                       'WIDTH': str(self.page_width - 2 * margin),
+                                                       'HEIGHT': str(self.page_height - 2 * margin)})
+        if vertical:
+            line_num = (self.page_width - 2 * margin) // line_pitch
+            max_char_num = (self.page_height - 2 * margin) // (char_size + char_gap)
+        else:
+            line_num = (self.page_height - 2 * margin) // line_pitch
+            max_char_num = (self.page_width - 2 * margin) // (char_size + char_gap)
+
+        for line_idx in range(line_num):
+            char_num = rng.randint(max_char_num // 3, max_char_num + 1)
+            length = char_num * (char_size + char_gap) - char_gap
+            if vertical:
+                # vertical lines are placed from right to left
+                x = self.page_width - margin - (line_idx + 1) * line_pitch + (line_pitch - char_size) // 2
+                y = margin
+                w, h = char_size, length
+            else:
+                x = margin
+                y = margin + line_idx * line_pitch + (line_pitch - char_size) // 2
+                w, h = length, char_size
+            for char_idx in range(char_num):
+                offset = char_idx * (char_size + char_gap)
+                shade = rng.randint(0, 96)
+                if vertical:
+                    page_img[y + offset:y + offset + char_size, x:x + char_size] = shade
+                else:
+                    page_img[y:y + char_size, x + offset:x + offset + char_size] = shade
+            ET.SubElement(text_block, 'LINE', {'TYPE': '本文', 'X': str(x), 'Y': str(y),
+                                               'WIDTH': str(w), 'HEIGHT': str(h), 'CONF': '1.000'})
+
+            if ruby and rng.rand() < 0.5:
+                # ruby is placed right of vertical line, or above horizontal line
+                ruby_length = min(length, 3 * (ruby_size + char_gap))
+                if vertical:
+                    rx, ry, rw, rh = x + char_size + 2, y, ruby_size, ruby_length
+                else:
+                    rx, ry, rw, rh = x, y - ruby_size - 2, ruby_length, ruby_size
+                page_img[ry:ry + rh, rx:rx + rw] = 64
+                ET.SubElement(page, 'BLOCK', {'TYPE': 'ルビ', 'X': str(rx), 'Y': str(ry),
+                                              'WIDTH': str(rw), 'HEIGHT': str(rh), 'CONF': '1.000'})
+        return
+
+
+def _synthetic_string(element):
+    # deterministic string whose length is proportional to the aspect ratio of the region
+    w = int(element.attrib['WIDTH'])
+    h = int(element.attrib['HEIGHT'])
+    char_num = max(1, max(w, h) // max(1, min(w, h)))
+    base = int(element.attrib['X']) + int(element.attrib['Y'])
+    return ''.join(chr(SYNTHETIC_CHAR_START + (base + i * 7) % SYNTHETIC_CHAR_NUM) for i in range(char_num))
+
+
+class StubModels:
+    """
+    推論モデルの代わりに利用するスタブ関数の集まり。
+    各推論処理のサブモジュールの関数と同じ入出力の形式を持ち、CPUのみで決定的な結果を返します。
+    レイアウト抽出のスタブは、合成ページの生成時に記録されたレイアウトを返します。
+
+    Attributes
+    ----------
+    layout_dict : dict
+        ノド元分割後の画像ファイル名をキー、PAGE要素を値とする辞書型データです。
+    """
+
+    def __init__(self, layout_dict, target_block_types):
+        """
+        Parameters
+        ----------
+        layout_dict : dict
+            ノド元分割後の画像ファイル名をキー、PAGE要素を値とする辞書型データです。
+        target_block_types : list
+            文字認識の対象とするBLOCK要素のTYPEのリストです。
+        """
+        self.layout_dict = layout_dict
+        self.target_block_types = target_block_types
+
+    def page_separation(self, img, detector, log=None):
+        # landscape images are regarded as two-page spreads and divided at the center
+        h, w = img.shape[:2]
+        if w > h:
+            return [img[:, :w // 2], img[:, w // 2:]]
+        return [img]
+
+    def page_deskew(self, img):
+        return img
+
+    def layout_extraction(self, img, img_path, score_thr, dump):
+        root = ET.Element('OCRDATASET')
+        page = self.layout_dict.get(os.path.basename(img_path))
+        if page is None:
+            page = ET.Element('PAGE', {'IMAGENAME': os.path.basename(img_path),
+                                       'WIDTH': str(img.shape[1]), 'HEIGHT': str(img.shape[0])})
+        root.append(copy.deepcopy(page))
+        dump_img = img.copy() if dump else None
+        return {'xml': lxml.etree.fromstring(ET.tostring(root)), 'dump_img': dump_img}
+
+    def line_ocr(self, object_dict, input_data):
+        xml_tree = copy.deepcopy(input_data['xml'])
+        for element in xml_tree.iter():
+            if element.tag == 'LINE' or (element.tag == 'BLOCK' and element.attrib.get('TYPE') in self.target_block_types):
+                element.set('STRING', _synthetic_string(element))
+        return procs.PageRecord.from_data(input_data).replace(xml=xml_tree)
+
+    def line_order(self, input_data):
+        xml_tree = copy.deepcopy(input_data['xml'])
+        for text_block in xml_tree.iter('TEXTBLOCK'):
+            line_list = list(text_block.iter('LINE'))
+            vertical_num = sum(1 for line in line_list if int(line.attrib['WIDTH']) < int(line.attrib['HEIGHT']))
+            if vertical_num * 2 > len(line_list):
+                line_list.sort(key=lambda line: (-int(line.attrib['X']), int(line.attrib['Y'])))
+            else:
+                line_list.sort(key=lambda line: (int(line.attrib['Y']), int(line.attrib['X'])))
+            for line in line_list:
+                text_block.remove(line)
+            text_block.extend(line_list)
+        return procs.PageRecord.from_data(input_data).replace(xml=xml_tree)
+
+    def ruby_read(self, input_data):
+        ruby_txt = '\n'.join(block.attrib.get('STRING', '') for block in input_data['xml'].iter('BLOCK')
+                             if block.attrib.get('TYPE') == 'ルビ')
+        return procs.PageRecord.from_data(input_data).replace(ruby_txt=ruby_txt)
+
+    def line_attribute(self, object_dict, input_data):
+        return procs.PageRecord.from_data(input_data).replace(xml=copy.deepcopy(input_data['xml']))
+
+
+# stub function names of each proc class
+STUB_PROC_DICT = {
+    procs.PageSeparation: 'page_separation',
+    procs.PageDeskewProcess: 'page_deskew',
+    procs.LayoutExtractionProcess: 'layout_extraction',
+    procs.LineOcrProcess: 'line_ocr',
+    procs.LineOrderProcess: 'line_order',
+    procs.RubyReadingProcess: 'ruby_read',
+    procs.LineAttributeProcess: 'line_attribute',
+}
+
+
+def create_stub_proc(proc_class, cfg, proc_id, stub_models):
+    """
+    推論モデルを読み込まずに、スタブ関数で推論を行う推論処理のインスタンスを作成します。
+
+    Parameters
+    ----------
+    proc_class : type
+        推論処理のクラス。
+    cfg : dict
+        推論実行時の設定情報を保存した辞書型データ。
+    proc_id : int, str
+        実行される順序を表す数値または文字列。
+    stub_models : StubModels
+        推論モデルの代わりに利用するスタブ関数の集まり。
+
+    Returns
+    -------
+    proc : BaseInferenceProcess
+        推論処理のインスタンス。
+    """
+    stub_name = STUB_PROC_DICT[proc_class]
+    # models are loaded lazily, so creating the proc itself does not load them
+    proc = proc_class(cfg, proc_id)
+    proc._run_submodule_inference = getattr(stub_models, stub_name)
+
+    # attributes which are set in model loading of each proc
+    if proc_class is procs.PageSeparation:
+        proc._detector = None
+    elif proc_class is procs.LineOcrProcess:
+        proc._object_dict = None
+        proc._target_block_types = stub_models.target_block_types
+    elif proc_class is procs.LineAttributeProcess:
+        proc._object_dict = None
+    proc._model_loaded = True
+    return proc
+
+
+class BenchmarkInferrer(OcrInferrer):
+    """
+    スタブ関数で推論を行う推論処理を利用してOcrInferrerの処理全体を実行するクラス。
+    OcrInferrerを継承しています。
+    """
+
+    def __init__(self, cfg, stub_models):
+        """
+        Parameters
+        ----------
+        cfg : dict
+            推論処理の設定情報です。
+        stub_models : StubModels
+            推論モデルの代わりに利用するスタブ関数の集まり。
+        """
+        self._stub_models = stub_models
+        super().__init__(cfg)
+
+    def _create_proc(self, proc_class, cfg, proc_id):
+        return create_stub_proc(proc_class, cfg, proc_id, self._stub_models)
+
+
+class OcrBenchmark:
+    """
+    合成ページを利用して、各推論処理の単体の処理時間と推論処理全体のスループットを計測するベンチマーク。
+    CLIの起動時間と主要なモジュールのインポート時間も計測します。
+    推論モデルはスタブ関数に置き換えられるため、モデルの重みファイルやGPUが無い環境でも実行できます。
+    計測結果はJSON形式で保存し、基準となる過去の結果と比較できます。
+
+    Attributes
+    ----------
+    cfg : dict
+        推論処理の設定情報です。
+    page_num : int
+        生成する合成画像の枚数です。
+    repeat : int
+        各推論処理の単体の計測を繰り返す回数です。
+    work_dir : str
+        合成画像や推論結果を保存する作業ディレクトリのパスです。
+    """
+
+    # CLI commands whose startup time is measured (arguments of main.py)
+    IMPORT_TIME_COMMANDS = {
+        'help': ['--help'],
+        'infer_help': ['infer', '--help'],
+        'evaluate_help': ['evaluate', '--help'],
+    }
+    # modules whose import time is measured with the breakdown of imported modules
+    IMPORT_TIME_MODULES = ['cli.core', 'cli.core.evaluate', 'cli.core.inference']
+    # number of modules listed in the import time profile
+    IMPORT_PROFILE_NUM = 10
+
+    def __init__(self, cfg, work_dir, page_num=16, seed=0, repeat=3):
+        """
+        Parameters
+        ----------
+        cfg : dict
+            推論処理の設定情報です。input_dirsは空で構いません。
+        work_dir : str
+            合成画像や推論結果を保存する作業ディレクトリのパスです。
+        page_num : int
+            生成する合成画像の枚数です。
+        seed : int
+            合成画像を生成する乱数のシード値です。
+        repeat : int
+            各推論処理の単体の計測を繰り返す回数です。
+        """
+        self.cfg = copy.deepcopy(cfg)
+        # results should not be reused or skipped while benchmarking
+        self.cfg['cache']['enable'] = False
+        self.cfg['resume'] = False
+        self.cfg['dump'] = False
+        self.work_dir = work_dir
+        self.page_num = page_num
+        self.seed = seed
+        self.repeat = repeat
+        self.generator = SyntheticPageGenerator(seed)
+
+        self._page_data = [self.generator.generate(page_idx) for page_idx in range(page_num)]
+        layout_dict = {}
+        for _, page_list in self._page_data:
+            for _, page in page_list:
+                layout_dict[page.attrib['IMAGENAME']] = page
+        target_block_types = [element_type for element_type, add_flag in self.cfg['line_ocr']['additional_elements'].items()
+                              if add_flag and element_type not in ['ノンブル', '柱']]
+        self.stub_models = StubModels(layout_dict, target_block_types)
+
+    def run(self):
+        """
+        各推論処理の単体の計測と、推論処理全体の計測を実行します。
+
+        Returns
+        -------
+        result : dict
+            計測環境の情報、推論処理ごとの処理時間、推論処理全体のスループットを保持する辞書型データ。
+        """
+        result = {
+            'meta': self._get_meta(),
+            'import_time': self.run_import_time(),
+            'stages': self.run_stages(),
+            'end_to_end': self.run_end_to_end()
+        }
+        return result
+
+    def run_import_time(self):
+        """
+        新しいPythonプロセスでCLIのコマンドの起動とモジュールのインポートを実行し、処理時間を計測します。
+        モジュールのインポートについては、python -X importtimeの出力から
+        インポートに時間がかかったモジュールの一覧(プロファイル)も記録します。
+
+        Returns
+        -------
+        import_time_result : dict
+            計測項目名をキー、処理時間の集計結果を値とするtimingsと、
+            モジュール名をキー、インポート時間の上位のモジュールのリストを値とするprofileを保持する辞書型データ。
+        """
+        repo_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        main_path = os.path.join(repo_dir, 'main.py')
+
+        timings = {}
+        for name, args in OcrBenchmark.IMPORT_TIME_COMMANDS.items():
+            time_list = []
+            for _ in range(self.repeat):
+                start_cmd = time.perf_counter()
+                subprocess.run([sys.executable, main_path] + args, cwd=repo_dir, capture_output=True, check=True)
+                time_list.append(time.perf_counter() - start_cmd)
+            timings['command/' + name] = summarize_values(time_list)
+            print('### benchmark command {0} : {1:8.4f} sec (p50) ###'.format(name, timings['command/' + name]['p50']))
+
+        profile = {}
+        for module_name in OcrBenchmark.IMPORT_TIME_MODULES:
+            time_list = []
+            for _ in range(self.repeat):
+                completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module_name],
+                                           cwd=repo_dir, capture_output=True, text=True, check=True)
+                import_list = self._parse_importtime(completed.stderr)
+                # the last line is the cumulative time of the measured module
+                time_list.append(import_list[-1][2] if len(import_list) > 0 else 0.0)
+            timings['module/' + module_name] = summarize_values(time_list)
+            # the profile of the last run, sorted by self time
+            profile[module_name] = [
+                {'module': name, 'self': self_time, 'cumulative': cumulative_time}
+                for name, self_time, cumulative_time in sorted(import_list, key=lambda x: x[1], reverse=True)[:OcrBenchmark.IMPORT_PROFILE_NUM]
+            ]
+            print('### benchmark import {0} : {1:8.4f} sec (p50) ###'.format(module_name, timings['module/' + module_name]['p50']))
+        return {'timings': timings, 'profile': profile}
+
+    def _parse_importtime(self, importtime_output):
+        # parse lines "import time: self [us] | cumulative | imported package" into (name, self, cumulative) in sec
+        import_list = []
+        for line in importtime_output.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            field_list = line[len('import time:'):].split('|')
+            if len(field_list) != 3 or not field_list[0].strip().isdigit():
+                continue
+            import_list.append((field_list[2].strip(), int(field_list[0]) / 1e6, int(field_list[1]) / 1e6))
+        return import_list
+
+    def run_stages(self):
+        """
+        各推論処理を単体で実行し、入力データ1件あたりの処理時間を計測します。
+        各推論処理の入力データは合成ページから直接作成します。
+
+        Returns
+        -------
+        stage_result : dict
+            推論処理名をキー、処理時間の集計結果を値とする辞書型データ。
+        """
+        output_dir = os.path.join(self.work_dir, 'stages')
+        os.makedirs(output_dir, exist_ok=True)
+
+        stage_list = [
+            (procs.PageSeparation, 0, self._create_scan_inputs(output_dir)),
+            (procs.PageDeskewProcess, 1, self._create_page_inputs(output_dir, with_xml=False)),
+            (procs.LayoutExtractionProcess, 2, self._create_page_inputs(output_dir, with_xml=False)),
+            (procs.LineOcrProcess, 3, self._create_page_inputs(output_dir, with_xml=True)),
+            (procs.LineOrderProcess, 'ex1', self._create_page_inputs(output_dir, with_xml=True, with_string=True)),
+            (procs.RubyReadingProcess, 'ex2', self._create_page_inputs(output_dir, with_xml=True, with_string=True)),
+            (procs.LineAttributeProcess, 'ex3', self._create_page_inputs(output_dir, with_xml=True, with_string=True)),
+        ]
+
+        stage_result = {}
+        for proc_class, proc_id, input_data_list in stage_list:
+            proc = create_stub_proc(proc_class, self.cfg, proc_id, self.stub_models)
+            time_list = []
+            for _ in range(self.repeat):
+                for input_data in input_data_list:
+                    start_proc = time.perf_counter()
+                    proc.do(0, input_data)
+                    time_list.append(time.perf_counter() - start_proc)
+            stage_result[proc.proc_name] = summarize_values(time_list)
+            print('### benchmark stage {0} : {1:8.4f} sec (p50) ###'.format(proc.proc_name, stage_result[proc.proc_name]['p50']))
+        return stage_result
+
+    def run_end_to_end(self):
+        """
+        合成画像を保存し、OcrInferrerで推論処理全体を実行してスループットを計測します。
+
+        Returns
+        -------
+        end_to_end_result : dict
+            推論処理全体の計測値の集計結果。
+        """
+        input_dir = os.path.join(self.work_dir, 'bench_data')
+        self.generator.write_dataset(input_dir, self.page_num)
+
+        infer_cfg = copy.deepcopy(self.cfg)
+        infer_cfg['input_root'] = input_dir
+        infer_cfg['input_structure'] = 's'
+        infer_cfg['output_root'] = utils.mkdir_with_duplication_check(os.path.join(self.work_dir, 'output'))
+        infer_cfg = utils.set_input_dirs(infer_cfg)
+
+        inferrer = BenchmarkInferrer(infer_cfg, self.stub_models)
+        inferrer.run(print_statistics=False)
+        return inferrer.metrics.summary(inferrer.total_time_statistics, inferrer.proc_time_statistics)
+
+    def _create_scan_inputs(self, output_dir):
+        input_data_list = []
+        for page_idx, (img, _) in enumerate(self._page_data):
+            img_path = os.path.join(output_dir, self.generator.get_img_stem(page_idx) + '.jpg')
+            input_data_list.append(procs.PageRecord({'img_path': img_path,
+                                                     'img_file_name': os.path.basename(img_path),
+                                                     'output_dir': output_dir,
+                                                     'img': img}))
+        return input_data_list
+
+    def _create_page_inputs(self, output_dir, with_xml, with_string=False):
+        input_data_list = []
+        for page_idx, (_, page_list) in enumerate(self._page_data):
+            img_path = os.path.join(output_dir, self.generator.get_img_stem(page_idx) + '.jpg')
+            for page_img, page in page_list:
+                input_data = procs.PageRecord({'img_path': img_path,
+                                               'img_file_name': page.attrib['IMAGENAME'],
+                                               'orig_img_path': img_path,
+                                               'output_dir': output_dir,
+                                               'img': page_img})
+                if with_xml:
+                    root = ET.Element('OCRDATASET')
+                    root.append(copy.deepcopy(page))
+                    xml_tree = ET.ElementTree(root)
+                    if with_string:
+                        xml_tree = self.stub_models.line_ocr(None, {'xml': xml_tree})['xml']
+                    input_data['xml'] = xml_tree
+                input_data_list.append(input_data)
+        return input_data_list
+
+    def _get_meta(self):
+        meta = {
+            'date': datetime.datetime.now().isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': numpy.__version__,
+            'opencv': cv2.__version__,
+            'page_num': self.page_num,
+            'seed': self.seed,
+            'repeat': self.repeat,
+            'pipeline': self.cfg['pipeline']['enable'],
+            'commit': None
+        }
+        try:
+            meta['commit'] = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                            cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            pass
+        return meta
+
+
+def compare_benchmark_result(result, baseline, tolerance=0.1, min_time_diff=0.001):
+    """
+    ベンチマークの計測結果を基準となる結果と比較し、差分を表示します。
+    処理時間(p50)は増加、スループットは減少がtoleranceの割合を超えた場合に性能低下と判定します。
+    ただし、処理時間の増加がmin_time_diff秒未満の場合は計測誤差として扱います。
+
+    Parameters
+    ----------
+    result : dict
+        今回の計測結果。
+    baseline : dict
+        基準となる計測結果。
+    tolerance : float
+        性能低下と判定しない変化の割合の上限。
+    min_time_diff : float
+        性能低下と判定する処理時間の増加の下限(秒)。
+
+    Returns
+    -------
+    regression_list : list
+        性能低下と判定された計測項目名のリスト。
+    """
+    # (name, current value, baseline value, True if larger value is better)
+    item_list = []
+    for name, stat in result.get('import_time', {}).get('timings', {}).items():
+        if name in baseline.get('import_time', {}).get('timings', {}):
+            item_list.append(('import_time/' + name + '/p50', stat['p50'], baseline['import_time']['timings'][name]['p50'], False))
+    for proc_name, stat in result['stages'].items():
+        if proc_name in baseline['stages']:
+            item_list.append(('stages/' + proc_name + '/p50', stat['p50'], baseline['stages'][proc_name]['p50'], False))
+    for name in ['pages_per_sec', 'lines_per_sec']:
+        item_list.append(('end_to_end/' + name, result['end_to_end'][name], baseline['end_to_end'][name], True))
+    for name, stat in result['end_to_end']['timings'].items():
+        if name in baseline['end_to_end']['timings']:
+            item_list.append(('end_to_end/' + name + '/p50', stat['p50'], baseline['end_to_end']['timings'][name]['p50'], False))
+
+    print('================== BENCHMARK COMPARISON ==================')
+    regression_list = []
+    for name, value, base_value, higher_is_better in item_list:
+        ratio = value / base_value if base_value > 0 else 1.0
+        if higher_is_better:
+            regression = ratio < 1.0 - tolerance
+        else:
+            regression = (ratio > 1.0 + tolerance) and (value - base_value >= min_time_diff)
+        mark = ' [REGRESSION]' if regression else ''
+        print(f'{name}'.ljust(45, ' ') + f': {base_value:10.4f} -> {value:10.4f} ({ratio:6.3f}x){mark}')
+        if regression:
+            regression_list.append(name)
+    return regression_list
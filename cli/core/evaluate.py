@@ -71,3 +71,8 @@ class OcrResultEvaluator:
             print('### MEDIAN OF LINE ORDER LEVEN DISTANCE : {0} (pid={1}, {2})'.format(line_order_edit_distance_median, median_pid_list[0], median_pid_list[1]))
         else:
             print('### MEDIAN OF LINE ORDER LEVEN DISTANCE : {0} (pid={1})'.format(line_order_edit_distance_median, median_pid_list[0]))
+
+        for percentile, (ocr_edit_distance, pid) in ocr_evaluator.get_ocr_edit_distance_percentiles().items():
+            print('### {0}TH PERCENTILE OF LINE OCR LEVEN DISTANCE : {1} (pid={2})'.format(percentile, ocr_edit_distance, pid))
+        for percentile, (line_order_edit_distance, pid) in ocr_evaluator.get_line_order_edit_distance_percentiles().items():
+            print('### {0}TH PERCENTILE OF LINE ORDER LEVEN DISTANCE : {1} (pid={2})'.format(percentile, line_order_edit_distance, pid))
@@ -0,0 +1,96 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import collections
+import concurrent.futures
+import cv2
+import numpy
+import sys
+
+
+class ImagePrefetcher:
+    """
+    入力画像の読み込み(デコード)をバックグラウンドのスレッドプールで先行して実行するローダー。
+    先読み中・先読み済みの画像と、直前に返した(後段の処理で使用中の)画像の合計サイズがメモリ上限を超えないように先読み数を調整します。
+    画像の大きさは最初の画像を読み込むまで分からないため、最初の画像は1枚のみ読み込みます。
+
+    Attributes
+    ----------
+    img_path_list : list
+        読み込む画像ファイルパスのリストです。
+    prefetch_num : int
+        先行して読み込む画像の最大数です。
+    memory_budget : int
+        先読み済みの画像データが使用するメモリの上限(byte)です。
+    """
+
+    def __init__(self, img_path_list, prefetch_num=4, worker_num=2, memory_budget_mb=2048, read_func=cv2.imread):
+        """
+        Parameters
+        ----------
+        img_path_list : list
+            読み込む画像ファイルパスのリストです。
+        prefetch_num : int
+            先行して読み込む画像の最大数です。
+        worker_num : int
+            画像の読み込みを行うスレッド数です。
+        memory_budget_mb : int
+            先読み済みの画像データが使用するメモリの上限(MB)です。
+        read_func : function
+            画像ファイルパスを受け取り画像データを返す読み込み関数です。
+        """
+        self.img_path_list = list(img_path_list)
+        self.prefetch_num = max(1, prefetch_num)
+        self.worker_num = max(1, worker_num)
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self._read_func = read_func
+
+    def __iter__(self):
+        """
+        画像ファイルパスとデコード済みの画像データの組を入力順に返します。
+        読み込みに失敗した画像の画像データはNoneになります。
+
+        Yields
+        ------
+        (img_path, img) : tuple
+            画像ファイルパスと画像データ。
+        """
+        pending = collections.deque()
+        next_idx = 0
+        # size of the largest decoded image, used to estimate memory of prefetched images
+        estimated_img_bytes = 0
+        size_known = False
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.worker_num) as executor:
+            try:
+                while True:
+                    while (next_idx < len(self.img_path_list)) and (len(pending) < self.prefetch_num):
+                        # always keep at least one image in flight,
+                        # the others are submitted only within the budget including the image yielded last
+                        if (len(pending) > 0) and ((not size_known) or (estimated_img_bytes * (len(pending) + 2) > self.memory_budget)):
+                            break
+                        img_path = self.img_path_list[next_idx]
+                        pending.append((img_path, executor.submit(self._read, img_path)))
+                        next_idx += 1
+                    if len(pending) == 0:
+                        break
+
+                    img_path, future = pending.popleft()
+                    img = future.result()
+                    # memory-mapped images are not counted since they are loaded on access
+                    if (img is not None) and (not isinstance(img, numpy.memmap)):
+                        estimated_img_bytes = max(estimated_img_bytes, img.nbytes)
+                    size_known = True
+                    yield img_path, img
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def _read(self, img_path):
+        try:
+            return self._read_func(img_path)
+        except Exception as err:
+            print('[ERROR] Image prefetch error : {0} ({1})'.format(img_path, err), file=sys.stderr)
+            return None
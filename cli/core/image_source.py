@@ -0,0 +1,125 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import cv2
+import numpy
+import os
+import sys
+
+try:
+    import tifffile
+except ImportError:
+    tifffile = None
+
+
+# reduction factor and flag of cv2.imread which decodes image at reduced resolution
+REDUCED_READ_FLAG_DICT = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+class ImageSource:
+    """
+    入力画像ファイルの読み込み方法を切り替えるクラス。
+    NPY形式のファイルと、(有効な場合)非圧縮のTIFF形式のファイルはデコードせずにメモリマップで読み込みます。
+    その他の形式はcv2.imreadで読み込みます。
+    縮小画像のみが必要な場合は、縮小した解像度での読み込みも利用できます。
+
+    Attributes
+    ----------
+    img_path : str
+        画像ファイルのパスです。
+    mmap_tiff : bool
+        非圧縮のTIFF形式のファイルをメモリマップで読み込むかどうかのフラグです。
+        tifffileがインストールされている場合のみ有効です。
+    """
+
+    NPY_EXT_LIST = ['.npy']
+    TIFF_EXT_LIST = ['.tif', '.tiff']
+
+    def __init__(self, img_path, mmap_tiff=False):
+        """
+        Parameters
+        ----------
+        img_path : str
+            画像ファイルのパスです。
+        mmap_tiff : bool
+            非圧縮のTIFF形式のファイルをメモリマップで読み込むかどうかのフラグです。
+        """
+        self.img_path = img_path
+        self.mmap_tiff = mmap_tiff and (tifffile is not None)
+        self._ext = os.path.splitext(img_path)[1].lower()
+
+    def read(self):
+        """
+        画像を元の解像度で読み込みます。
+        メモリマップで読み込んだ画像は書き込み時にのみプロセス内に複製されます(copy-on-write)。
+
+        Returns
+        -------
+        img : numpy.ndarray
+            BGR形式の画像データ。読み込みに失敗した場合はNoneを返します。
+        """
+        img = self._read_mmap()
+        if img is not None:
+            return img
+        return cv2.imread(self.img_path)
+
+    def read_reduced(self, factor):
+        """
+        画像を縮小した解像度で読み込みます。
+        メモリマップで読み込める画像は間引いた画素のみを、
+        その他の画像はcv2.IMREAD_REDUCED_*で縮小しながらデコードします。
+
+        Parameters
+        ----------
+        factor : int
+            縮小率の逆数。1, 2, 4, 8のいずれかです。
+
+        Returns
+        -------
+        img : numpy.ndarray
+            BGR形式の縮小画像データ。読み込みに失敗した場合はNoneを返します。
+        """
+        if factor == 1:
+            return self.read()
+        if factor not in REDUCED_READ_FLAG_DICT:
+            raise ValueError('Unsupported reduction factor : {0}'.format(factor))
+        img = self._read_mmap()
+        if img is not None:
+            # drop the remainder rows and columns, same size as cv2.IMREAD_REDUCED_*
+            height = img.shape[0] // factor * factor
+            width = img.shape[1] // factor * factor
+            return numpy.ascontiguousarray(img[:height:factor, :width:factor])
+        return cv2.imread(self.img_path, REDUCED_READ_FLAG_DICT[factor])
+
+    def is_mmap(self):
+        """
+        この画像ファイルがメモリマップで読み込まれるかどうかを返します。
+        """
+        return self._ext in ImageSource.NPY_EXT_LIST or (self.mmap_tiff and self._ext in ImageSource.TIFF_EXT_LIST)
+
+    def _read_mmap(self):
+        if self._ext in ImageSource.NPY_EXT_LIST:
+            img = numpy.load(self.img_path, mmap_mode='c')
+            if img.ndim == 2:
+                # same as cv2.imread which always returns color image
+                return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+            return img
+        if self.mmap_tiff and self._ext in ImageSource.TIFF_EXT_LIST:
+            try:
+                img = tifffile.memmap(self.img_path, mode='c')
+            except (ValueError, OSError) as err:
+                # compressed or tiled tiff can not be memory-mapped
+                print('[WARNING] TIFF memory map is not available, decode instead : {0} ({1})'.format(self.img_path, err), file=sys.stderr)
+                return None
+            if img.dtype != numpy.uint8 or img.ndim != 3 or img.shape[2] != 3:
+                return None
+            # RGB to BGR without copy
+            return img[:, :, ::-1]
+        return None
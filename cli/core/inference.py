@@ -4,7 +4,7 @@
 # https://creativecommons.org/licenses/by/4.0/
 
 
-import copy
+import collections
 import cv2
 import glob
 import os
@@ -15,18 +15,72 @@ import xml
 import xml.etree.ElementTree as ET
 
 from . import utils
+from .image_loader import ImagePrefetcher
+from .image_source import ImageSource
+from .manifest import InferenceManifest
+from .metrics import InferenceMetrics
+from .output_writer import AsyncOutputWriter
+from .pipeline import StagePipeline
+from .result_cache import ResultCache
+from .xml_writer import StreamingXmlWriter
 from .. import procs
 
-# Add import path for submodules
-currentdir = pathlib.Path(__file__).resolve().parent
-sys.path.append(str(currentdir) + "/../../submodules/separate_pages_ssd")
-sys.path.append(str(currentdir) + "/../../submodules/ndl_layout")
-sys.path.append(str(currentdir) + "/../../submodules/deskew_HT")
-sys.path.append(str(currentdir) + "/../../submodules/text_recognition_lightning")
-sys.path.append(str(currentdir) + "/../../submodules/reading_order")
+# submodule directories which are added to import path before loading models
+SUBMODULE_PATH_LIST = [
+    "submodules/separate_pages_ssd",
+    "submodules/ndl_layout",
+    "submodules/deskew_HT",
+    "submodules/text_recognition_lightning",
+    "submodules/reading_order",
+]
 
 # supported image type list
-supported_img_ext = ['.jpg', '.jpeg', '.jp2','.png','.tiff','.bmp','.tif','.JPG','.PNG']
+supported_img_ext = ['.jpg', '.jpeg', '.jp2','.png','.tiff','.bmp','.tif','.JPG','.PNG','.npy']
+
+
+def add_submodule_paths():
+    """
+    推論処理が利用するサブモジュールのディレクトリをインポートパスに追加します。
+    既に追加済みのディレクトリは追加しません。
+    """
+    currentdir = pathlib.Path(__file__).resolve().parent
+    for submodule_path in SUBMODULE_PATH_LIST:
+        import_path = str(currentdir) + "/../../" + submodule_path
+        if import_path not in sys.path:
+            sys.path.append(import_path)
+    return
+
+
+def print_time_statistics(total_time_statistics, proc_time_statistics, model_load_statistics=None):
+    """
+    推論処理の処理時間の統計情報を表示します。
+
+    Parameters
+    ----------
+    total_time_statistics : list
+        画像ファイルごとの全推論処理の処理時間のリスト。
+    proc_time_statistics : dict
+        推論処理名をキー、画像ファイルごとの処理時間のリストを値とする辞書型データ。
+    model_load_statistics : dict
+        推論処理名をキー、推論モデルの読み込み時間のリストを値とする辞書型データ。
+        並列実行時はワーカーごとの読み込み時間がリストに含まれます。
+    """
+    if len(total_time_statistics) == 0:
+        print('================== NO VALID INFERENCE ==================')
+    else:
+        print('================== PROCESSING TIME ==================')
+        for proc_name, proc_time_list in proc_time_statistics.items():
+            proc_averaege = sum(proc_time_list) / len(proc_time_list)
+            print(f'Average processing time ({proc_name})'.ljust(45, ' ') + f': {proc_averaege:8.4f} sec / image file ')
+        total_average = sum(total_time_statistics) / len(total_time_statistics)
+        print(f'Average processing time (total)'.ljust(45, ' ') + f': {total_average:8.4f} sec / image file ')
+    if model_load_statistics:
+        print('================== MODEL LOAD TIME ==================')
+        for proc_name, load_time_list in model_load_statistics.items():
+            load_average = sum(load_time_list) / len(load_time_list)
+            print(f'Model load time ({proc_name})'.ljust(45, ' ') + f': {load_average:8.4f} sec ')
+    return
+
 
 class OcrInferrer:
     """
@@ -42,6 +96,9 @@ class OcrInferrer:
         本実行処理における設定情報です。
     """
 
+    # fields depending on each run, which are not saved in the result cache
+    CACHE_RUN_FIELDS = ('img_path', 'output_dir', 'cache_key', 'img_source', 'pyramid', 'spread_pyramid')
+
     def __init__(self, cfg):
         """
         Parameters
@@ -56,56 +113,136 @@ class OcrInferrer:
             procs.LayoutExtractionProcess,  # 2: レイアウト抽出           出力：（画像：あり、XML：あり、TXT：なし）
             procs.LineOcrProcess,           # 3: 文字認識(OCR)            出力：（画像：あり、XML：あり、TXT：あり）
         ]
+        add_submodule_paths()
         self.proc_list = self._create_proc_list(cfg)
         self.cfg = cfg
+        self.reset_time_statistics()
+        self._manifest = None
+        self._output_writer = None
+        self._cache = None
+        if cfg['cache']['enable'] and not cfg['ruby_only']:
+            if cfg['dump']:
+                print('[WARNING] Result cache is disabled because dump flag is enabled.')
+            else:
+                self._cache = ResultCache(cfg['cache']['cache_dir'], cfg['cache']['max_size_mb'])
+        self.xml_template = '<?xml version="1.0" encoding="utf-8" standalone="yes"?>\n<OCRDATASET></OCRDATASET>'
+
+    def reset_time_statistics(self):
+        """
+        処理時間の統計情報を初期化します。
+        """
         self.total_time_statistics = []
         self.proc_time_statistics = {}
         for proc in self.proc_list:
             self.proc_time_statistics[proc.proc_name] = []
-        self.xml_template = '<?xml version="1.0" encoding="utf-8" standalone="yes"?>\n<OCRDATASET></OCRDATASET>'
+        self.metrics = InferenceMetrics()
 
-    def run(self):
+    def run(self, print_statistics=True):
         """
         self.cfgに保存された設定に基づいた推論処理を実行します。
+
+        Parameters
+        ----------
+        print_statistics : bool
+            処理時間の統計情報を最後に表示し、計測値のレポートを保存するかどうかのフラグ。
         """
         if len(self.cfg['input_dirs']) == 0:
             print('[ERROR] Input directory list is empty', file=sys.stderr)
             return
+        self.metrics.start()
+
+        # completed pages are recorded so that an interrupted run can be resumed later,
+        # the manifest of the previous run is loaded when resuming
+        self._manifest = None
+        if (not self.cfg['ruby_only']) and (self.cfg['resume'] or self.cfg['output']['manifest']):
+            self._manifest = InferenceManifest(self.cfg['output_root'])
+
+        # txt and image files are written in background threads
+        output_cfg = self.cfg['output']
+        self._output_writer = AsyncOutputWriter(output_cfg['writer_workers'], output_cfg['writer_queue_size'],
+                                                output_cfg['fsync'], self.metrics)
+        for proc in self.proc_list:
+            proc.output_writer = self._output_writer
 
-        # input dir loop
-        for input_dir in self.cfg['input_dirs']:
-            if self.cfg['input_structure'] in ['t']:
-                single_outputdir_data_list = self._get_single_dir_data_from_tosho_data(input_dir)
-            else:
-                single_outputdir_data_list = self._get_single_dir_data(input_dir)
+        try:
+            # input dir loop
+            for input_dir in self.cfg['input_dirs']:
+                if self.cfg['input_structure'] in ['t']:
+                    single_outputdir_data_list = self._get_single_dir_data_from_tosho_data(input_dir)
+                else:
+                    single_outputdir_data_list = self._get_single_dir_data(input_dir)
 
-            if single_outputdir_data_list is None:
-                print('[ERROR] Input data list is empty', file=sys.stderr)
-                continue
-            print(single_outputdir_data_list)
-            # do infer with input data for single output data dir
-            for single_outputdir_data in single_outputdir_data_list:
-                if single_outputdir_data is None:
+                if single_outputdir_data_list is None:
+                    print('[ERROR] Input data list is empty', file=sys.stderr)
                     continue
-                if self.cfg['ruby_only']:
-                    pred_list = self._infer_ruby_only(single_outputdir_data)
-                else:
-                    pred_list = self._infer(single_outputdir_data)
+                print(single_outputdir_data_list)
+                # do infer with input data for single output data dir
+                for single_outputdir_data in single_outputdir_data_list:
+                    if single_outputdir_data is None:
+                        continue
+                    try:
+                        if self.cfg['ruby_only']:
+                            pred_list = self._infer_ruby_only(single_outputdir_data)
+                        else:
+                            pred_list = self._infer(single_outputdir_data)
+                    finally:
+                        # release per-book state of procs (e.g. tracked gutter positions)
+                        for proc in self.proc_list:
+                            proc.finish_output_dir(single_outputdir_data['output_dir'])
+
+                    # save inferenced xml in xml directory
+                    # (xml is already written page by page with streaming xml writer)
+                    if self._need_xml_output() and (self.cfg['ruby_only'] or not self.cfg['output']['streaming_xml']):
+                        self._save_pred_xml(single_outputdir_data['output_dir'], pred_list, self.cfg['line_order'])
+        finally:
+            self._output_writer.close()
+            for proc in self.proc_list:
+                proc.output_writer = None
+            self._output_writer = None
+        self.metrics.stop()
+        if print_statistics:
+            print_time_statistics(self.total_time_statistics, self.proc_time_statistics,
+                                  self.metrics.get_samples('model_load/'))
+            if self.cfg['metrics']['report']:
+                self.metrics.write_report(self.cfg['output_root'], self.total_time_statistics,
+                                          self.proc_time_statistics, self.cfg['metrics']['prometheus'])
+        if self._cache is not None:
+            print('### result cache hit: {0}, miss: {1} ###'.format(self._cache.hit_count, self._cache.miss_count))
+        return
 
-                # save inferenced xml in xml directory
-                if (self.cfg['save_xml'] or self.cfg['partial_infer']) and (self.cfg['proc_range']['end'] > 1):
-                    self._save_pred_xml(single_outputdir_data['output_dir'], [single_data['xml'] for single_data in pred_list], self.cfg['line_order'])
-        if len(self.total_time_statistics) == 0:
-            print('================== NO VALID INFERENCE ==================')
-        else:
-            print('================== PROCESSING TIME ==================')
-            for proc_name, proc_time_list in self.proc_time_statistics.items():
-                proc_averaege = sum(proc_time_list) / len(proc_time_list)
-                print(f'Average processing time ({proc_name})'.ljust(45, ' ') + f': {proc_averaege:8.4f} sec / image file ')
-            total_average = sum(self.total_time_statistics) / len(self.total_time_statistics)
-            print(f'Average processing time (total)'.ljust(45, ' ') + f': {total_average:8.4f} sec / image file ')
+    def load_models(self):
+        """
+        全推論処理の推論モデルを読み込みます。
+        推論モデルは通常最初の推論実行時に読み込まれるため、
+        推論サーバのように事前に読み込んでおきたい場合にのみ利用します。
+        """
+        for proc in self.proc_list:
+            model_loaded = proc.model_loaded
+            proc.load_model()
+            self._record_model_load(proc, model_loaded)
         return
 
+    def _record_model_load(self, proc, model_loaded):
+        """
+        推論処理の実行中に推論モデルが読み込まれた場合、その読み込み時間を記録します。
+
+        Parameters
+        ----------
+        proc : BaseInferenceProcess
+            実行した推論処理。
+        model_loaded : bool
+            推論処理の実行前に推論モデルが読み込み済みだったかどうかのフラグ。
+
+        Returns
+        -------
+        load_time : float
+            推論処理の実行中に推論モデルの読み込みにかかった時間(秒)。読み込みが無かった場合は0です。
+        """
+        if model_loaded or not proc.model_loaded:
+            return 0.0
+        self.metrics.add('model_load/' + proc.proc_name, proc.model_load_time)
+        return proc.model_load_time
+
     def _infer_ruby_only(self, single_outputdir_data):
         """
         self.cfgに保存された設定に基づき、XML一つ分のデータに対するルビ推定処理を実行します。
@@ -119,8 +256,7 @@ class OcrInferrer:
         Returns
         -------
         pred_list : list
-            1ページ分の推論結果を要素に持つ推論結果のリスト。
-            各結果は辞書型で保持されています。
+            1ページ分の推論結果のXMLデータを要素に持つリスト。
         """
         # single_outputdir_data dictionary include [key, value] pairs as below
         # [key, value]: ['img', None], ['xml', xml_tree]
@@ -138,13 +274,15 @@ class OcrInferrer:
 
             for proc in self.proc_list:
                 start_proc = time.time()
+                model_loaded = proc.model_loaded
                 single_page_output = []
                 for idx, single_data_input in enumerate(single_image_file_data):
                     single_data_output = proc.do(idx, single_data_input)
                     single_page_output.extend(single_data_output)
 
                 single_image_file_data = single_page_output
-                self.proc_time_statistics[proc.proc_name].append(time.time() - start_proc)
+                load_time = self._record_model_load(proc, model_loaded)
+                self.proc_time_statistics[proc.proc_name].append(time.time() - start_proc - load_time)
 
             single_image_file_output = single_image_file_data
             self.total_time_statistics.append(time.time() - start_page)
@@ -173,8 +311,8 @@ class OcrInferrer:
 
                 self._save_pred_txt(sum_main_txt, sum_cap_txt, sum_ruby_txt, page_xml.attrib['IMAGENAME'], single_outputdir_data['output_dir'])
 
-            # add inference result for single image file data to pred_list, including XML data
-            pred_list.extend(single_image_file_output)
+            # add XML data of inference result for single image file data to pred_list
+            pred_list.extend(single_data_output['xml'] for single_data_output in single_image_file_output)
             print('########  END PAGE INFERENCE PROCESS  ########')
 
         return pred_list
@@ -192,8 +330,8 @@ class OcrInferrer:
         Returns
         -------
         pred_list : list
-            1ページ分の推論結果を要素に持つ推論結果のリスト。
-            各結果は辞書型で保持されています。
+            1ページ分の推論結果のXMLデータを要素に持つリスト。
+            書籍単位のXMLファイルをまとめて保存する場合のみ作成し、それ以外の場合は空のリストを返します。
         """
         # single_outputdir_data dictionary include [key, value] pairs as below
         # (xml is not always included)
@@ -209,9 +347,236 @@ class OcrInferrer:
                 proc_dump_dir = os.path.join(dump_dir, proc.proc_name)
                 os.makedirs(proc_dump_dir, exist_ok=True)
 
-        for img_path in single_outputdir_data['img_list']:
-            single_image_file_data = self._get_single_image_file_data(img_path, single_outputdir_data)
-            output_dir = single_outputdir_data['output_dir']
+        # skip pages completed in the previous run when resuming
+        img_list = single_outputdir_data['img_list']
+        proc_name_list = [proc.proc_name for proc in self.proc_list]
+        resumed_output_dict = {}
+        if self.cfg['resume'] and (self._manifest is not None):
+            resumed_output_dict = self._get_resumed_output_dict(img_list, single_outputdir_data['output_dir'],
+                                                                proc_name_list)
+            if len(resumed_output_dict) > 0:
+                print('### {0} pages are skipped(already completed) ###'.format(len(resumed_output_dict)))
+        target_outputdir_data = dict(single_outputdir_data)
+        target_outputdir_data['img_list'] = [img_path for img_path in img_list if img_path not in resumed_output_dict]
+
+        if self.cfg['pipeline']['enable']:
+            page_output_iter = self._run_pipelined(target_outputdir_data)
+        else:
+            page_output_iter = self._run_serial(target_outputdir_data, pred_xml_dict_for_dump)
+
+        # write each page to xml file as soon as it completes instead of keeping all pages in pred_list
+        xml_writer = None
+        if self._need_xml_output() and self.cfg['output']['streaming_xml']:
+            xml_dir = os.path.join(single_outputdir_data['output_dir'], 'xml')
+            os.makedirs(xml_dir, exist_ok=True)
+            xml_writer = StreamingXmlWriter(self._get_pred_xml_path(single_outputdir_data['output_dir'], self.cfg['line_order']))
+            xml_writer.open()
+
+        def add_page_output(single_image_file_output):
+            if xml_writer is not None:
+                start_xml = time.time()
+                for single_data_output in single_image_file_output:
+                    xml_writer.write(single_data_output['xml'])
+                self.metrics.add('xml_serialization', time.time() - start_xml)
+            elif self._need_xml_output():
+                # keep only XML data (not images) until the xml file of the whole book is saved
+                pred_list.extend(single_data_output['xml'] for single_data_output in single_image_file_output)
+
+        # pages are added in input order, merging pages completed in the previous run
+        waiting_img_list = collections.deque(img_list)
+
+        def add_resumed_page_output(until_img_path=None):
+            while len(waiting_img_list) > 0 and waiting_img_list[0] != until_img_path:
+                resumed_img_path = waiting_img_list.popleft()
+                if resumed_img_path in resumed_output_dict:
+                    add_page_output(resumed_output_dict.pop(resumed_img_path))
+
+        # pages are recorded in the manifest after their output files are flushed
+        completed_page_list = []
+
+        def record_completed_pages():
+            if len(completed_page_list) == 0:
+                return
+            self._output_writer.flush()
+            if xml_writer is not None:
+                xml_writer.sync()
+            self._manifest.record(completed_page_list)
+            completed_page_list.clear()
+
+        try:
+            for img_path, single_image_file_output in page_output_iter:
+                output_dir = single_outputdir_data['output_dir']
+                file_list = self._save_page_output(img_path, single_image_file_output, output_dir)
+                self._count_page_output(single_image_file_output)
+                add_resumed_page_output(img_path)
+                if len(waiting_img_list) > 0:
+                    waiting_img_list.popleft()
+                add_page_output(single_image_file_output)
+
+                if self._manifest is not None:
+                    page_xml_path = None
+                    xml_page_num = None
+                    if self._need_xml_output():
+                        xml_page_num = sum(len(single_data['xml'].getroot()) for single_data in single_image_file_output)
+                        # pages in the streaming xml file are used as they are when resuming
+                        if xml_writer is None:
+                            page_xml_path = self._save_resume_page_xml(img_path, single_image_file_output, output_dir)
+                            file_list.append(page_xml_path)
+                    completed_page_list.append(InferenceManifest.create_entry(img_path, output_dir, proc_name_list,
+                                                                              file_list, page_xml_path, xml_page_num))
+                    if len(completed_page_list) >= self._output_writer.queue_size:
+                        record_completed_pages()
+                print('########  END PAGE INFERENCE PROCESS  ########')
+            add_resumed_page_output()
+            record_completed_pages()
+        except BaseException:
+            # pages completed before the error can be skipped when resuming
+            if self._manifest is not None:
+                try:
+                    record_completed_pages()
+                except OSError as err:
+                    print('[ERROR] Failed to record completed pages : {0}'.format(err), file=sys.stderr)
+            if xml_writer is not None:
+                # keep the pages written so far for resuming
+                xml_writer.abort(keep_tmp=(self._manifest is not None))
+            raise
+
+        if xml_writer is not None:
+            xml_writer.close()
+        return pred_list
+
+    def _count_page_output(self, single_image_file_output):
+        """
+        スループットの計測のため、推論処理を実行したページ数と認識した行数を計数します。
+        傾き補正で傾きを推定した場合は、その探索時間も記録します。
+
+        Parameters
+        ----------
+        single_image_file_output : list
+            入力画像1つに対する推論結果のリスト。
+        """
+        self.metrics.count('pages')
+        for single_data_output in single_image_file_output:
+            if 'xml' in single_data_output.keys() and single_data_output['xml'] is not None:
+                self.metrics.count('lines', sum(1 for _ in single_data_output['xml'].iter('LINE')))
+            if 'skew_search' in single_data_output.keys():
+                self.metrics.add('deskew_search', single_data_output['skew_search']['time'])
+        return
+
+    def _save_resume_page_xml(self, img_path, single_image_file_output, output_dir):
+        """
+        推論再開時に書籍単位のXMLを再構成できるよう、1ページ分の推論結果のXMLを保存します。
+        XMLファイルを逐次書き出す場合は書き出し中のXMLファイルを利用するため、保存しません。
+
+        Parameters
+        ----------
+        img_path : str
+            入力画像のパス。
+        single_image_file_output : list
+            入力画像1つに対する推論結果のリスト。
+        output_dir : str
+            推論結果を保存するディレクトリのパス。
+
+        Returns
+        -------
+        page_xml_path : str
+            保存したXMLファイルのパス。
+        """
+        resume_dir = os.path.join(output_dir, '.resume')
+        os.makedirs(resume_dir, exist_ok=True)
+        stem, _ = os.path.splitext(os.path.basename(img_path))
+        page_xml_path = os.path.join(resume_dir, stem + '.xml')
+        page_xml = self._parse_pred_list_to_save([single_data['xml'] for single_data in single_image_file_output])
+        page_xml.write(page_xml_path, encoding='utf-8', xml_declaration=True)
+        return page_xml_path
+
+    def _get_resumed_output_dict(self, img_list, output_dir, proc_name_list):
+        """
+        前回の推論処理で完了したページの推論結果を読み込みます。
+        XMLファイルを逐次書き出す場合、前回書き出したXMLファイルのPAGE要素を入力順にページへ対応付けるため、
+        対応付けられないページ(完了記録の無いページ)以降のページは完了済みとして扱いません。
+
+        Parameters
+        ----------
+        img_list : list
+            入力画像のパスのリスト。
+        output_dir : str
+            推論結果を保存するディレクトリのパス。
+        proc_name_list : list
+            実行する推論処理名のリスト。
+
+        Returns
+        -------
+        resumed_output_dict : dict
+            完了済みの入力画像のパスをキー、XMLデータのみを持つ推論結果のリストを値とする辞書型データ。
+        """
+        resumed_output_dict = {}
+        streamed_page_list = None
+        if self._need_xml_output() and self.cfg['output']['streaming_xml']:
+            streamed_page_list = StreamingXmlWriter.read_pages(self._get_pred_xml_path(output_dir, self.cfg['line_order']))
+        page_idx = 0
+        for img_path in img_list:
+            entry = None
+            if self._manifest.is_completed(img_path, output_dir, proc_name_list):
+                entry = self._manifest.get_entry(img_path)
+            if streamed_page_list is not None:
+                xml_page_num = None if entry is None else entry.get('xml_page_num')
+                if (xml_page_num is None) or (page_idx + xml_page_num > len(streamed_page_list)):
+                    break
+                page_list = streamed_page_list[page_idx:page_idx + xml_page_num]
+                page_idx += xml_page_num
+            elif entry is None:
+                continue
+            elif self._need_xml_output():
+                # xml was not saved in the previous run
+                if entry.get('page_xml') is None:
+                    continue
+                page_list = list(ET.parse(entry['page_xml']).getroot())
+            else:
+                page_list = []
+            resumed_output_dict[img_path] = self._get_page_output_from_pages(page_list)
+        return resumed_output_dict
+
+    def _get_page_output_from_pages(self, page_list):
+        """
+        PAGE要素のリストから、XMLデータのみを持つ推論結果のリストを作成します。
+
+        Parameters
+        ----------
+        page_list : list
+            PAGE要素のリスト。
+
+        Returns
+        -------
+        single_image_file_output : list
+            XMLデータのみを持つ推論結果のリスト。
+        """
+        ET.register_namespace('', 'NDLOCRDATASET')
+        single_image_file_output = []
+        for page in page_list:
+            node = ET.fromstring(self.xml_template)
+            node.append(page)
+            single_image_file_output.append(procs.PageRecord({'xml': ET.ElementTree(node)}))
+        return single_image_file_output
+
+    def _run_serial(self, single_outputdir_data, pred_xml_dict_for_dump):
+        """
+        1ページずつ全推論処理を順に実行し、ページごとの推論結果を返すジェネレータ。
+
+        Parameters
+        ----------
+        single_outputdir_data : dict
+            XML一つ分のデータ（基本的に1書籍分を想定）の入力データ情報。
+        pred_xml_dict_for_dump : dict
+            dump用に各推論処理の入力XMLデータを保持する辞書型データ。
+
+        Yields
+        ------
+        (img_path, single_image_file_output) : tuple
+            入力画像のパスと、その画像に対する推論結果のリスト。
+        """
+        for img_path, orig_img in self._iter_input_images(single_outputdir_data['img_list']):
+            single_image_file_data = self._get_single_image_file_data(img_path, single_outputdir_data, orig_img)
             if single_image_file_data is None:
                 print('[ERROR] Failed to get single page input data for image:{0}'.format(img_path), file=sys.stderr)
                 continue
@@ -220,66 +585,331 @@ class OcrInferrer:
             start_page = time.time()
 
             for proc in self.proc_list:
-                start_proc = time.time()
-                single_page_output = []
-                for idx, single_data_input in enumerate(single_image_file_data):
-                    single_data_output = proc.do(idx, single_data_input)
-                    single_page_output.extend(single_data_output)
+                single_page_output = self._run_proc(proc, single_image_file_data)
                 # save inference result data to dump
                 if self.cfg['dump'] and 'xml' in single_image_file_data[0].keys():
                     pred_xml_dict_for_dump[proc.proc_name].append(single_image_file_data[0]['xml'])
-
                 single_image_file_data = single_page_output
-                self.proc_time_statistics[proc.proc_name].append(time.time() - start_proc)
 
-            single_image_file_output = single_image_file_data
             self.total_time_statistics.append(time.time() - start_page)
+            yield img_path, single_image_file_data
 
-            if self.cfg['save_image'] or self.cfg['partial_infer']:
-                # save inferenced result drawn image in pred_img directory
-                for single_data_output in single_image_file_output:
-                    # save input image while partial inference
-                    if self.cfg['partial_infer']:
-                        img_output_dir = os.path.join(output_dir, 'img')
-                        self._save_image(single_data_output['img'], single_data_output['img_file_name'], img_output_dir)
+    def _run_pipelined(self, single_outputdir_data):
+        """
+        画像の読み込みと各推論処理をそれぞれ別のワーカーで実行し、
+        連続するページの処理を重ね合わせて実行するジェネレータ。
+        ページごとの推論結果は入力画像の順序のまま返されます。
 
-                    pred_img = self._create_result_image(single_data_output, self.proc_list[-1].proc_name)
-                    img_output_dir = os.path.join(output_dir, 'pred_img')
-                    self._save_image(pred_img, single_data_output['img_file_name'], img_output_dir)
+        Parameters
+        ----------
+        single_outputdir_data : dict
+            XML一つ分のデータ（基本的に1書籍分を想定）の入力データ情報。
 
-            # save inferenced result text for this page
-            if self.cfg['proc_range']['end'] > 2:
-                sum_main_txt = ''
-                sum_cap_txt = ''
-                sum_ruby_txt = None
-                if self.cfg['ruby_read']:
-                    sum_ruby_txt = ''
+        Yields
+        ------
+        (img_path, single_image_file_output) : tuple
+            入力画像のパスと、その画像に対する推論結果のリスト。
+        """
+        def load_page(input_image):
+            img_path, orig_img = input_image
+            single_image_file_data = self._get_single_image_file_data(img_path, single_outputdir_data, orig_img)
+            if single_image_file_data is None:
+                print('[ERROR] Failed to get single page input data for image:{0}'.format(img_path), file=sys.stderr)
+                return None
+            print('######## START PAGE INFERENCE PROCESS : {0} ########'.format(os.path.basename(img_path)))
+            return {'img_path': img_path, 'data': single_image_file_data, 'start': time.time()}
+
+        def create_stage_func(proc):
+            def stage_func(page_list):
+                single_page_output_list = self._run_proc_batch(proc, [page['data'] for page in page_list])
+                for page, single_page_output in zip(page_list, single_page_output_list):
+                    page['data'] = single_page_output
+                return page_list
+            if proc.batch_pages > 1:
+                return stage_func
+            return lambda page: stage_func([page])[0]
+
+        stage_func_list = [load_page] + [create_stage_func(proc) for proc in self.proc_list]
+        batch_size_list = [1] + [proc.batch_pages for proc in self.proc_list]
+        pipeline = StagePipeline(stage_func_list, self.cfg['pipeline']['queue_size'], batch_size_list)
+        for page in pipeline.run(self._iter_input_images(single_outputdir_data['img_list'])):
+            # processing time of pipelined page is the latency from load to the last proc
+            self.total_time_statistics.append(time.time() - page['start'])
+            yield page['img_path'], page['data']
+
+    def _iter_input_images(self, img_path_list):
+        """
+        入力画像ファイルパスと読み込み済みの画像データの組を順に返します。
+        先読みが有効な場合、画像のデコードはバックグラウンドで先行して実行されます。
 
-                # check if xml output for this image is vertical text
-                vertical_text_page = 0
-                for single_data_output in single_image_file_output:
-                    if self._is_vertical_text_xml(single_data_output['xml']):
-                        vertical_text_page += 1
+        Parameters
+        ----------
+        img_path_list : list
+            入力画像ファイルパスのリスト。
 
-                # reverse order of page if it's vertical text
-                single_image_file_output_for_txt = single_image_file_output
-                if vertical_text_page >= len(single_image_file_output):
-                    single_image_file_output_for_txt = list(reversed(single_image_file_output))
+        Returns
+        -------
+        [変数なし] : iterable
+            (画像ファイルパス, 画像データ)の組を返すイテラブル。
+            先読みが無効な場合、画像データはNoneとなり読み込みは後で実行されます。
+        """
+        loader_cfg = self.cfg['image_loader']
+        if loader_cfg['prefetch'] <= 0:
+            return ((img_path, None) for img_path in img_path_list)
+        return ImagePrefetcher(img_path_list,
+                               prefetch_num=loader_cfg['prefetch'],
+                               worker_num=loader_cfg['workers'],
+                               memory_budget_mb=loader_cfg['memory_budget_mb'],
+                               read_func=self._read_image)
+
+    def _read_image(self, img_path):
+        """
+        画像ファイルを読み込み、デコードにかかった時間を記録します。
+        NPY形式や(設定で有効な場合)非圧縮のTIFF形式の画像はメモリマップで読み込みます。
 
-                for single_data_output in single_image_file_output_for_txt:
-                    main_txt, cap_txt = self._create_result_txt(single_data_output['xml'])
-                    sum_main_txt += main_txt + '\n'
-                    sum_cap_txt += sum_cap_txt + '\n'
-                    if self.cfg['ruby_read']:
-                        sum_ruby_txt += single_data_output['ruby_txt'] + '\n'
+        Parameters
+        ----------
+        img_path : str
+            画像ファイルのパス。
 
-                self._save_pred_txt(sum_main_txt, sum_cap_txt, sum_ruby_txt, os.path.basename(img_path), single_outputdir_data['output_dir'])
+        Returns
+        -------
+        img : numpy.ndarray
+            画像データ。読み込みに失敗した場合はNoneを返します。
+        """
+        start_decode = time.time()
+        img = self._get_image_source(img_path).read()
+        self.metrics.add('image_decode', time.time() - start_decode)
+        return img
 
-            # add inference result for single image file data to pred_list, including XML data
-            pred_list.extend(single_image_file_output)
-            print('########  END PAGE INFERENCE PROCESS  ########')
+    def _get_image_source(self, img_path):
+        """
+        画像ファイルの読み込み方法を保持するImageSourceを作成します。
 
-        return pred_list
+        Parameters
+        ----------
+        img_path : str
+            画像ファイルのパス。
+
+        Returns
+        -------
+        img_source : ImageSource
+            画像ファイルの読み込み方法を保持するインスタンス。
+        """
+        return ImageSource(img_path, mmap_tiff=self.cfg['image_loader']['mmap_tiff'])
+
+    def _run_proc(self, proc, single_image_file_data):
+        """
+        画像ファイル1つ分の入力データに対して1つの推論処理を実行します。
+
+        Parameters
+        ----------
+        proc : BaseInferenceProcess
+            実行する推論処理。
+        single_image_file_data : list
+            画像ファイル1つ分の入力データのリスト。
+
+        Returns
+        -------
+        single_page_output : list
+            推論処理の結果のリスト。
+        """
+        return self._run_proc_batch(proc, [single_image_file_data])[0]
+
+    def _run_proc_batch(self, proc, single_image_file_data_list):
+        """
+        複数の画像ファイル分の入力データに対して1つの推論処理をまとめて実行します。
+        処理時間は画像ファイルの数で等分して記録します。
+
+        Parameters
+        ----------
+        proc : BaseInferenceProcess
+            実行する推論処理。
+        single_image_file_data_list : list
+            画像ファイル1つ分の入力データのリストを要素に持つリスト。
+
+        Returns
+        -------
+        single_page_output_list : list
+            画像ファイルごとの推論処理の結果のリスト。
+        """
+        start_proc = time.time()
+        model_loaded = proc.model_loaded
+        data_idx_list = []
+        input_data_list = []
+        for single_image_file_data in single_image_file_data_list:
+            for idx, single_data_input in enumerate(single_image_file_data):
+                data_idx_list.append(idx)
+                input_data_list.append(single_data_input)
+        result_list = self._do_proc_batch_with_cache(proc, data_idx_list, input_data_list)
+        load_time = self._record_model_load(proc, model_loaded)
+
+        # scatter results to each image file
+        single_page_output_list = []
+        result_idx = 0
+        for single_image_file_data in single_image_file_data_list:
+            single_page_output = []
+            for _ in single_image_file_data:
+                single_page_output.extend(result_list[result_idx])
+                result_idx += 1
+            single_page_output_list.append(single_page_output)
+
+        # model loaded on demand is reported separately from processing time
+        elapsed_time = (time.time() - start_proc - load_time) / len(single_image_file_data_list)
+        for _ in single_image_file_data_list:
+            self.proc_time_statistics[proc.proc_name].append(elapsed_time)
+        return single_page_output_list
+
+    def _do_proc_batch_with_cache(self, proc, data_idx_list, input_data_list):
+        """
+        結果キャッシュを利用して推論処理を実行します。
+        キャッシュに結果がある入力データは推論処理を実行せず、キャッシュの結果を返します。
+
+        Parameters
+        ----------
+        proc : BaseInferenceProcess
+            実行する推論処理。
+        data_idx_list : list
+            各入力データのインデックスのリスト。
+        input_data_list : list
+            推論処理を実行する対象の入力データのリスト。
+
+        Returns
+        -------
+        result_list : list
+            入力データごとの推論処理の結果のリスト。
+        """
+        signature = None
+        if self._cache is not None:
+            signature = proc.cache_signature()
+        if signature is None:
+            return proc.do_batch(data_idx_list, input_data_list)
+
+        # key of this proc output is chained from the key of the input
+        key_list = []
+        for input_data in input_data_list:
+            if 'cache_key' in input_data:
+                key_list.append(ResultCache.make_key(input_data['cache_key'], proc.proc_name, signature))
+            else:
+                key_list.append(None)
+
+        result_list = []
+        for key, input_data in zip(key_list, input_data_list):
+            cached_result = None
+            if key is not None:
+                cached_result = self._cache.get(key)
+            if cached_result is not None:
+                cached_result = [self._restore_cached_record(fields, input_data) for fields in cached_result]
+            result_list.append(cached_result)
+
+        miss_idx_list = [i for i, result in enumerate(result_list) if result is None]
+        if len(miss_idx_list) > 0:
+            miss_result_list = proc.do_batch([data_idx_list[i] for i in miss_idx_list],
+                                             [input_data_list[i] for i in miss_idx_list])
+            for i, result in zip(miss_idx_list, miss_result_list):
+                if key_list[i] is not None:
+                    self._cache.put(key_list[i], [self._strip_run_fields(single_result) for single_result in result])
+                result_list[i] = result
+
+        # set keys to the outputs for following procs
+        for key, result in zip(key_list, result_list):
+            if key is None:
+                continue
+            for i, single_result in enumerate(result):
+                result[i] = procs.PageRecord.from_data(single_result).replace(cache_key=ResultCache.make_key(key, str(i)))
+        return result_list
+
+    def _strip_run_fields(self, single_result):
+        return {key: value for key, value in single_result.items() if key not in OcrInferrer.CACHE_RUN_FIELDS}
+
+    def _restore_cached_record(self, fields, input_data):
+        updates = {key: input_data[key] for key in ('img_path', 'output_dir') if key in input_data}
+        if 'orig_img_path' in fields:
+            updates['orig_img_path'] = input_data.get('orig_img_path', input_data['img_path'])
+        return procs.PageRecord(fields).replace(**updates)
+
+    def _set_cache_key(self, single_image_file_data):
+        """
+        入力画像のハッシュ値から、結果キャッシュの最初のキーを計算して入力データに設定します。
+
+        Parameters
+        ----------
+        single_image_file_data : list
+            1ページ分の入力データのリスト。
+
+        Returns
+        -------
+        single_image_file_data : list
+            キーを設定した入力データのリスト。
+        """
+        if self._cache is None:
+            return single_image_file_data
+        single_data = single_image_file_data[0]
+        key = ResultCache.make_key(ResultCache.digest_file(single_data['img_path']), single_data['img_file_name'])
+        if 'xml' in single_data:
+            key = ResultCache.make_key(key, ET.tostring(single_data['xml'].getroot()))
+        single_data['cache_key'] = key
+        return single_image_file_data
+
+    def _save_page_output(self, img_path, single_image_file_output, output_dir):
+        """
+        1ページ分の推論結果の画像とテキストを保存します。
+
+        Parameters
+        ----------
+        img_path : str
+            入力画像のパス。
+        single_image_file_output : list
+            入力画像1つに対する推論結果のリスト。
+        output_dir : str
+            推論結果を保存するディレクトリのパス。
+
+        Returns
+        -------
+        file_list : list
+            保存したファイルのパスのリスト。
+        """
+        file_list = []
+        if self.cfg['save_image'] or self.cfg['partial_infer']:
+            # save inferenced result drawn image in pred_img directory
+            for single_data_output in single_image_file_output:
+                # save input image while partial inference
+                if self.cfg['partial_infer']:
+                    img_output_dir = os.path.join(output_dir, 'img')
+                    file_list.append(self._save_image(single_data_output['img'], single_data_output['img_file_name'], img_output_dir))
+
+                pred_img = self._create_result_image(single_data_output, self.proc_list[-1].proc_name)
+                img_output_dir = os.path.join(output_dir, 'pred_img')
+                file_list.append(self._save_image(pred_img, single_data_output['img_file_name'], img_output_dir))
+
+        # save inferenced result text for this page
+        if self.cfg['proc_range']['end'] > 2:
+            sum_main_txt = ''
+            sum_cap_txt = ''
+            sum_ruby_txt = None
+            if self.cfg['ruby_read']:
+                sum_ruby_txt = ''
+
+            # check if xml output for this image is vertical text
+            vertical_text_page = 0
+            for single_data_output in single_image_file_output:
+                if self._is_vertical_text_xml(single_data_output['xml']):
+                    vertical_text_page += 1
+
+            # reverse order of page if it's vertical text
+            single_image_file_output_for_txt = single_image_file_output
+            if vertical_text_page >= len(single_image_file_output):
+                single_image_file_output_for_txt = list(reversed(single_image_file_output))
+
+            for single_data_output in single_image_file_output_for_txt:
+                main_txt, cap_txt = self._create_result_txt(single_data_output['xml'])
+                sum_main_txt += main_txt + '\n'
+                sum_cap_txt += sum_cap_txt + '\n'
+                if self.cfg['ruby_read']:
+                    sum_ruby_txt += single_data_output['ruby_txt'] + '\n'
+
+            file_list.extend(self._save_pred_txt(sum_main_txt, sum_cap_txt, sum_ruby_txt, os.path.basename(img_path), output_dir))
+        return file_list
 
     def _get_single_dir_data(self, input_dir):
         """
@@ -356,7 +986,11 @@ class OcrInferrer:
             return None
 
         # output directory existence check
-        output_dir = utils.mkdir_with_duplication_check(output_dir)
+        if self.cfg['resume']:
+            # reuse output directory of the previous run
+            os.makedirs(output_dir, exist_ok=True)
+        else:
+            output_dir = utils.mkdir_with_duplication_check(output_dir)
         single_dir_data['output_dir'] = output_dir
 
         return [single_dir_data]
@@ -407,7 +1041,7 @@ class OcrInferrer:
 
         return single_dir_data_list
 
-    def _get_single_image_file_data(self, img_path, single_dir_data):
+    def _get_single_image_file_data(self, img_path, single_dir_data, orig_img=None):
         """
         1ページ分の入力データに関する情報を整理して取得します。
 
@@ -418,6 +1052,8 @@ class OcrInferrer:
         single_dir_data : dict
             1書籍分の入力データに関する情報を保持する辞書型データです。
             xmlファイルへのパス、結果を出力するディレクトリのパスなどを含みます。
+        orig_img : numpy.ndarray
+            先読み済みの画像データです。Noneの場合はimg_pathから読み込みます。
 
         Returns
         -------
@@ -425,11 +1061,11 @@ class OcrInferrer:
             1ページ分のデータの入力データ情報です。
             画像ファイルのパスとnumpy.ndarray形式の画像データ、その画像に対応するXMLデータを含みます。
         """
-        single_image_file_data = [{
+        single_image_file_data = [procs.PageRecord({
             'img_path': img_path,
             'img_file_name': os.path.basename(img_path) if isinstance(img_path, str) else None,
             'output_dir': single_dir_data['output_dir']
-        }]
+        })]
 
         full_xml = None
         if 'xml' in single_dir_data.keys():
@@ -437,15 +1073,18 @@ class OcrInferrer:
 
         # get img data for single page
         if isinstance(img_path, str):
-            orig_img = cv2.imread(img_path)
+            if orig_img is None:
+                orig_img = self._read_image(img_path)
             if orig_img is None:
                 print('[ERROR] Image read error : {0}'.format(img_path), file=sys.stderr)
                 return None
             single_image_file_data[0]['img'] = orig_img
+            # the source is kept to read reduced resolution image without decoding full image again
+            single_image_file_data[0]['img_source'] = self._get_image_source(img_path)
 
         # return if this proc needs only img data for input
         if full_xml is None:
-            return single_image_file_data
+            return self._set_cache_key(single_image_file_data)
 
         if self.cfg['ruby_only']:
             tmp_idx = 0
@@ -473,7 +1112,7 @@ class OcrInferrer:
             print('[ERROR] Input PAGE data for page {} not found in XML data.'.format(img_path), file=sys.stderr)
             return None
 
-        return single_image_file_data
+        return self._set_cache_key(single_image_file_data)
 
     def _create_proc_list(self, cfg):
         """
@@ -485,29 +1124,50 @@ class OcrInferrer:
             推論実行時の設定情報を保存した辞書型データ。
         """
         if cfg['ruby_only']:
-            return [procs.RubyReadingProcess(cfg, 'ex2')]
+            return [self._create_proc(procs.RubyReadingProcess, cfg, 'ex2')]
 
         proc_list = []
         for i in range(cfg['proc_range']['start'], cfg['proc_range']['end'] + 1):
-            proc_list.append(self.full_proc_list[i](cfg, i))
+            proc_list.append(self._create_proc(self.full_proc_list[i], cfg, i))
         if cfg['line_order']:
             if cfg['proc_range']['end'] <= 2:
                 print('[WARNING] LineOrderProcess will be skipped(this process needs LineOcrProcess output).')
             else:
-                proc_list.append(procs.LineOrderProcess(cfg, 'ex1'))
+                proc_list.append(self._create_proc(procs.LineOrderProcess, cfg, 'ex1'))
         if cfg['ruby_read']:
             if cfg['proc_range']['end'] <= 2 or not cfg['line_order']:
                 print('[WARNING] RubyReadingProcess will be skipped(this process needs LineOrderProcess output).')
             else:
-                proc_list.append(procs.RubyReadingProcess(cfg, 'ex2'))
+                proc_list.append(self._create_proc(procs.RubyReadingProcess, cfg, 'ex2'))
         if cfg['line_attribute']['add_title_author']:
             if cfg['proc_range']['end'] <= 2:
                 print('[WARNING] LineAttributeProcess will be skipped(this process needs LineOcrProcess output).')
             else:
-                proc_list.append(procs.LineAttributeProcess(cfg, 'ex3'))
+                proc_list.append(self._create_proc(procs.LineAttributeProcess, cfg, 'ex3'))
 
         return proc_list
 
+    def _create_proc(self, proc_class, cfg, proc_id):
+        """
+        推論処理のインスタンスを作成します。
+        ベンチマークなどで推論モデルを差し替える場合は継承先でこの関数を変更します。
+
+        Parameters
+        ----------
+        proc_class : type
+            推論処理のクラス。
+        cfg : dict
+            推論実行時の設定情報を保存した辞書型データ。
+        proc_id : int, str
+            実行される順序を表す数値または文字列。
+
+        Returns
+        -------
+        proc : BaseInferenceProcess
+            推論処理のインスタンス。
+        """
+        return proc_class(cfg, proc_id)
+
     def _save_pred_xml(self, output_dir, pred_list, sorted):
         """
         推論結果のXMLデータをまとめたXMLファイルを生成して保存します。
@@ -525,15 +1185,46 @@ class OcrInferrer:
         xml_dir = os.path.join(output_dir, 'xml')
         os.makedirs(xml_dir, exist_ok=True)
 
-        # basically, output_dir is supposed to be PID, so it used as xml filename
-        if sorted:
-            xml_path = os.path.join(xml_dir, '{}.sorted.xml'.format(os.path.basename(output_dir)))
-        else:
-            xml_path = os.path.join(xml_dir, '{}.xml'.format(os.path.basename(output_dir)))
+        xml_path = self._get_pred_xml_path(output_dir, sorted)
+        start_xml = time.time()
         pred_xml = self._parse_pred_list_to_save(pred_list)
         utils.save_xml(pred_xml, xml_path)
+        self.metrics.add('xml_serialization', time.time() - start_xml)
         return
 
+    def _get_pred_xml_path(self, output_dir, sorted):
+        """
+        推論結果のXMLデータをまとめたXMLファイルのパスを返します。
+
+        Parameters
+        ----------
+        output_dir : str
+            推論結果を保存するディレクトリのパスです。
+        sorted : bool
+            読み順認識が実行されたかどうかのフラグ。
+
+        Returns
+        -------
+        xml_path : str
+            XMLファイルのパス。
+        """
+        xml_dir = os.path.join(output_dir, 'xml')
+        # basically, output_dir is supposed to be PID, so it used as xml filename
+        if sorted:
+            return os.path.join(xml_dir, '{}.sorted.xml'.format(os.path.basename(output_dir)))
+        return os.path.join(xml_dir, '{}.xml'.format(os.path.basename(output_dir)))
+
+    def _need_xml_output(self):
+        """
+        推論結果のXMLファイルを出力するかどうかを返します。
+
+        Returns
+        -------
+        [変数なし] : bool
+            XMLファイルを出力する場合はTrue, そうでなければFalseを返します。
+        """
+        return (self.cfg['save_xml'] or self.cfg['partial_infer']) and (self.cfg['proc_range']['end'] > 1)
+
     def _save_image(self, pred_img, orig_img_name, img_output_dir, id=''):
         """
         指定されたディレクトリに画像データを保存します。
@@ -551,6 +1242,11 @@ class OcrInferrer:
         id : str
             もともとの入力画像のファイル名に追加する処理結果ごとのidです。
             一つの入力画像から複数の画像データが出力される処理がある場合に必要になります。
+
+        Returns
+        -------
+        img_path : str
+            保存した画像ファイルのパス。
         """
         os.makedirs(img_output_dir, exist_ok=True)
         stem, ext = os.path.splitext(orig_img_name)
@@ -562,12 +1258,12 @@ class OcrInferrer:
 
         img_path = os.path.join(img_output_dir, orig_img_name)
         try:
-            cv2.imwrite(img_path, pred_img)
+            self._output_writer.write_image(img_path, pred_img)
         except OSError as err:
             print("[ERROR] Image save error: {0}".format(err), file=sys.stderr)
             raise OSError
 
-        return
+        return img_path
 
     def _save_pred_txt(self, main_txt, cap_txt, ruby_txt, orig_img_name, output_dir):
         """
@@ -586,39 +1282,45 @@ class OcrInferrer:
             基本的にはこのファイル名と同名で保存します。
         img_output_dir : str
             画像ファイルの保存先のディレクトリパス。
+
+        Returns
+        -------
+        txt_path_list : list
+            保存したテキストファイルのパスのリスト。
         """
+        txt_path_list = []
         txt_dir = os.path.join(output_dir, 'txt')
         os.makedirs(txt_dir, exist_ok=True)
 
         stem, _ = os.path.splitext(orig_img_name)
         txt_path = os.path.join(txt_dir, stem + '_cap.txt')
         try:
-            with open(txt_path, 'w') as f:
-                f.write(cap_txt)
+            self._output_writer.write_text(txt_path, cap_txt)
         except OSError as err:
             print("[ERROR] Caption text save error: {0}".format(err), file=sys.stderr)
             raise OSError
+        txt_path_list.append(txt_path)
 
         stem, _ = os.path.splitext(orig_img_name)
         txt_path = os.path.join(txt_dir, stem + '_main.txt')
         try:
-            with open(txt_path, 'w') as f:
-                f.write(main_txt)
+            self._output_writer.write_text(txt_path, main_txt)
         except OSError as err:
             print("[ERROR] Main text save error: {0}".format(err), file=sys.stderr)
             raise OSError
+        txt_path_list.append(txt_path)
 
         if ruby_txt is not None:
             stem, _ = os.path.splitext(orig_img_name)
             txt_path = os.path.join(txt_dir, stem + '_ruby.txt')
             try:
-                with open(txt_path, 'w') as f:
-                    f.write(ruby_txt)
+                self._output_writer.write_text(txt_path, ruby_txt)
             except OSError as err:
                 print("[ERROR] Ruby text save error: {0}".format(err), file=sys.stderr)
                 raise OSError
+            txt_path_list.append(txt_path)
 
-        return
+        return txt_path_list
 
     def _parse_pred_list_to_save(self, pred_list):
         """
@@ -650,10 +1352,11 @@ class OcrInferrer:
         proc_name : str
             重畳を行う結果を出力した推論処理の名前。
         """
+        # copy only the image to draw on, not whole result
         if 'dump_img' in result.keys():
-            dump_img = copy.deepcopy(result['dump_img'])
+            dump_img = result['dump_img'].copy()
         else:
-            dump_img = copy.deepcopy(result['img'])
+            dump_img = result['img'].copy()
         if 'xml' in result.keys() and result['xml'] is not None:
             # draw inference result on input image
             cv2.putText(dump_img, proc_name, (0, 50),
@@ -0,0 +1,157 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import json
+import os
+import sys
+
+
+class InferenceManifest:
+    """
+    ページごとの推論処理の完了状況を記録するマニフェスト。
+    出力ルートディレクトリにJSONL形式で追記し、中断した推論処理の再開時に完了済みのページを判定します。
+
+    Attributes
+    ----------
+    manifest_path : str
+        マニフェストファイルのパスです。
+    entries : dict
+        入力画像ファイルパスをキー、完了記録を値とする辞書型データです。
+    """
+
+    MANIFEST_FILE_NAME = 'manifest.jsonl'
+
+    def __init__(self, output_root):
+        """
+        Parameters
+        ----------
+        output_root : str
+            推論結果を出力するルートディレクトリのパスです。
+        """
+        self.manifest_path = os.path.join(output_root, InferenceManifest.MANIFEST_FILE_NAME)
+        self.entries = {}
+        self._load()
+
+    def is_completed(self, img_path, output_dir, proc_name_list):
+        """
+        入力画像に対して指定された推論処理が全て完了しているかどうかを返します。
+
+        Parameters
+        ----------
+        img_path : str
+            入力画像ファイルのパス。
+        output_dir : str
+            推論結果を出力するディレクトリのパス。
+        proc_name_list : list
+            実行する推論処理名のリスト。
+
+        Returns
+        -------
+        [変数なし] : bool
+            完了済みであればTrue, そうでなければFalseを返します。
+        """
+        entry = self.entries.get(os.path.abspath(img_path))
+        if entry is None:
+            return False
+        # the page might have been written to another output dir (e.g. renamed by duplication check)
+        if os.path.abspath(entry['output_dir']) != os.path.abspath(output_dir):
+            return False
+        if entry['procs'] != proc_name_list:
+            return False
+        # output files might be removed after the previous run
+        for file_path in entry['files']:
+            if not os.path.isfile(file_path):
+                return False
+        return True
+
+    def get_entry(self, img_path):
+        """
+        入力画像に対する完了記録を返します。
+
+        Parameters
+        ----------
+        img_path : str
+            入力画像ファイルのパス。
+
+        Returns
+        -------
+        entry : dict
+            完了記録。記録が無い場合はNoneを返します。
+        """
+        return self.entries.get(os.path.abspath(img_path))
+
+    @staticmethod
+    def create_entry(img_path, output_dir, proc_name_list, file_list, page_xml_path=None, xml_page_num=None):
+        """
+        入力画像に対する推論処理の完了記録を作成します。
+
+        Parameters
+        ----------
+        img_path : str
+            入力画像ファイルのパス。
+        output_dir : str
+            推論結果を出力したディレクトリのパス。
+        proc_name_list : list
+            実行した推論処理名のリスト。
+        file_list : list
+            このページについて出力したファイルのパスのリスト。
+        page_xml_path : str
+            書籍単位のXMLを再構成するために保存したページ単位のXMLファイルのパス。
+        xml_page_num : int
+            書籍単位のXMLファイルに書き込んだこのページのPAGE要素の数。XMLを出力しない場合はNoneです。
+
+        Returns
+        -------
+        entry : dict
+            完了記録。
+        """
+        return {
+            'img_path': os.path.abspath(img_path),
+            'output_dir': output_dir,
+            'procs': proc_name_list,
+            'last_proc': proc_name_list[-1] if len(proc_name_list) > 0 else None,
+            'files': file_list,
+            'page_xml': page_xml_path,
+            'xml_page_num': xml_page_num
+        }
+
+    def record(self, entry_list):
+        """
+        完了記録をまとめてマニフェストに追記します。
+
+        Parameters
+        ----------
+        entry_list : list
+            create_entryで作成した完了記録のリスト。
+        """
+        if len(entry_list) == 0:
+            return
+        lines = ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entry_list)
+
+        # append all lines with one write call so that lines from other workers are not mixed
+        fd = os.open(self.manifest_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, lines.encode('utf-8'))
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        for entry in entry_list:
+            self.entries[entry['img_path']] = entry
+        return
+
+    def _load(self):
+        if not os.path.isfile(self.manifest_path):
+            return
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # the last line might be broken when the previous run was killed
+                    print('[WARNING] Broken manifest line is ignored : {0}'.format(line.strip()), file=sys.stderr)
+                    continue
+                self.entries[entry['img_path']] = entry
+        print('### {0} completed pages found in manifest ###'.format(len(self.entries)))
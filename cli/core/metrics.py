@@ -0,0 +1,263 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy
+
+
+PERCENTILES = [50, 95, 99]
+
+
+def summarize_values(value_list):
+    """
+    計測値のリストから件数、平均値、パーセンタイル値、最大値、合計値を計算します。
+
+    Parameters
+    ----------
+    value_list : list
+        計測値(秒)のリスト。
+
+    Returns
+    -------
+    stat : dict
+        集計結果を保持する辞書型データ。パーセンタイル値のキーはp50のような形式です。
+    """
+    stat = {'count': len(value_list), 'mean': 0.0, 'max': 0.0, 'sum': 0.0}
+    for p in PERCENTILES:
+        stat['p{0}'.format(p)] = 0.0
+    if len(value_list) == 0:
+        return stat
+    values = numpy.asarray(value_list, dtype=numpy.float64)
+    stat['mean'] = float(values.mean())
+    stat['max'] = float(values.max())
+    stat['sum'] = float(values.sum())
+    for p, value in zip(PERCENTILES, numpy.percentile(values, PERCENTILES)):
+        stat['p{0}'.format(p)] = float(value)
+    return stat
+
+
+class InferenceMetrics:
+    """
+    推論処理の処理時間やスループットの計測値を集計し、レポートとして出力するクラス。
+    処理時間はページ(入力画像ファイル)ごとの値を保持し、パーセンタイル値を計算します。
+
+    Attributes
+    ----------
+    samples : dict
+        計測項目名をキー、計測値(秒)のリストを値とする辞書型データです。
+    counters : dict
+        ページ数、行数などの計数項目名をキー、その値を値とする辞書型データです。
+    """
+
+    REPORT_FILE_NAME = 'metrics'
+    PROMETHEUS_PREFIX = 'ndlocr'
+
+    def __init__(self):
+        self.samples = {}
+        self.counters = {}
+        self._start_time = None
+        self.wall_time = 0.0
+
+    def start(self):
+        """
+        推論処理全体の経過時間の計測を開始します。
+        """
+        self._start_time = time.time()
+        return
+
+    def stop(self):
+        """
+        推論処理全体の経過時間の計測を終了します。
+        """
+        if self._start_time is not None:
+            self.wall_time += time.time() - self._start_time
+            self._start_time = None
+        return
+
+    def add(self, name, value):
+        """
+        計測値を追加します。
+        複数のスレッドから呼び出される場合があるため、リストへの追加のみを行います。
+
+        Parameters
+        ----------
+        name : str
+            計測項目名。
+        value : float
+            計測値(秒)。
+        """
+        self.samples.setdefault(name, []).append(value)
+        return
+
+    def count(self, name, value=1):
+        """
+        計数項目の値を加算します。
+
+        Parameters
+        ----------
+        name : str
+            計数項目名。
+        value : int
+            加算する値。
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+        return
+
+    def get_samples(self, prefix):
+        """
+        計測項目名が指定された接頭辞で始まる計測値を返します。
+
+        Parameters
+        ----------
+        prefix : str
+            計測項目名の接頭辞。
+
+        Returns
+        -------
+        samples : dict
+            接頭辞を除いた計測項目名をキー、計測値(秒)のリストを値とする辞書型データ。
+        """
+        return {name[len(prefix):]: value_list for name, value_list in self.samples.items() if name.startswith(prefix)}
+
+    def merge(self, other):
+        """
+        他のインスタンス(並列実行された他のワーカーなど)の計測値を統合します。
+        経過時間は並列に実行されたものとして最大値を取ります。
+
+        Parameters
+        ----------
+        other : InferenceMetrics
+            統合する計測値を持つインスタンス。
+        """
+        for name, value_list in other.samples.items():
+            self.samples.setdefault(name, []).extend(value_list)
+        for name, value in other.counters.items():
+            self.count(name, value)
+        self.wall_time = max(self.wall_time, other.wall_time)
+        return
+
+    def summary(self, total_time_statistics, proc_time_statistics):
+        """
+        計測値の集計結果を返します。
+
+        Parameters
+        ----------
+        total_time_statistics : list
+            画像ファイルごとの全推論処理の処理時間のリスト。
+        proc_time_statistics : dict
+            推論処理名をキー、画像ファイルごとの処理時間のリストを値とする辞書型データ。
+
+        Returns
+        -------
+        summary : dict
+            計測項目ごとの件数、平均値、パーセンタイル値などと、スループットを保持する辞書型データ。
+        """
+        timings = {}
+        for proc_name, proc_time_list in proc_time_statistics.items():
+            timings['stage/' + proc_name] = summarize_values(proc_time_list)
+        timings['page/total'] = summarize_values(total_time_statistics)
+        for name, value_list in sorted(self.samples.items()):
+            timings[name] = summarize_values(value_list)
+
+        page_num = self.counters.get('pages', 0)
+        line_num = self.counters.get('lines', 0)
+        summary = {
+            'wall_time': self.wall_time,
+            'pages': page_num,
+            'lines': line_num,
+            'pages_per_sec': page_num / self.wall_time if self.wall_time > 0 else 0.0,
+            'lines_per_sec': line_num / self.wall_time if self.wall_time > 0 else 0.0,
+            'timings': timings
+        }
+        return summary
+
+    def write_report(self, output_dir, total_time_statistics, proc_time_statistics, prometheus=False):
+        """
+        集計結果をJSON形式とCSV形式のファイルに保存します。
+        prometheusフラグが有効な場合はPrometheusのテキスト形式のファイルも保存します。
+
+        Parameters
+        ----------
+        output_dir : str
+            レポートを保存するディレクトリのパス。
+        total_time_statistics : list
+            画像ファイルごとの全推論処理の処理時間のリスト。
+        proc_time_statistics : dict
+            推論処理名をキー、画像ファイルごとの処理時間のリストを値とする辞書型データ。
+        prometheus : bool
+            Prometheusのテキスト形式のファイルを保存するかどうかのフラグ。
+
+        Returns
+        -------
+        summary : dict
+            計測値の集計結果。
+        """
+        summary = self.summary(total_time_statistics, proc_time_statistics)
+        report_path = os.path.join(output_dir, InferenceMetrics.REPORT_FILE_NAME)
+        try:
+            with open(report_path + '.json', 'w') as f:
+                json.dump(summary, f, ensure_ascii=False, indent=4, separators=(',', ': '))
+            with open(report_path + '.csv', 'w', newline='') as f:
+                writer = csv.writer(f)
+                stat_name_list = ['count', 'mean'] + ['p{0}'.format(p) for p in PERCENTILES] + ['max', 'sum']
+                writer.writerow(['metric'] + stat_name_list)
+                for name, stat in summary['timings'].items():
+                    writer.writerow([name] + [stat[stat_name] for stat_name in stat_name_list])
+            if prometheus:
+                with open(report_path + '.prom', 'w') as f:
+                    f.write(self._to_prometheus_text(summary))
+        except OSError as err:
+            print('[ERROR] Metrics report save error : {0}'.format(err), file=sys.stderr)
+            raise OSError
+        print('### save metrics report : {0}.json ###'.format(report_path))
+        return summary
+
+    def _to_prometheus_text(self, summary):
+        prefix = InferenceMetrics.PROMETHEUS_PREFIX
+        line_list = []
+
+        # processing time of stages are labeled summaries of one metric family
+        stage_metric = '{0}_stage_seconds'.format(prefix)
+        line_list.append('# HELP {0} Processing time per image file of each stage.'.format(stage_metric))
+        line_list.append('# TYPE {0} summary'.format(stage_metric))
+        other_timings = {}
+        for name, stat in summary['timings'].items():
+            if name.startswith('stage/') or name.startswith('page/'):
+                label = 'stage="{0}"'.format(name.split('/', 1)[1])
+                line_list.extend(self._prometheus_summary_lines(stage_metric, label, stat))
+            else:
+                other_timings[name] = stat
+        for name, stat in other_timings.items():
+            metric = '{0}_{1}_seconds'.format(prefix, name.replace('/', '_'))
+            line_list.append('# TYPE {0} summary'.format(metric))
+            line_list.extend(self._prometheus_summary_lines(metric, None, stat))
+
+        for name in ['pages', 'lines']:
+            metric = '{0}_{1}_total'.format(prefix, name)
+            line_list.append('# TYPE {0} counter'.format(metric))
+            line_list.append('{0} {1}'.format(metric, summary[name]))
+        for name in ['pages_per_sec', 'lines_per_sec', 'wall_time']:
+            metric = '{0}_{1}'.format(prefix, name)
+            line_list.append('# TYPE {0} gauge'.format(metric))
+            line_list.append('{0} {1}'.format(metric, summary[name]))
+        return '\n'.join(line_list) + '\n'
+
+    def _prometheus_summary_lines(self, metric, label, stat):
+        line_list = []
+        for p in PERCENTILES:
+            quantile_label = 'quantile="{0}"'.format(p / 100)
+            if label is not None:
+                quantile_label = label + ',' + quantile_label
+            line_list.append('{0}{{{1}}} {2}'.format(metric, quantile_label, stat['p{0}'.format(p)]))
+        label_str = '' if label is None else '{' + label + '}'
+        line_list.append('{0}_sum{1} {2}'.format(metric, label_str, stat['sum']))
+        line_list.append('{0}_count{1} {2}'.format(metric, label_str, stat['count']))
+        return line_list
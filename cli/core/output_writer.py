@@ -0,0 +1,205 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import collections
+import concurrent.futures
+import cv2
+import os
+import sys
+import threading
+import time
+
+
+class AsyncOutputWriter:
+    """
+    推論結果の画像のエンコードとテキスト・画像ファイルの書き込みを、
+    バックグラウンドのスレッドプールで実行するクラス。
+    書き込み待ちのファイル数がキューの上限に達した場合は、最も古い書き込みの完了を待ちます。
+    書き込んだファイルのfsyncはflushでまとめて実行します。
+
+    Attributes
+    ----------
+    worker_num : int
+        書き込みを行うスレッド数です。0の場合は呼び出し元のスレッドで書き込みます。
+    queue_size : int
+        書き込み待ちのファイル数の上限です。
+    fsync : bool
+        flushの際に書き込んだファイルをfsyncするかどうかのフラグです。
+    """
+
+    def __init__(self, worker_num=2, queue_size=16, fsync=False, metrics=None):
+        """
+        Parameters
+        ----------
+        worker_num : int
+            書き込みを行うスレッド数です。0の場合は呼び出し元のスレッドで書き込みます。
+        queue_size : int
+            書き込み待ちのファイル数の上限です。
+        fsync : bool
+            flushの際に書き込んだファイルをfsyncするかどうかのフラグです。
+        metrics : InferenceMetrics
+            書き込み時間などの計測値を追加する先です。Noneの場合は計測しません。
+        """
+        self.worker_num = max(0, worker_num)
+        self.queue_size = max(1, queue_size)
+        self.fsync = fsync
+        self._metrics = metrics
+        self._executor = None
+        if self.worker_num > 0:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.worker_num)
+        self._pending = collections.deque()
+        self._written_path_list = []
+        self._error = None
+        self._lock = threading.Lock()
+        # stages running in pipeline workers may submit writes at the same time
+        self._pending_lock = threading.Lock()
+
+    def write_text(self, path, text):
+        """
+        テキストファイルの書き込みを登録します。
+
+        Parameters
+        ----------
+        path : str
+            書き込み先のファイルパス。
+        text : str
+            書き込むテキスト。
+
+        Returns
+        -------
+        path : str
+            書き込み先のファイルパス。
+        """
+        return self._submit(path, self._write_text, text)
+
+    def write_image(self, path, img):
+        """
+        画像ファイルの書き込みを登録します。
+        エンコードも書き込み用のスレッドで行うため、登録後にimgを変更しないでください。
+
+        Parameters
+        ----------
+        path : str
+            書き込み先のファイルパス。拡張子でエンコード形式が決まります。
+        img : numpy.ndarray
+            書き込む画像データ。
+
+        Returns
+        -------
+        path : str
+            書き込み先のファイルパス。
+        """
+        return self._submit(path, self._write_image, img)
+
+    def flush(self):
+        """
+        登録済みの全ての書き込みの完了を待ち、fsyncが有効な場合は書き込んだファイルをまとめてfsyncします。
+        書き込みに失敗したファイルがある場合は、全ての書き込みの完了後にOSErrorを送出します。
+        """
+        start_flush = time.time()
+        with self._pending_lock:
+            while len(self._pending) > 0:
+                self._wait_oldest()
+        with self._lock:
+            written_path_list = self._written_path_list
+            self._written_path_list = []
+        if self.fsync:
+            self._fsync_all(written_path_list)
+        self._add_metric('output_flush', time.time() - start_flush)
+        error, self._error = self._error, None
+        if error is not None:
+            raise OSError(error)
+        return
+
+    def close(self):
+        """
+        登録済みの全ての書き込みを完了させ、スレッドプールを終了します。
+        """
+        try:
+            self.flush()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        return
+
+    def _submit(self, path, write_func, data):
+        if self._executor is None:
+            write_func(path, data)
+            self._finish_write(path)
+            return path
+        with self._pending_lock:
+            # bounded queue, wait for the oldest write when it is full
+            if len(self._pending) >= self.queue_size:
+                start_wait = time.time()
+                self._wait_oldest()
+                self._add_metric('output_queue_wait', time.time() - start_wait)
+            self._pending.append((path, self._executor.submit(self._run_write, path, write_func, data)))
+        return path
+
+    def _wait_oldest(self):
+        path, future = self._pending.popleft()
+        try:
+            future.result()
+        except OSError as err:
+            # raised at flush after all other writes are completed
+            print('[ERROR] Output save error : {0} ({1})'.format(path, err), file=sys.stderr)
+            self._error = err
+        return
+
+    def _run_write(self, path, write_func, data):
+        write_func(path, data)
+        self._finish_write(path)
+        return path
+
+    def _write_text(self, path, text):
+        start_write = time.time()
+        with open(path, 'w') as f:
+            f.write(text)
+        self._add_metric('output_write', time.time() - start_write)
+        return
+
+    def _write_image(self, path, img):
+        start_write = time.time()
+        if not cv2.imwrite(path, img):
+            raise OSError('cv2.imwrite failed : {0}'.format(path))
+        self._add_metric('output_write', time.time() - start_write)
+        return
+
+    def _finish_write(self, path):
+        with self._lock:
+            self._written_path_list.append(path)
+        return
+
+    def _fsync_all(self, path_list):
+        # directory entries are also synced so that new files survive power loss
+        dir_set = set()
+        for path in path_list:
+            self._fsync_path(path, os.O_RDONLY)
+            dir_set.add(os.path.dirname(os.path.abspath(path)))
+        if not hasattr(os, 'O_DIRECTORY'):
+            # directories can not be opened on windows
+            return
+        for dir_path in dir_set:
+            self._fsync_path(dir_path, os.O_RDONLY | os.O_DIRECTORY)
+        return
+
+    def _fsync_path(self, path, flags):
+        try:
+            fd = os.open(path, flags)
+        except OSError as err:
+            print('[WARNING] fsync is skipped : {0} ({1})'.format(path, err), file=sys.stderr)
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        return
+
+    def _add_metric(self, name, value):
+        if self._metrics is not None:
+            self._metrics.add(name, value)
+        return
@@ -0,0 +1,72 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import copy
+import multiprocessing
+import os
+import sys
+
+from .inference import OcrInferrer, print_time_statistics
+from .metrics import InferenceMetrics
+
+
+def run_sharded_inference(cfg, worker_num):
+    """
+    入力ディレクトリを複数のワーカープロセスに分配して推論処理を並列に実行し、
+    各ワーカーの処理時間の統計情報をまとめて表示します。
+    各ワーカープロセスはそれぞれ推論モデルを読み込みます。
+
+    Parameters
+    ----------
+    cfg : dict
+        推論処理の設定情報です。
+    worker_num : int
+        ワーカープロセスの数です。入力ディレクトリの数より多い場合は入力ディレクトリの数に制限されます。
+    """
+    if len(cfg['input_dirs']) == 0:
+        print('[ERROR] Input directory list is empty', file=sys.stderr)
+        return
+
+    # distribute input directories in round robin order
+    worker_num = min(worker_num, len(cfg['input_dirs']))
+    shard_cfg_list = []
+    for worker_idx in range(worker_num):
+        shard_cfg = copy.deepcopy(cfg)
+        shard_cfg['input_dirs'] = cfg['input_dirs'][worker_idx::worker_num]
+        shard_cfg_list.append(shard_cfg)
+    print('### run inference with {0} worker processes ###'.format(worker_num))
+
+    # use spawn to avoid sharing CUDA context and model state with forked processes
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(processes=worker_num, initializer=_init_worker, initargs=(worker_num,)) as pool:
+        shard_statistics_list = pool.map(_run_shard, shard_cfg_list, chunksize=1)
+
+    # merge time statistics of all workers
+    total_time_statistics = []
+    proc_time_statistics = {}
+    metrics = InferenceMetrics()
+    for shard_total_time_statistics, shard_proc_time_statistics, shard_metrics in shard_statistics_list:
+        total_time_statistics.extend(shard_total_time_statistics)
+        for proc_name, proc_time_list in shard_proc_time_statistics.items():
+            proc_time_statistics.setdefault(proc_name, []).extend(proc_time_list)
+        metrics.merge(shard_metrics)
+    print_time_statistics(total_time_statistics, proc_time_statistics, metrics.get_samples('model_load/'))
+    if cfg['metrics']['report']:
+        metrics.write_report(cfg['output_root'], total_time_statistics, proc_time_statistics, cfg['metrics']['prometheus'])
+    return
+
+
+def _init_worker(worker_num):
+    # share CPU cores among workers unless thread number is set by user
+    thread_num = str(max(1, (os.cpu_count() or 1) // worker_num))
+    for env_name in ['OMP_NUM_THREADS', 'MKL_NUM_THREADS']:
+        os.environ.setdefault(env_name, thread_num)
+
+
+def _run_shard(shard_cfg):
+    inferrer = OcrInferrer(shard_cfg)
+    inferrer.run(print_statistics=False)
+    return inferrer.total_time_statistics, inferrer.proc_time_statistics, inferrer.metrics
@@ -0,0 +1,163 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import queue
+import sys
+import threading
+
+
+class StagePipeline:
+    """
+    複数の処理ステージをそれぞれ専用のワーカースレッドで実行するパイプライン。
+    ステージ間は有界キューで接続され、連続するページの処理を重ね合わせて実行します。
+
+    Attributes
+    ----------
+    stage_func_list : list
+        各ステージで実行する関数のリストです。
+        各関数は1件のデータを受け取り、次のステージに渡すデータを返します。
+        Noneを返した場合、そのデータは以降のステージに渡されません。
+    queue_size : int
+        ステージ間のキューに保持できるデータ数の上限です。
+    batch_size_list : list
+        各ステージが一度に受け取るデータ数のリストです。
+        2以上のステージの関数はデータのリストを受け取り、出力データのリストを返します。
+    """
+
+    # marker object to notify end of input to the next stage
+    _END = object()
+
+    def __init__(self, stage_func_list, queue_size=2, batch_size_list=None):
+        """
+        Parameters
+        ----------
+        stage_func_list : list
+            各ステージで実行する関数のリストです。
+        queue_size : int
+            ステージ間のキューに保持できるデータ数の上限です。
+        batch_size_list : list
+            各ステージが一度に受け取るデータ数のリストです。Noneの場合は全ステージ1件ずつ処理します。
+        """
+        if len(stage_func_list) == 0:
+            raise ValueError('StagePipeline needs one or more stages.')
+        if batch_size_list is None:
+            batch_size_list = [1] * len(stage_func_list)
+        if len(batch_size_list) != len(stage_func_list):
+            raise ValueError('Length of batch_size_list must be equal to the number of stages.')
+        self.stage_func_list = stage_func_list
+        self.queue_size = max(1, queue_size)
+        self.batch_size_list = [max(1, batch_size) for batch_size in batch_size_list]
+
+    def run(self, input_iterable):
+        """
+        入力データを順にパイプラインへ流し、最終ステージの出力を入力順に返すジェネレータ。
+        いずれかのステージで例外が発生した場合、全ワーカーを停止した後に呼び出し元で再送出します。
+
+        Parameters
+        ----------
+        input_iterable : iterable
+            最初のステージに渡す入力データ。
+
+        Yields
+        ------
+        output : object
+            最終ステージの出力データ。
+        """
+        queue_list = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stage_func_list) + 1)]
+        stop_event = threading.Event()
+        error_list = []
+
+        feeder = threading.Thread(target=self._feed, args=(input_iterable, queue_list[0], stop_event, error_list), daemon=True)
+        worker_list = [feeder]
+        for stage_idx, (stage_func, batch_size) in enumerate(zip(self.stage_func_list, self.batch_size_list)):
+            worker = threading.Thread(target=self._work,
+                                      args=(stage_func, batch_size, queue_list[stage_idx], queue_list[stage_idx + 1], stop_event, error_list),
+                                      daemon=True)
+            worker_list.append(worker)
+        for worker in worker_list:
+            worker.start()
+
+        try:
+            while True:
+                output = queue_list[-1].get()
+                if output is StagePipeline._END:
+                    break
+                yield output
+        finally:
+            # stop all workers when the consumer stops early or a stage fails
+            stop_event.set()
+            for q in queue_list:
+                self._drain(q)
+            for worker in worker_list:
+                worker.join()
+
+        if len(error_list) > 0:
+            raise error_list[0]
+
+    def _feed(self, input_iterable, out_queue, stop_event, error_list):
+        try:
+            for input_data in input_iterable:
+                if stop_event.is_set():
+                    break
+                self._put(out_queue, input_data, stop_event)
+        except Exception as err:
+            print('[ERROR] Pipeline input error: {0}'.format(err), file=sys.stderr)
+            error_list.append(err)
+            stop_event.set()
+        self._put(out_queue, StagePipeline._END, stop_event, force=True)
+
+    def _work(self, stage_func, batch_size, in_queue, out_queue, stop_event, error_list):
+        input_end = False
+        while not input_end:
+            # wait until the batch is filled or the input ends
+            input_data_list = []
+            while len(input_data_list) < batch_size:
+                input_data = in_queue.get()
+                if input_data is StagePipeline._END:
+                    input_end = True
+                    break
+                input_data_list.append(input_data)
+            if (len(input_data_list) == 0) or stop_event.is_set():
+                continue
+            try:
+                if batch_size > 1:
+                    output_list = stage_func(input_data_list)
+                else:
+                    output_list = [stage_func(input_data_list[0])]
+            except Exception as err:
+                print('[ERROR] Pipeline stage error: {0}'.format(err), file=sys.stderr)
+                error_list.append(err)
+                stop_event.set()
+                continue
+            for output in output_list:
+                if output is not None:
+                    self._put(out_queue, output, stop_event)
+        self._put(out_queue, StagePipeline._END, stop_event, force=True)
+
+    def _put(self, out_queue, data, stop_event, force=False):
+        # block while the queue is full, but give up on normal data after stop is requested
+        while True:
+            if stop_event.is_set() and not force:
+                return
+            try:
+                out_queue.put(data, timeout=0.1)
+                return
+            except queue.Full:
+                if stop_event.is_set():
+                    self._drain(out_queue)
+
+    def _drain(self, target_queue):
+        # remove queued data except end markers so that blocked workers can finish
+        kept_end = False
+        while True:
+            try:
+                data = target_queue.get_nowait()
+            except queue.Empty:
+                break
+            if data is StagePipeline._END:
+                kept_end = True
+        if kept_end:
+            target_queue.put_nowait(StagePipeline._END)
@@ -0,0 +1,215 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import threading
+
+
+class ResultCache:
+    """
+    推論処理ごとの結果をディスク上に保存するキャッシュ。
+    キーは入力画像のハッシュ値と、それまでに実行した推論処理名および設定情報から連鎖的に計算されます。
+    キャッシュの合計サイズが上限を超えた場合、最後に利用された時刻が古いものから削除します(LRU)。
+
+    Attributes
+    ----------
+    cache_dir : str
+        キャッシュファイルを保存するディレクトリのパスです。
+    max_size : int
+        キャッシュの合計サイズの上限(byte)です。
+    hit_count : int
+        キャッシュから結果を取得できた回数です。
+    miss_count : int
+        キャッシュに結果が無かった回数です。
+    """
+
+    CACHE_FILE_EXT = '.pkl'
+
+    # delete old entries until the total size becomes this ratio of max_size
+    EVICTION_RATIO = 0.9
+
+    def __init__(self, cache_dir, max_size_mb=10240):
+        """
+        Parameters
+        ----------
+        cache_dir : str
+            キャッシュファイルを保存するディレクトリのパスです。
+        max_size_mb : int
+            キャッシュの合計サイズの上限(MB)です。
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_size = max_size_mb * 1024 * 1024
+        self.hit_count = 0
+        self.miss_count = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # stages running in pipeline workers may put and evict at the same time
+        self._lock = threading.Lock()
+        self._total_size = sum(size for _, _, size in self._list_entries())
+
+    @staticmethod
+    def digest_file(file_path, chunk_size=1024 * 1024):
+        """
+        ファイルの内容のハッシュ値を計算します。
+
+        Parameters
+        ----------
+        file_path : str
+            ファイルのパス。
+        chunk_size : int
+            一度に読み込むサイズ(byte)。
+
+        Returns
+        -------
+        digest : str
+            SHA-256のハッシュ値(16進数文字列)。
+        """
+        sha = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    @staticmethod
+    def make_key(parent_key, *items):
+        """
+        親のキーと追加の情報から新しいキーを計算します。
+
+        Parameters
+        ----------
+        parent_key : str
+            前段の推論処理の結果(または入力画像)に対するキー。
+        items : str or bytes
+            推論処理名や設定情報など、キーに含める情報。
+
+        Returns
+        -------
+        key : str
+            SHA-256のハッシュ値(16進数文字列)。
+        """
+        sha = hashlib.sha256(parent_key.encode('utf-8'))
+        for item in items:
+            if isinstance(item, str):
+                item = item.encode('utf-8')
+            # separate items so that concatenation of different items does not collide
+            sha.update(b'\0' + item)
+        return sha.hexdigest()
+
+    def get(self, key):
+        """
+        キーに対応する推論結果をキャッシュから取得します。
+
+        Parameters
+        ----------
+        key : str
+            推論結果のキー。
+
+        Returns
+        -------
+        result : object
+            保存された推論結果。キャッシュに無い場合はNoneを返します。
+        """
+        cache_path = self._get_cache_path(key)
+        try:
+            with open(cache_path, 'rb') as f:
+                result = pickle.load(f)
+        except FileNotFoundError:
+            self._count_access(False)
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError) as err:
+            print('[WARNING] Broken cache file is ignored : {0} ({1})'.format(cache_path, err), file=sys.stderr)
+            self._count_access(False)
+            return None
+
+        # update modification time for LRU eviction
+        try:
+            os.utime(cache_path)
+        except OSError:
+            pass
+        self._count_access(True)
+        return result
+
+    def put(self, key, result):
+        """
+        推論結果をキャッシュに保存します。
+        合計サイズが上限を超えた場合は古いキャッシュを削除します。
+
+        Parameters
+        ----------
+        key : str
+            推論結果のキー。
+        result : object
+            保存する推論結果。pickle化できる必要があります。
+        """
+        cache_path = self._get_cache_path(key)
+        cache_subdir = os.path.dirname(cache_path)
+        os.makedirs(cache_subdir, exist_ok=True)
+
+        # write to temporary file and rename it, so that readers never see partial files
+        fd, tmp_path = tempfile.mkstemp(dir=cache_subdir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+                # size is taken before rename, since another worker process may evict the file right after it
+                size = f.tell()
+            os.replace(tmp_path, cache_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            self._total_size += size
+            if self._total_size > self.max_size:
+                self._evict()
+        return
+
+    def _count_access(self, is_hit):
+        with self._lock:
+            if is_hit:
+                self.hit_count += 1
+            else:
+                self.miss_count += 1
+        return
+
+    def _get_cache_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ResultCache.CACHE_FILE_EXT)
+
+    def _list_entries(self):
+        # list (mtime, path, size) of all cache files
+        entry_list = []
+        for subdir in os.scandir(self.cache_dir):
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if not entry.name.endswith(ResultCache.CACHE_FILE_EXT):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # removed by another worker process
+                    continue
+                entry_list.append((stat.st_mtime, entry.path, stat.st_size))
+        return entry_list
+
+    def _evict(self):
+        # called with self._lock held
+        # rescan the directory since other worker processes may share the cache
+        entry_list = sorted(self._list_entries())
+        self._total_size = sum(size for _, _, size in entry_list)
+        target_size = self.max_size * ResultCache.EVICTION_RATIO
+        for _, cache_path, size in entry_list:
+            if self._total_size <= target_size:
+                break
+            try:
+                os.remove(cache_path)
+            except FileNotFoundError:
+                pass
+            self._total_size -= size
+        return
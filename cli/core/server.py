@@ -0,0 +1,208 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import copy
+import datetime
+import glob
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+
+from . import utils
+from .inference import OcrInferrer
+
+
+class OcrInferenceServer:
+    """
+    推論モデルを読み込んだ状態で常駐し、HTTP経由で受け付けた推論ジョブを実行するサーバー。
+    モデルの読み込みは起動時に1度だけ行われ、ジョブごとの起動コストがかかりません。
+    推論ジョブは受け付けた順に1件ずつ実行されます。
+
+    Attributes
+    ----------
+    cfg : dict
+        推論処理の設定情報です。推論処理のインスタンスと共有されます。
+    inferrer : OcrInferrer
+        常駐する推論処理のインスタンスです。
+    """
+
+    # keys of configuration which can be changed per job
+    JOB_CFG_KEYS = ['input_root', 'output_root', 'input_structure', 'input_dirs']
+
+    def __init__(self, cfg, host='127.0.0.1', port=8080):
+        """
+        Parameters
+        ----------
+        cfg : dict
+            推論処理の設定情報です。input_dirsは空で構いません。
+        host : str
+            待ち受けるホスト名です。
+        port : int
+            待ち受けるポート番号です。
+        """
+        self.cfg = cfg
+        self.host = host
+        self.port = port
+        self.inferrer = OcrInferrer(self.cfg)
+        # load models before accepting jobs so that the first job is not delayed
+        self.inferrer.load_models()
+        self._base_cfg = copy.deepcopy(cfg)
+        self._job_lock = threading.Lock()
+
+    def serve_forever(self):
+        """
+        HTTPサーバーを起動し、終了されるまで推論ジョブを受け付けます。
+        """
+        server = self
+
+        class RequestHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/health':
+                    self._send_json(200, {'status': 'ok'})
+                else:
+                    self._send_json(404, {'error': 'not found'})
+
+            def do_POST(self):
+                if self.path != '/infer':
+                    self._send_json(404, {'error': 'not found'})
+                    return
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    job = json.loads(self.rfile.read(length).decode('utf-8'))
+                except (ValueError, UnicodeDecodeError) as err:
+                    self._send_json(400, {'error': 'invalid request : {0}'.format(err)})
+                    return
+                status, response = server.run_job(job)
+                self._send_json(status, response)
+
+            def _send_json(self, status, body):
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        httpd = http.server.ThreadingHTTPServer((self.host, self.port), RequestHandler)
+        print('### inference server started : http://{0}:{1} ###'.format(self.host, self.port))
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+        return
+
+    def run_job(self, job):
+        """
+        1件の推論ジョブを実行し、出力されたテキストとXMLを返します。
+
+        Parameters
+        ----------
+        job : dict
+            推論ジョブの内容。input_root(必須)、output_root、input_structureを指定できます。
+
+        Returns
+        -------
+        (status, response) : tuple
+            HTTPステータスコードと、レスポンスとして返す辞書型データ。
+        """
+        if not isinstance(job, dict) or 'input_root' not in job:
+            return 400, {'error': 'input_root is required'}
+        if not os.path.exists(job['input_root']):
+            return 400, {'error': 'INPUT_ROOT not found :{0}'.format(job['input_root'])}
+
+        job_cfg = copy.deepcopy(self._base_cfg)
+        job_cfg['input_root'] = job['input_root']
+        job_cfg['input_structure'] = job.get('input_structure', job_cfg['input_structure'])
+        if 'output_root' in job:
+            job_cfg['output_root'] = self._get_job_output_root(job['output_root'])
+            if job_cfg['output_root'] is None:
+                return 400, {'error': 'output_root must be under {0} :{1}'.format(self._base_cfg['output_root'], job['output_root'])}
+        else:
+            job_cfg['output_root'] = os.path.join(self._base_cfg['output_root'],
+                                                  datetime.datetime.now().strftime('job_%Y%m%d%H%M%S%f'))
+        job_cfg = utils.set_input_dirs(job_cfg)
+        if job_cfg is None:
+            return 400, {'error': 'Config parse error :{0}'.format(job['input_root'])}
+
+        with self._job_lock:
+            start_job = time.time()
+            try:
+                os.makedirs(os.path.dirname(job_cfg['output_root']), exist_ok=True)
+                job_cfg['output_root'] = utils.mkdir_with_duplication_check(job_cfg['output_root'])
+                # procs refer to the same cfg object, so update it in place
+                for key in OcrInferenceServer.JOB_CFG_KEYS:
+                    self.cfg[key] = job_cfg[key]
+                self.inferrer.reset_time_statistics()
+                self.inferrer.run()
+            except Exception as err:
+                print('[ERROR] Inference job failed : {0}'.format(err), file=sys.stderr)
+                return 500, {'error': 'inference error : {0}'.format(err)}
+            finally:
+                # the next job must not see the configuration of this job
+                for key in OcrInferenceServer.JOB_CFG_KEYS:
+                    self.cfg[key] = copy.deepcopy(self._base_cfg[key])
+            job_time = time.time() - start_job
+
+        return 200, {
+            'output_root': job_cfg['output_root'],
+            'processing_time': job_time,
+            'results': self._collect_job_output(job_cfg['output_root'])
+        }
+
+    def _get_job_output_root(self, output_root):
+        """
+        ジョブで指定された出力ディレクトリを、serveコマンドに指定した出力ディレクトリ配下のパスに変換します。
+        相対パスはserveコマンドに指定した出力ディレクトリからの相対パスとして扱います。
+
+        Parameters
+        ----------
+        output_root : str
+            ジョブで指定された出力ディレクトリのパス。
+
+        Returns
+        -------
+        job_output_root : str
+            出力ディレクトリの絶対パス。serveコマンドに指定した出力ディレクトリ配下でない場合はNoneを返します。
+        """
+        if not isinstance(output_root, str) or output_root == '':
+            return None
+        base_root = os.path.realpath(self._base_cfg['output_root'])
+        job_output_root = os.path.realpath(os.path.join(base_root, output_root))
+        # symbolic links and '..' are resolved before the check
+        if (job_output_root == base_root) or (os.path.commonpath([base_root, job_output_root]) != base_root):
+            return None
+        return job_output_root
+
+    def _collect_job_output(self, output_root):
+        """
+        推論ジョブの出力ディレクトリからテキストとXMLの内容を収集します。
+
+        Parameters
+        ----------
+        output_root : str
+            推論ジョブの出力ディレクトリのパス。
+
+        Returns
+        -------
+        result_list : list
+            出力ディレクトリごとのテキストとXMLの内容のリスト。
+        """
+        result_list = []
+        for output_dir in sorted(glob.glob(os.path.join(output_root, '*'))):
+            if not os.path.isdir(output_dir):
+                continue
+            result = {'output_dir': output_dir, 'txt': {}, 'xml': {}}
+            for output_type in ['txt', 'xml']:
+                for file_path in sorted(glob.glob(os.path.join(output_dir, output_type, '*.{0}'.format(output_type)))):
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        result[output_type][os.path.basename(file_path)] = f.read()
+            result_list.append(result)
+        return result_list
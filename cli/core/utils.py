@@ -12,7 +12,7 @@ import sys
 import yaml
 
 
-def parse_cfg(cfg_dict):
+def parse_cfg(cfg_dict, parse_input=True):
     """
     コマンドで入力された引数やオプションを内部関数が利用しやすい形にparseします。
 
@@ -20,6 +20,9 @@ def parse_cfg(cfg_dict):
     ----------
     cfg_dict : dict
         コマンドで入力された引数やオプションが保存された辞書型データ。
+    parse_input : bool
+        Falseの場合、入力ディレクトリの探索を行わずinput_dirsを空のリストとします。
+        推論サーバーのように入力が後から与えられる場合に利用します。
 
     Returns
     -------
@@ -65,6 +68,30 @@ def parse_cfg(cfg_dict):
     else:
         infer_cfg['partial_infer'] = False
 
+    if not parse_input:
+        infer_cfg['output_root'] = os.path.abspath(infer_cfg['output_root'])
+        infer_cfg['input_dirs'] = []
+        return infer_cfg
+
+    return set_input_dirs(infer_cfg)
+
+
+def set_input_dirs(infer_cfg):
+    """
+    推論処理の設定情報の入力ディレクトリ構造に基づき、推論対象の入力ディレクトリのリストを設定します。
+
+    Parameters
+    ----------
+    infer_cfg : dict
+        推論処理を実行するための設定情報が保存された辞書型データ。
+
+    Returns
+    -------
+    infer_cfg : dict
+        input_dirsを設定した推論処理の設定情報。入力ディレクトリ構造が不正な場合はNoneを返します。
+    """
+    start = infer_cfg['proc_range']['start']
+
     # create input_dirs from input_root
     # input_dirs is list of dirs that contain img (and xml) dir
     infer_cfg['input_root'] = os.path.abspath(infer_cfg['input_root'])
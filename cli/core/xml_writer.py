@@ -0,0 +1,155 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+
+class StreamingXmlWriter:
+    """
+    推論結果のPAGE要素を1ページずつXMLファイルに追記するライター。
+    書籍全体のXMLデータをメモリ上に構築せずに、ElementTree.writeと同じ内容のXMLファイルを出力します。
+    書き込み中は一時ファイルに出力し、close時に指定されたファイルパスへ移動します。
+
+    Attributes
+    ----------
+    xml_path : str
+        出力するXMLファイルのパスです。
+    page_num : int
+        書き込んだPAGE要素の数です。
+    """
+
+    ROOT_TAG = 'OCRDATASET'
+    TMP_SUFFIX = '.part'
+
+    def __init__(self, xml_path):
+        """
+        Parameters
+        ----------
+        xml_path : str
+            出力するXMLファイルのパスです。
+        """
+        self.xml_path = xml_path
+        self.page_num = 0
+        self._tmp_path = xml_path + StreamingXmlWriter.TMP_SUFFIX
+        self._file = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def open(self):
+        """
+        一時ファイルを作成し、XML宣言を書き込みます。
+        """
+        ET.register_namespace('', 'NDLOCRDATASET')
+        self._file = open(self._tmp_path, 'w', encoding='utf-8')
+        # same declaration as ElementTree.write(encoding='utf-8', xml_declaration=True)
+        self._file.write("<?xml version='1.0' encoding='utf-8'?>\n")
+        return
+
+    def write(self, xml_tree):
+        """
+        1ページ分の推論結果のXMLデータに含まれるPAGE要素を追記します。
+
+        Parameters
+        ----------
+        xml_tree : xml.etree.ElementTree.ElementTree
+            OCRDATASETを根要素に持つ推論結果のXMLデータ。
+        """
+        for element in xml_tree.getroot():
+            if self.page_num == 0:
+                self._file.write('<{0}>'.format(StreamingXmlWriter.ROOT_TAG))
+            self._file.write(ET.tostring(element, encoding='unicode'))
+            self.page_num += 1
+        return
+
+    def close(self):
+        """
+        根要素を閉じてファイルを保存します。
+        """
+        print('### save xml : {}###'.format(self.xml_path))
+        if self.page_num == 0:
+            self._file.write('<{0} />'.format(StreamingXmlWriter.ROOT_TAG))
+        else:
+            self._file.write('</{0}>'.format(StreamingXmlWriter.ROOT_TAG))
+        try:
+            self._file.close()
+            os.replace(self._tmp_path, self.xml_path)
+        except OSError as err:
+            print("[ERROR] XML save error : {0}".format(err), file=sys.stderr)
+            raise OSError
+        self._file = None
+        return
+
+    def sync(self):
+        """
+        書き込んだPAGE要素を一時ファイルに反映し、fsyncします。
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return
+
+    def abort(self, keep_tmp=False):
+        """
+        書き込みを中止し、一時ファイルを削除します。
+
+        Parameters
+        ----------
+        keep_tmp : bool
+            Trueの場合、推論処理の再開時に書き込み済みのPAGE要素を利用できるよう一時ファイルを残します。
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if (not keep_tmp) and os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+        return
+
+    @staticmethod
+    def read_pages(xml_path):
+        """
+        以前に書き込んだXMLファイルからPAGE要素を書き込み順に読み込みます。
+        書き込み中に中断された一時ファイルが残っている場合はそちらを読み込み、
+        途中で途切れている場合は最後まで書き込まれたPAGE要素までを返します。
+
+        Parameters
+        ----------
+        xml_path : str
+            XMLファイルのパス。
+
+        Returns
+        -------
+        page_list : list
+            PAGE要素のリスト。ファイルが無い場合は空のリストを返します。
+        """
+        page_list = []
+        read_path = xml_path + StreamingXmlWriter.TMP_SUFFIX
+        if not os.path.isfile(read_path):
+            read_path = xml_path
+        if not os.path.isfile(read_path):
+            return page_list
+        depth = 0
+        try:
+            for event, element in ET.iterparse(read_path, events=('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth == 1:
+                    page_list.append(element)
+        except ET.ParseError:
+            # the file is cut off in the middle of the page written when the previous run stopped
+            pass
+        return page_list
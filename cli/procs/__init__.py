@@ -4,6 +4,11 @@
 # https://creativecommons.org/licenses/by/4.0/
 
 
+from .page_record import PageRecord
+from .page_pyramid import PagePyramid
+from .spread_classifier import SpreadClassifier
+from .gutter_tracker import GutterTracker
+from .batch_detector import BatchDetector
 from .page_separation import PageSeparation
 from .page_deskew import PageDeskewProcess
 from .layout_extraction import LayoutExtractionProcess
@@ -12,4 +17,4 @@ from .line_order import LineOrderProcess
 from .ruby_read import RubyReadingProcess
 from .line_attribute import LineAttributeProcess
 
-__all__ = ['PageSeparation', 'PageDeskewProcess', 'LayoutExtractionProcess', 'LineOcrProcess', 'LineOrderProcess', 'RubyReadingProcess', 'LineAttributeProcess']
+__all__ = ['PageRecord', 'PagePyramid', 'SpreadClassifier', 'GutterTracker', 'BatchDetector', 'PageSeparation', 'PageDeskewProcess', 'LayoutExtractionProcess', 'LineOcrProcess', 'LineOrderProcess', 'RubyReadingProcess', 'LineAttributeProcess']
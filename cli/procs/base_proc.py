@@ -4,9 +4,13 @@
 # https://creativecommons.org/licenses/by/4.0/
 
 
-import copy
 import cv2
+import json
 import os
+import threading
+import time
+
+from .page_record import PageRecord
 
 
 class BaseInferenceProcess:
@@ -20,7 +24,18 @@ class BaseInferenceProcess:
         [実行される順序を表す数字＋クラスごとの処理名]で構成されます。
     cfg : dict
         本推論実行における設定情報です。
+    batch_pages : int
+        パイプライン実行時に本推論処理へまとめて渡すページ数です。
+    cfg_section : str
+        本推論処理が参照する設定ファイル(config.yml)のセクション名。
+        結果キャッシュのキーの計算に利用されます。Noneの場合は結果をキャッシュしません。
+    model_load_time : float
+        推論モデルの読み込みにかかった時間(秒)です。
+    output_writer : AsyncOutputWriter
+        dumpファイルを書き込むライターです。Noneの場合は呼び出し元のスレッドで書き込みます。
     """
+    cfg_section = None
+
     def __init__(self, cfg, proc_id, proc_type='_base_prep'):
         """
         Parameters
@@ -40,9 +55,37 @@ class BaseInferenceProcess:
             self.cfg = cfg
 
         self.process_dump_dir = None
+        self.output_writer = None
+        self.batch_pages = 1
+        self.model_load_time = 0.0
+        self._model_loaded = False
+        self._model_lock = threading.Lock()
 
         return True
 
+    @property
+    def model_loaded(self):
+        """
+        推論モデルが読み込み済みかどうかを返します。
+        """
+        return self._model_loaded
+
+    def load_model(self):
+        """
+        推論モデルを読み込みます。
+        推論処理を最初に実行する際に自動的に呼び出されるため、明示的に呼び出す必要はありません。
+        既に読み込み済みの場合は何もしません。
+        """
+        with self._model_lock:
+            if self._model_loaded:
+                return
+            start_load = time.time()
+            self._load_model()
+            self.model_load_time = time.time() - start_load
+            self._model_loaded = True
+        print('### {0} model loaded ({1:.4f} sec) ###'.format(self.proc_name, self.model_load_time))
+        return
+
     def do(self, data_idx, input_data):
         """
         推論処理を実行する際にOcrInferrerクラスから呼び出される推論実行関数。
@@ -68,6 +111,7 @@ class BaseInferenceProcess:
             raise ValueError('Input data validation error.')
 
         # run main inference process
+        self.load_model()
         result = self._run_process(input_data)
         if result is None:
             raise ValueError('Inference output error in {0}.'.format(self.proc_name))
@@ -78,6 +122,93 @@ class BaseInferenceProcess:
 
         return result
 
+    def do_batch(self, data_idx_list, input_data_list):
+        """
+        複数の入力データに対する推論処理をまとめて実行する際にOcrInferrerクラスから呼び出される推論実行関数。
+        入力データはページをまたいでいても構いません。
+        結果は入力データごとに、do関数の戻り値と同じ形式のリストとして返します。
+
+        Parameters
+        ----------
+        data_idx_list : list
+            各入力データのインデックスのリスト。
+        input_data_list : list
+            推論処理を実行する対象の入力データのリスト。
+
+        Returns
+        -------
+        result_list : list
+            入力データごとの推論処理の結果のリスト。
+        """
+        # input data valudation check
+        for input_data in input_data_list:
+            if not self._is_valid_input(input_data):
+                raise ValueError('Input data validation error.')
+
+        # run main inference process
+        self.load_model()
+        result_list = self._run_process_batch(input_data_list)
+        if (result_list is None) or (None in result_list):
+            raise ValueError('Inference output error in {0}.'.format(self.proc_name))
+
+        # dump inference result
+        if self.cfg['dump']:
+            for data_idx, input_data, result in zip(data_idx_list, input_data_list, result_list):
+                self._dump_result(input_data, result, data_idx)
+
+        return result_list
+
+    def cache_signature(self):
+        """
+        結果キャッシュのキーに含める、本推論処理の結果に影響する設定情報を返します。
+        標準ではcfg_sectionで指定した設定ファイルのセクションの内容を返します。
+
+        Returns
+        -------
+        signature : str
+            設定情報を文字列化したもの。結果をキャッシュしない場合はNoneを返します。
+        """
+        if self.cfg_section is None:
+            return None
+        return json.dumps(self.cfg[self.cfg_section], sort_keys=True, ensure_ascii=False, default=str)
+
+    def finish_output_dir(self, output_dir):
+        """
+        出力ディレクトリ(書籍)の推論処理が終了した際に呼び出されます。
+        書籍ごとの状態を保持する継承先のクラスで、その状態を破棄するために実装されることを想定しています。
+
+        Parameters
+        ----------
+        output_dir : str
+            推論処理が終了した出力ディレクトリのパス。
+        """
+        return
+
+    def _load_model(self):
+        """
+        推論モデルの読み込み処理の本体部分。
+        推論モデルを利用する継承先のクラスで実装されることを想定しています。
+        """
+        return
+
+    def _run_process_batch(self, input_data_list):
+        """
+        複数の入力データに対する推論処理の本体部分。
+        まとめて処理することで高速化できる継承先のクラスで実装されることを想定しています。
+        標準では入力データごとに_run_processを実行します。
+
+        Parameters
+        ----------
+        input_data_list : list
+            推論処理を実行する対象の入力データのリスト。
+
+        Returns
+        -------
+        result_list : list
+            入力データごとの推論処理の結果のリスト。
+        """
+        return [self._run_process(input_data) for input_data in input_data_list]
+
     def _run_process(self, input_data):
         """
         推論処理の本体部分。
@@ -95,7 +226,7 @@ class BaseInferenceProcess:
             基本的にinput_dataと同じ構造です。
         """
         print('### Base Inference Process ###')
-        result = copy.deepcopy(input_data)
+        result = PageRecord.from_data(input_data).copy()
         return result
 
     def _is_valid_cfg(self, cfg):
@@ -188,7 +319,10 @@ class BaseInferenceProcess:
         image_file_path = os.path.join(pred_img_dir, img_name)
         dump_image = self._create_result_image(single_result)
         try:
-            cv2.imwrite(image_file_path, dump_image)
+            if self.output_writer is not None:
+                self.output_writer.write_image(image_file_path, dump_image)
+            else:
+                cv2.imwrite(image_file_path, dump_image)
         except OSError as err:
             print("Dump image save error: {0}".format(err))
             raise OSError
@@ -243,8 +377,11 @@ class BaseInferenceProcess:
         trum, _ = os.path.splitext(img_name)
         txt_path = os.path.join(txt_dir, trum + '_main.txt')
         try:
-            with open(txt_path, 'w') as f:
-                f.write(single_result['txt'])
+            if self.output_writer is not None:
+                self.output_writer.write_text(txt_path, single_result['txt'])
+            else:
+                with open(txt_path, 'w') as f:
+                    f.write(single_result['txt'])
         except OSError as err:
             print("Dump text save error: {0}".format(err))
             raise OSError
@@ -290,10 +427,11 @@ class BaseInferenceProcess:
             推論処理の結果を保持する辞書型データ。
         """
         dump_img = None
+        # copy only the image to draw on, not whole result
         if 'dump_img' in single_result.keys():
-            dump_img = copy.deepcopy(single_result['dump_img'])
+            dump_img = single_result['dump_img'].copy()
         else:
-            dump_img = copy.deepcopy(single_result['img'])
+            dump_img = single_result['img'].copy()
         if 'xml' in single_result.keys() and single_result['xml'] is not None:
             # draw single inference result on input image
             # this should be implemeted in each child class
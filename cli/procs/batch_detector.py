@@ -0,0 +1,193 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import numpy
+
+
+class BatchDetector:
+    """
+    サブモジュールの検出器(mmdetの検出モデルを保持するオブジェクト)をラップし、複数の画像をまとめて推論するクラス。
+    predict_batchでmmdetのinference_detectorに画像のリストを渡して1回で推論します。
+    runでは画像ごとの検出結果を返す代理の検出器をサブモジュールの1枚ずつの推論関数に渡すため、
+    検出結果の後処理(分割やXMLの作成など)はサブモジュールの処理がそのまま使われます。
+    代理の検出器は呼び出しごとに作成し、モジュールの属性などの共有の状態は変更しません。
+
+    最初の画像は1枚ずつ推論し、サブモジュールがその画像をそのまま検出器に渡していること、
+    検出器の推論結果がinference_detectorの結果と同じ形式であることを確認してからまとめて推論します。
+    確認できない場合は、以降の画像を1枚ずつ推論します。
+
+    Attributes
+    ----------
+    detector : object
+        サブモジュールの検出器です。
+    predict_method : str
+        サブモジュールが1枚ずつの推論に利用する検出器のメソッド名です。
+        inference_detectorの結果をそのまま返すメソッドである必要があります。
+    enabled : bool
+        まとめて推論するかどうかのフラグです。
+    """
+
+    def __init__(self, detector, predict_method, inference_detector):
+        """
+        Parameters
+        ----------
+        detector : object
+            サブモジュールの検出器です。
+        predict_method : str
+            サブモジュールが1枚ずつの推論に利用する検出器のメソッド名です。
+        inference_detector : function
+            mmdetのinference_detector関数です。
+        """
+        self.detector = detector
+        self.predict_method = predict_method
+        self.enabled = True
+        self._inference_detector = inference_detector
+        self._verified = False
+
+    @classmethod
+    def create(cls, detector, predict_method):
+        """
+        検出器がmmdetの検出モデルを保持している場合にインスタンスを作成します。
+
+        Parameters
+        ----------
+        detector : object
+            サブモジュールの検出器です。
+        predict_method : str
+            サブモジュールが1枚ずつの推論に利用する検出器のメソッド名です。
+
+        Returns
+        -------
+        batch_detector : BatchDetector
+            作成したインスタンス。まとめて推論できない場合はNoneを返します。
+        """
+        if (getattr(detector, 'model', None) is None) or (not callable(getattr(detector, predict_method, None))):
+            print('[WARNING] Detector {0} does not support batch inference, images are inferred one by one.'.format(
+                type(detector).__name__))
+            return None
+        try:
+            from mmdet.apis import inference_detector
+        except ImportError:
+            print('[WARNING] mmdet is not available, images are inferred one by one.')
+            return None
+        return cls(detector, predict_method, inference_detector)
+
+    @property
+    def model(self):
+        return self.detector.model
+
+    def predict_batch(self, img_list):
+        """
+        画像のリストを検出モデルでまとめて推論します。
+
+        Parameters
+        ----------
+        img_list : list
+            推論する画像データのリスト。
+
+        Returns
+        -------
+        detection_list : list
+            画像ごとの検出結果のリスト。
+        """
+        return self._inference_detector(self.model, list(img_list))
+
+    def run(self, img_list, infer_func):
+        """
+        画像のリストをまとめて検出モデルで推論した上で、画像ごとにサブモジュールの推論関数を実行します。
+
+        Parameters
+        ----------
+        img_list : list
+            推論する画像データのリスト。
+        infer_func : function
+            画像のインデックスと検出器を引数として、サブモジュールの1枚ずつの推論関数を実行する関数。
+            img_listの画像オブジェクトをそのままサブモジュールに渡す必要があります。
+
+        Returns
+        -------
+        output_list : list
+            画像ごとのinfer_funcの戻り値のリスト。
+        """
+        output_list = []
+        if self.enabled and (not self._verified) and (len(img_list) > 1):
+            output_list.append(self._verify(img_list[0], lambda detector: infer_func(0, detector)))
+        start_idx = len(output_list)
+        if (not self.enabled) or (len(img_list) - start_idx <= 1):
+            output_list.extend(infer_func(idx, self.detector) for idx in range(start_idx, len(img_list)))
+            return output_list
+
+        detection_list = self.predict_batch(img_list[start_idx:])
+        if (not isinstance(detection_list, (list, tuple))) or (len(detection_list) != len(img_list) - start_idx):
+            print('[WARNING] Batch detection output mismatch, images are inferred one by one.')
+            self.enabled = False
+            output_list.extend(infer_func(idx, self.detector) for idx in range(start_idx, len(img_list)))
+            return output_list
+
+        for idx, detection in zip(range(start_idx, len(img_list)), detection_list):
+            detector = _PrecomputedDetector(self.detector, self.predict_method, img_list[idx], detection)
+            output_list.append(infer_func(idx, detector))
+        return output_list
+
+    def _verify(self, img, infer_func):
+        # infer the first image one by one and check that its detection can be replaced with the batch output
+        detector = _PrecomputedDetector(self.detector, self.predict_method, img)
+        output = infer_func(detector)
+        if not detector.hit:
+            print('[WARNING] Batch detection results are not used by {0}, batch inference is disabled.'.format(
+                type(self.detector).__name__))
+            self.enabled = False
+        else:
+            detection_list = self.predict_batch([img])
+            if (not isinstance(detection_list, (list, tuple))) or (len(detection_list) != 1) or \
+                    (not _has_same_structure(detector.detection, detection_list[0])):
+                print('[WARNING] {0}.{1} does not return inference_detector output, batch inference is disabled.'.format(
+                    type(self.detector).__name__, self.predict_method))
+                self.enabled = False
+        self._verified = True
+        return output
+
+
+class _PrecomputedDetector:
+    """
+    1枚の画像に対する検出結果を返す代理の検出器。
+    検出結果が指定されていない場合は元の検出器で推論し、その結果を記録します。
+    検出器のその他の属性は元の検出器のものを返します。
+    """
+
+    def __init__(self, detector, predict_method, img, detection=None):
+        self.hit = False
+        self.detection = detection
+        self._detector = detector
+        self._predict_method = predict_method
+        self._img = img
+
+    def __getattr__(self, name):
+        if name == self._predict_method:
+            return self._predict
+        return getattr(self._detector, name)
+
+    def _predict(self, img, *args, **kwargs):
+        if (img is not self._img) or args or kwargs:
+            # the submodule passed a different image (e.g. preprocessed one), infer it as usual
+            return getattr(self._detector, self._predict_method)(img, *args, **kwargs)
+        if not self.hit:
+            self.hit = True
+            if self.detection is None:
+                self.detection = getattr(self._detector, self._predict_method)(img)
+        return self.detection
+
+
+def _has_same_structure(output, batch_output):
+    # compare only types and array widths, the number of detections depends on the image
+    if type(output) is not type(batch_output):
+        return False
+    if isinstance(output, (list, tuple)):
+        return (len(output) == len(batch_output)) and all(
+            _has_same_structure(item, batch_item) for item, batch_item in zip(output, batch_output))
+    if isinstance(output, numpy.ndarray):
+        return (output.ndim == batch_output.ndim) and (output.shape[1:] == batch_output.shape[1:])
+    return True
@@ -0,0 +1,213 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import collections
+
+import numpy
+
+from .spread_classifier import get_column_darkness
+
+
+class GutterTracker:
+    """
+    書籍(出力ディレクトリ)ごとに直前の見開き画像のノド元の位置を記録し、
+    次の画像で同じ付近の列にノド元の影があるかを縮小画像で検証するクラス。
+    検証できた場合はノド元検出モデルを実行せずにその列で分割できます。
+    記録は書籍の推論処理の終了時にresetで削除し、削除されなかった場合も最近更新したMAX_BOOK_NUM冊分のみを保持します。
+
+    Attributes
+    ----------
+    search_range : float
+        直前のノド元の位置の前後で影を探す範囲の、画像の幅に対する比率です。
+    min_contrast : float
+        ノド元の影の列と、その周辺の列の濃さの中央値の差(0~1)の下限です。
+    max_aspect_change : float
+        直前の見開き画像に対する、画像の幅/高さの比の変化の許容値です。
+    thumbnail_max_side : int
+        検証に利用する縮小画像の長辺の画素数です。
+    """
+
+    # width of the neighborhood compared with the gutter column, relative to search_range
+    NEIGHBORHOOD_SCALE = 4
+
+    # number of books whose gutter positions are kept, the least recently updated book is evicted first
+    MAX_BOOK_NUM = 16
+
+    def __init__(self, search_range=0.03, min_contrast=0.05, max_aspect_change=0.05, thumbnail_max_side=512):
+        """
+        Parameters
+        ----------
+        search_range : float
+            直前のノド元の位置の前後で影を探す範囲の、画像の幅に対する比率です。
+        min_contrast : float
+            ノド元の影の列と、その周辺の列の濃さの中央値の差(0~1)の下限です。
+        max_aspect_change : float
+            直前の見開き画像に対する、画像の幅/高さの比の変化の許容値です。
+        thumbnail_max_side : int
+            検証に利用する縮小画像の長辺の画素数です。
+        """
+        self.search_range = search_range
+        self.min_contrast = min_contrast
+        self.max_aspect_change = max_aspect_change
+        self.thumbnail_max_side = thumbnail_max_side
+        # book key -> split position, aspect and offset from the shadow of the last spread
+        self._gutter_dict = collections.OrderedDict()
+
+    @classmethod
+    def from_cfg(cls, tracking_cfg):
+        """
+        設定ファイルのpage_separation.gutter_trackingセクションからインスタンスを作成します。
+        """
+        return cls(search_range=tracking_cfg['search_range'],
+                   min_contrast=tracking_cfg['min_contrast'],
+                   max_aspect_change=tracking_cfg['max_aspect_change'],
+                   thumbnail_max_side=tracking_cfg['thumbnail_max_side'])
+
+    def find_split_column(self, book_key, thumbnail, img_width):
+        """
+        直前の見開き画像のノド元の位置の付近にノド元の影があるかを検証し、分割する列を返します。
+        分割する列は、直前の見開き画像での影の中心と分割した列のずれを今回の影の中心に加えて求めます。
+
+        Parameters
+        ----------
+        book_key : str
+            書籍を識別するキー(出力ディレクトリのパスなど)。
+        thumbnail : numpy.ndarray
+            検証する画像の縮小画像。
+        img_width : int
+            元の解像度の画像の幅。
+
+        Returns
+        -------
+        split_col : int
+            元の解像度で分割する列。検証できなかった場合はNoneを返します。
+        """
+        gutter = self._gutter_dict.get(book_key)
+        if (gutter is None) or (gutter['offset'] is None):
+            return None
+        height, width = thumbnail.shape[:2]
+        if abs(width / height - gutter['aspect']) > self.max_aspect_change * gutter['aspect']:
+            return None
+
+        center_ratio = self._find_shadow_center(thumbnail, gutter['split_ratio'])
+        if center_ratio is None:
+            return None
+        split_col = int(round((center_ratio + gutter['offset']) * img_width))
+        if split_col <= 0 or split_col >= img_width:
+            return None
+        return split_col
+
+    def update(self, book_key, img, page_img_list, thumbnail):
+        """
+        ノド元分割の結果から、分割した列とノド元の影の中心とのずれを記録します。
+        左右に分割された画像が元の画像の左右をそのまま切り出したものでない場合は記録を削除します。
+
+        Parameters
+        ----------
+        book_key : str
+            書籍を識別するキー(出力ディレクトリのパスなど)。
+        img : numpy.ndarray
+            分割前の画像。
+        page_img_list : list
+            分割後の画像のリスト。
+        thumbnail : numpy.ndarray
+            分割前の画像の縮小画像。
+        """
+        split_col = get_split_column(img, page_img_list)
+        if split_col is None:
+            self._gutter_dict.pop(book_key, None)
+            return
+        height, width = img.shape[:2]
+        split_ratio = split_col / width
+        center_ratio = self._find_shadow_center(thumbnail, split_ratio)
+        self._gutter_dict[book_key] = {
+            'split_ratio': split_ratio,
+            'aspect': width / height,
+            # split position relative to the shadow, None if no shadow is found
+            'offset': None if center_ratio is None else split_ratio - center_ratio
+        }
+        self._gutter_dict.move_to_end(book_key)
+        while len(self._gutter_dict) > GutterTracker.MAX_BOOK_NUM:
+            self._gutter_dict.popitem(last=False)
+        return
+
+    def reset(self, book_key=None):
+        """
+        ノド元の位置の記録を削除します。
+
+        Parameters
+        ----------
+        book_key : str
+            記録を削除する書籍を識別するキー。省略した場合は全ての書籍の記録を削除します。
+        """
+        if book_key is None:
+            self._gutter_dict.clear()
+        else:
+            self._gutter_dict.pop(book_key, None)
+        return
+
+    def _find_shadow_center(self, thumbnail, predicted_ratio):
+        """
+        予測した位置の前後でノド元の影を探し、影の中心の位置を画像の幅に対する比率で返します。
+        周辺の列より十分に濃い列が無い場合はNoneを返します。
+        """
+        width = thumbnail.shape[1]
+        profile = get_column_darkness(thumbnail, smooth_ratio=0.01)
+        predicted_col = min(width - 1, int(predicted_ratio * width))
+        search_width = max(1, int(self.search_range * width))
+        search_start = max(0, predicted_col - search_width)
+        search_end = min(width, predicted_col + search_width + 1)
+        peak_col = search_start + int(numpy.argmax(profile[search_start:search_end]))
+        # the darkest column at the border of the search range is a slope, not a gutter
+        if (peak_col == search_start and search_start > 0) or (peak_col == search_end - 1 and search_end < width):
+            return None
+
+        neighborhood_width = search_width * GutterTracker.NEIGHBORHOOD_SCALE
+        neighborhood = profile[max(0, predicted_col - neighborhood_width):predicted_col + neighborhood_width + 1]
+        base_darkness = numpy.median(neighborhood)
+        if profile[peak_col] - base_darkness < self.min_contrast:
+            return None
+
+        # center of the shadow with sub-pixel accuracy of the thumbnail
+        shadow_start = peak_col
+        while shadow_start > 0 and profile[shadow_start - 1] - base_darkness >= self.min_contrast / 2:
+            shadow_start -= 1
+        shadow_end = peak_col + 1
+        while shadow_end < width and profile[shadow_end] - base_darkness >= self.min_contrast / 2:
+            shadow_end += 1
+        weight = profile[shadow_start:shadow_end] - base_darkness
+        center_col = float(numpy.sum(weight * numpy.arange(shadow_start, shadow_end)) / numpy.sum(weight))
+        return (center_col + 0.5) / width
+
+
+def get_split_column(img, page_img_list):
+    """
+    左右に分割された画像が元の画像を1つの列で切り分けたものであれば、その列を返します。
+    分割の境界の列の画素のみを比較します。
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        分割前の画像。
+    page_img_list : list
+        分割後の画像のリスト。
+
+    Returns
+    -------
+    split_col : int
+        分割した列。1つの列で切り分けたものでない場合はNoneを返します。
+    """
+    if len(page_img_list) != 2:
+        return None
+    left_img, right_img = page_img_list
+    split_col = left_img.shape[1]
+    if (left_img.shape[0] != img.shape[0]) or (right_img.shape[0] != img.shape[0]):
+        return None
+    if (split_col == 0) or (split_col + right_img.shape[1] != img.shape[1]):
+        return None
+    if not (numpy.array_equal(left_img[:, -1], img[:, split_col - 1]) and numpy.array_equal(right_img[:, 0], img[:, split_col])):
+        return None
+    return split_col
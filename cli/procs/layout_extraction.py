@@ -6,17 +6,32 @@
 
 import copy
 import xml.etree.ElementTree as ET
+import cv2
 import lxml
 import numpy
 
 from .base_proc import BaseInferenceProcess
+from .batch_detector import BatchDetector
+from .page_record import PageRecord
 
 
 class LayoutExtractionProcess(BaseInferenceProcess):
     """
     レイアウト抽出推論を実行するプロセスのクラス。
     BaseInferenceProcessを継承しています。
+    input_max_sideが設定されている場合は、長辺をその画素数に縮小した画像で推論し、
+    結果の座標を元の解像度に戻します。
+    batch_sizeが2以上の場合は、batch_size枚ずつまとめて検出モデルで推論します。
     """
+    cfg_section = 'layout_extraction'
+
+    # method of LayoutDetector which returns output of inference_detector for single image
+    DETECTOR_PREDICT_METHOD = 'predict'
+
+    # attributes holding coordinates or size in pixel
+    COORD_ATTR_X_LIST = ['X', 'WIDTH']
+    COORD_ATTR_Y_LIST = ['Y', 'HEIGHT']
+
     def __init__(self, cfg, pid):
         """
         Parameters
@@ -27,9 +42,34 @@ class LayoutExtractionProcess(BaseInferenceProcess):
             実行される順序を表す数値。
         """
         super().__init__(cfg, pid, '_layer_ext')
+        # number of images inferred at once (pages are also passed together in pipeline mode)
+        self._batch_size = max(1, self.cfg['layout_extraction']['batch_size'])
+        self.batch_pages = self._batch_size
+        self._batch_detector = None
+
+    def _load_model(self):
+        """
+        レイアウト抽出モデルを読み込みます。
+        """
         from submodules.ndl_layout.tools.process_textblock import InferencerWithCLI
         self._inferencer = InferencerWithCLI(self.cfg['layout_extraction'])
         self._run_submodule_inference = self._inferencer.inference_with_cli
+        if self._batch_size > 1:
+            self._batch_detector = BatchDetector.create(getattr(self._inferencer, 'detector', None),
+                                                        LayoutExtractionProcess.DETECTOR_PREDICT_METHOD)
+
+    def cache_signature(self):
+        """
+        結果キャッシュのキーに含める設定情報を返します。
+        結果画像(dump_img)の有無がdump/save_imageフラグに依存するため、これらも含めます。
+
+        Returns
+        -------
+        signature : str
+            設定情報を文字列化したもの。
+        """
+        dump_flag = self.cfg['dump'] or self.cfg['save_image']
+        return super().cache_signature() + '/dump_img={0}'.format(dump_flag)
 
     def is_valid_input(self, input_data):
         """
@@ -45,7 +85,7 @@ class LayoutExtractionProcess(BaseInferenceProcess):
         [変数なし] : bool
             　入力データが正しければTrue, そうでなければFalseを返します。
         """
-        if type(input_data['img']) is not numpy.ndarray:
+        if not isinstance(input_data['img'], numpy.ndarray):
             print('LayoutExtractionProcess: input img is not numpy.ndarray')
             return False
         return True
@@ -66,20 +106,134 @@ class LayoutExtractionProcess(BaseInferenceProcess):
             基本的にinput_dataと同じ構造です。
         """
         print('### Layout Extraction Process ###')
-        output_data = copy.deepcopy(input_data)
+        input_img = self._get_input_img(input_data)
         inference_output = self._run_submodule_inference(
-            img=input_data['img'],
+            img=input_img,
             img_path=input_data['img_file_name'],
             score_thr=self.cfg['layout_extraction']['score_thr'],
             dump=(self.cfg['dump'] or self.cfg['save_image'])
         )
+        return [self._create_output(input_data, input_img, inference_output)]
+
+    def _run_process_batch(self, input_data_list):
+        """
+        複数の入力データに対する推論処理の本体部分。
+        入力画像をbatch_size枚ずつまとめて検出モデルで推論し、結果を入力データごとに分配します。
+
+        Parameters
+        ----------
+        input_data_list : list
+            推論処理を実行する対象の入力データのリスト。
+
+        Returns
+        -------
+        result_list : list
+            入力データごとの推論処理の結果のリスト。
+        """
+        if self._batch_detector is None:
+            return super()._run_process_batch(input_data_list)
+
+        print('### Layout Extraction Process (batch) ###')
+        dump_flag = self.cfg['dump'] or self.cfg['save_image']
+        result_list = []
+        for batch_start in range(0, len(input_data_list), self._batch_size):
+            batch = input_data_list[batch_start:batch_start + self._batch_size]
+            input_img_list = [self._get_input_img(input_data) for input_data in batch]
+            inference_output_list = self._batch_detector.run(
+                input_img_list,
+                lambda i, detector: self._get_inferencer(detector).inference_with_cli(
+                    img=input_img_list[i],
+                    img_path=batch[i]['img_file_name'],
+                    score_thr=self.cfg['layout_extraction']['score_thr'],
+                    dump=dump_flag
+                )
+            )
+            for input_data, input_img, inference_output in zip(batch, input_img_list, inference_output_list):
+                result_list.append([self._create_output(input_data, input_img, inference_output)])
+        return result_list
 
-        # Create result to pass xml and img data
-        result = []
+    def _get_inferencer(self, detector):
+        """
+        指定した検出器で推論するInferencerWithCLIを返します。
+        共有のInferencerWithCLIは変更せず、検出器のみを差し替えた浅いコピーを作成します。
+        """
+        if detector is self._inferencer.detector:
+            return self._inferencer
+        inferencer = copy.copy(self._inferencer)
+        inferencer.detector = detector
+        return inferencer
+
+    def _get_input_img(self, input_data):
+        """
+        レイアウト抽出の推論に利用する画像を返します。
+        input_max_sideが設定されている場合は縮小画像を返します。
+        """
+        max_side = self.cfg['layout_extraction'].get('input_max_side', 0)
+        if max_side > 0:
+            return PageRecord.from_data(input_data).get_pyramid().get_max_side(max_side)
+        return input_data['img']
+
+    def _create_output(self, input_data, input_img, inference_output):
+        """
+        サブモジュールの推論結果から、xmlデータと結果画像を保持する出力データを作成します。
+
+        Parameters
+        ----------
+        input_data : dict
+            推論処理を実行する対象の入力データ。
+        input_img : numpy.ndarray
+            推論に利用した画像。
+        inference_output : dict
+            サブモジュールの推論結果。
+
+        Returns
+        -------
+        output_data : PageRecord
+            推論結果を保持するデータ。
+        """
+        output_data = PageRecord.from_data(input_data).copy()
         output_data['xml'] = ET.ElementTree(
             ET.fromstring(lxml.etree.tostring(inference_output['xml']))
         )
-        if inference_output['dump_img'] is not None:
-            output_data['dump_img'] = inference_output['dump_img']
-        result.append(output_data)
-        return result
+        dump_img = inference_output['dump_img']
+        if input_img is not input_data['img']:
+            self._rescale_xml(output_data['xml'], input_img.shape, input_data['img'].shape)
+            if dump_img is not None:
+                dump_img = cv2.resize(dump_img, (input_data['img'].shape[1], input_data['img'].shape[0]))
+        if dump_img is not None:
+            output_data['dump_img'] = dump_img
+        return output_data
+
+    def _rescale_xml(self, xml, inference_shape, orig_shape):
+        """
+        縮小画像に対する推論結果の座標を元の解像度の座標に変換します。
+
+        Parameters
+        ----------
+        xml : xml.etree.ElementTree.ElementTree
+            縮小画像に対する推論結果のxmlデータ。
+        inference_shape : tuple
+            推論に使用した縮小画像の大きさ。
+        orig_shape : tuple
+            元の解像度の画像の大きさ。
+        """
+        scale_x = orig_shape[1] / inference_shape[1]
+        scale_y = orig_shape[0] / inference_shape[0]
+        for element in xml.getroot().iter():
+            if element.tag == 'PAGE':
+                element.set('WIDTH', str(orig_shape[1]))
+                element.set('HEIGHT', str(orig_shape[0]))
+                continue
+            for attr in LayoutExtractionProcess.COORD_ATTR_X_LIST:
+                if attr in element.attrib:
+                    element.set(attr, str(round(float(element.get(attr)) * scale_x)))
+            for attr in LayoutExtractionProcess.COORD_ATTR_Y_LIST:
+                if attr in element.attrib:
+                    element.set(attr, str(round(float(element.get(attr)) * scale_y)))
+            if 'POINTS' in element.attrib:
+                value_list = element.get('POINTS').split(',')
+                for i, value in enumerate(value_list):
+                    scale = scale_x if i % 2 == 0 else scale_y
+                    value_list[i] = str(round(float(value) * scale))
+                element.set('POINTS', ','.join(value_list))
+        return
@@ -14,6 +14,8 @@ class LineAttributeProcess(BaseInferenceProcess):
     行属性認識推論を実行するプロセスのクラス。
     BaseInferenceProcessを継承しています。
     """
+    cfg_section = 'line_attribute'
+
     def __init__(self, cfg, pid):
         """
         Parameters
@@ -24,6 +26,14 @@ class LineAttributeProcess(BaseInferenceProcess):
             実行される順序を表す数値。
         """
         super().__init__(cfg, pid, '_line_attribute')
+        if cfg['line_attribute']['classifier'] not in ['rf', 'bert']:
+            raise Exception('Unsupported Line Attribute Classifier')
+
+    def _load_model(self):
+        """
+        行属性の分類モデルを読み込みます。
+        """
+        cfg = self.cfg
         if cfg['line_attribute']['classifier'] == 'rf':
             from submodules.text_recognition_lightning.src.tasks.infer_rf_task import infer, create_object_dict
         elif cfg['line_attribute']['classifier'] == 'bert':
@@ -2,11 +2,14 @@
 #
 # This software is released under the CC BY 4.0.
 # https://creativecommons.org/licenses/by/4.0/
+import copy
 import hydra
 import numpy
+import re
 import xml.etree.ElementTree as ET
 
 from .base_proc import BaseInferenceProcess
+from .page_record import PageRecord
 
 
 class LineOcrProcess(BaseInferenceProcess):
@@ -14,6 +17,11 @@ class LineOcrProcess(BaseInferenceProcess):
     行文字認識推論を実行するプロセスのクラス。
     BaseInferenceProcessを継承しています。
     """
+    cfg_section = 'line_ocr'
+
+    # attributes of the element position, which differ between the page and the packed image in batch mode
+    COORD_ATTRIBS = ('X', 'Y', 'WIDTH', 'HEIGHT')
+
     def __init__(self, cfg, pid):
         """
         Parameters
@@ -24,11 +32,24 @@ class LineOcrProcess(BaseInferenceProcess):
             実行される順序を表す数値。
         """
         super().__init__(cfg, pid, '_line_ocr')
+
+        # number of line images recognized at once in batch mode (0: disabled)
+        self._batch_lines = cfg['line_ocr']['batch_lines']
+        self.batch_pages = cfg['line_ocr']['batch_pages']
+        self._target_block_types = []
+
+    def _load_model(self):
+        """
+        文字認識モデルを読み込みます。
+        """
+        cfg = self.cfg
         from submodules.text_recognition_lightning.src.tasks.infer_task import infer, create_object_dict
         self._run_submodule_inference = infer
 
         config_path = "../../submodules/text_recognition_lightning/configs"
-        hydra.initialize(version_base="1.2", config_path=config_path)
+        from hydra.core.global_hydra import GlobalHydra
+        if not GlobalHydra.instance().is_initialized():
+            hydra.initialize(version_base="1.2", config_path=config_path)
         self._hydra_cfg = hydra.compose(config_name="infer", overrides=[f"paths.output_dir={cfg['output_root']}"])
         self._hydra_cfg['model']['character_file'] = cfg['line_ocr']['char_list']
         self._hydra_cfg['ckpt_path'] = cfg['line_ocr']['saved_model']
@@ -42,6 +63,11 @@ class LineOcrProcess(BaseInferenceProcess):
 
         self._object_dict = create_object_dict(self._hydra_cfg)
 
+        for element in self._hydra_cfg['datamodule']['additional_elements']:
+            match = re.fullmatch(r'BLOCK\[@TYPE="(.+)"\]', element)
+            if match is not None:
+                self._target_block_types.append(match.group(1))
+
     def _remove_noise_elements(self, hydra_cfg):
         NOISE_ELEMENT_TYPE = ['ノンブル', '柱']
 
@@ -66,7 +92,7 @@ class LineOcrProcess(BaseInferenceProcess):
         [変数なし] : bool
             入力データが正しければTrue, そうでなければFalseを返します。
         """
-        if type(input_data['img']) is not numpy.ndarray:
+        if not isinstance(input_data['img'], numpy.ndarray):
             print('LineOcrProcess: input img is not numpy.ndarray')
             return False
         if type(input_data['xml']) is not ET.ElementTree:
@@ -96,3 +122,198 @@ class LineOcrProcess(BaseInferenceProcess):
         result.append(output_data)
 
         return result
+
+    def _run_process_batch(self, input_data_list):
+        """
+        複数の入力データに対する推論処理の本体部分。
+        batch_linesが有効な場合、全入力データの行画像を縦横比順に並べて一定数ごとに1枚の画像へまとめて認識し、
+        認識結果の属性(STRINGなど)を元の各ページのXMLの要素へ書き戻します。
+
+        Parameters
+        ----------
+        input_data_list : list
+            推論処理を実行する対象の入力データのリスト。
+
+        Returns
+        -------
+        result_list : list
+            入力データごとの推論処理の結果のリスト。
+        """
+        if self._batch_lines <= 0:
+            return super()._run_process_batch(input_data_list)
+
+        print('### Line OCR Process (batch) ###')
+        output_data_list = []
+        line_list = []
+        for input_data in input_data_list:
+            output_data = PageRecord.from_data(input_data).replace(xml=copy.deepcopy(input_data['xml']))
+            output_data_list.append(output_data)
+            for element in self._iter_target_elements(output_data['xml']):
+                line_img = self._crop_line_image(input_data['img'], element)
+                if line_img is None:
+                    # keep the same result as single page inference for unexpected line data
+                    print('[WARNING] Invalid line region found, batch line recognition is skipped.')
+                    return super()._run_process_batch(input_data_list)
+                line_list.append((element, line_img))
+
+        # sort lines by aspect ratio so that each batch contains lines with similar shape
+        line_list.sort(key=lambda line: line[1].shape[0] / line[1].shape[1])
+        for batch_start in range(0, len(line_list), self._batch_lines):
+            batch = line_list[batch_start:batch_start + self._batch_lines]
+            attrib_list = self._recognize_line_batch(input_data_list[0], batch)
+            if attrib_list is None:
+                print('[WARNING] Batch line recognition output mismatch, fall back to page inference.')
+                return super()._run_process_batch(input_data_list)
+            for (element, _), attrib in zip(batch, attrib_list):
+                # coordinates are those on the packed image
+                for key, value in attrib.items():
+                    if key not in LineOcrProcess.COORD_ATTRIBS:
+                        element.set(key, value)
+
+        return [[output_data] for output_data in output_data_list]
+
+    def _iter_target_elements(self, xml_tree):
+        """
+        文字認識の対象となるLINE要素と、追加で認識するBLOCK要素を文書順に返します。
+
+        Parameters
+        ----------
+        xml_tree : xml.etree.ElementTree.ElementTree
+            1ページ分のレイアウト抽出結果のXMLデータ。
+
+        Yields
+        ------
+        element : xml.etree.ElementTree.Element
+            文字認識の対象となる要素。
+        """
+        for element in xml_tree.iter():
+            if element.tag == 'LINE':
+                yield element
+            elif element.tag == 'BLOCK' and element.attrib.get('TYPE') in self._target_block_types:
+                yield element
+
+    def _crop_line_image(self, img, element):
+        """
+        要素の矩形領域を画像から切り出します(コピーは行いません)。
+
+        Parameters
+        ----------
+        img : numpy.ndarray
+            ページ画像。
+        element : xml.etree.ElementTree.Element
+            X, Y, WIDTH, HEIGHT属性を持つ要素。
+
+        Returns
+        -------
+        line_img : numpy.ndarray
+            切り出した画像。領域が不正な場合はNoneを返します。
+        """
+        try:
+            x = max(0, int(element.attrib['X']))
+            y = max(0, int(element.attrib['Y']))
+            w = int(element.attrib['WIDTH'])
+            h = int(element.attrib['HEIGHT'])
+        except (KeyError, ValueError):
+            return None
+        line_img = img[y:y + h, x:x + w]
+        if line_img.shape[0] == 0 or line_img.shape[1] == 0:
+            return None
+        return line_img
+
+    def _recognize_line_batch(self, base_input_data, line_list):
+        """
+        行画像のリストを1枚の画像に並べ、1回の推論で文字認識を実行します。
+        並べた画像上の要素は元の要素のタグと属性(TYPE, CONFなど)を引き継ぎ、座標のみを並べた位置に置き換えます。
+        推論結果の要素は座標で元の要素と対応付けます。
+
+        Parameters
+        ----------
+        base_input_data : dict
+            ファイル名や出力先などの付随情報を引き継ぐ入力データ。
+        line_list : list
+            認識対象の要素と、その要素の行画像の組のリスト。
+
+        Returns
+        -------
+        attrib_list : list
+            要素ごとの推論結果の属性の辞書のリスト。
+            推論結果の要素と元の要素を1対1に対応付けられない場合はNoneを返します。
+        """
+        line_img_list = [line_img for _, line_img in line_list]
+        canvas, position_list = pack_line_images(line_img_list)
+
+        page = ET.Element('PAGE', {'IMAGENAME': 'line_batch.jpg',
+                                   'WIDTH': str(canvas.shape[1]),
+                                   'HEIGHT': str(canvas.shape[0])})
+        coord_index_dict = {}
+        for idx, ((element, line_img), (x, y)) in enumerate(zip(line_list, position_list)):
+            attrib = dict(element.attrib)
+            attrib.update({'X': str(x), 'Y': str(y),
+                           'WIDTH': str(line_img.shape[1]), 'HEIGHT': str(line_img.shape[0])})
+            ET.SubElement(page, element.tag, attrib)
+            coord_index_dict[(element.tag, x, y, line_img.shape[1], line_img.shape[0])] = idx
+        root = ET.Element('OCRDATASET')
+        root.append(page)
+
+        batch_input_data = PageRecord.from_data(base_input_data).replace(img=canvas, xml=ET.ElementTree(root))
+        output_data = self._run_submodule_inference(self._object_dict, batch_input_data)
+
+        attrib_list = [None] * len(line_list)
+        for element in output_data['xml'].iter():
+            if element.tag not in ('LINE', 'BLOCK'):
+                continue
+            # child elements can not be mapped back to the page coordinates
+            if len(element) > 0:
+                return None
+            try:
+                coord_key = (element.tag,) + tuple(int(element.attrib[key]) for key in LineOcrProcess.COORD_ATTRIBS)
+            except (KeyError, ValueError):
+                return None
+            idx = coord_index_dict.get(coord_key)
+            if (idx is None) or (attrib_list[idx] is not None):
+                return None
+            attrib_list[idx] = dict(element.attrib)
+        if any(attrib is None for attrib in attrib_list):
+            return None
+        return attrib_list
+
+
+def pack_line_images(line_img_list, max_width=4096, margin=16):
+    """
+    行画像を棚詰め(左から右へ並べ、幅を超えたら次の段へ)で1枚の白背景画像に配置します。
+
+    Parameters
+    ----------
+    line_img_list : list
+        行画像のリスト。全て同じチャンネル数である必要があります。
+    max_width : int
+        配置先の画像の幅の目安。これより幅の広い行画像がある場合はその幅に合わせます。
+    margin : int
+        行画像の間に空ける余白(ピクセル)。
+
+    Returns
+    -------
+    canvas : numpy.ndarray
+        行画像を配置した画像。
+    position_list : list
+        各行画像を配置した左上座標(x, y)のリスト。
+    """
+    canvas_width = max([max_width] + [line_img.shape[1] + 2 * margin for line_img in line_img_list])
+    position_list = []
+    x, y, shelf_height = margin, margin, 0
+    for line_img in line_img_list:
+        h, w = line_img.shape[:2]
+        if x + w + margin > canvas_width:
+            x = margin
+            y += shelf_height + margin
+            shelf_height = 0
+        position_list.append((x, y))
+        x += w + margin
+        shelf_height = max(shelf_height, h)
+    canvas_height = y + shelf_height + margin
+
+    canvas = numpy.full((canvas_height, canvas_width) + line_img_list[0].shape[2:], 255, dtype=line_img_list[0].dtype)
+    for line_img, (x, y) in zip(line_img_list, position_list):
+        h, w = line_img.shape[:2]
+        canvas[y:y + h, x:x + w] = line_img
+    return canvas, position_list
@@ -13,6 +13,8 @@ class LineOrderProcess(BaseInferenceProcess):
     読み順認識推論を実行するプロセスのクラス。
     BaseInferenceProcessを継承しています。
     """
+    cfg_section = 'line_order'
+
     def __init__(self, cfg, pid):
         """
         Parameters
@@ -23,6 +25,11 @@ class LineOrderProcess(BaseInferenceProcess):
             実行される順序を表す数値。
         """
         super().__init__(cfg, pid, '_line_order')
+
+    def _load_model(self):
+        """
+        読み順認識モデルを利用する推論関数を読み込みます。
+        """
         from submodules.reading_order.tools.eval import infer_with_cli
         self._run_submodule_inference = infer_with_cli
 
@@ -40,7 +47,7 @@ class LineOrderProcess(BaseInferenceProcess):
         [変数なし] : bool
             入力データが正しければTrue, そうでなければFalseを返します。
         """
-        if type(input_data['img']) is not numpy.ndarray:
+        if not isinstance(input_data['img'], numpy.ndarray):
             print('LineOcrProcess: input img is not numpy.ndarray')
             return False
         if type(input_data['xml']) is not ET.ElementTree:
@@ -4,17 +4,27 @@
 # https://creativecommons.org/licenses/by/4.0/
 
 
-import copy
 import numpy
+import time
+import weakref
 
 from .base_proc import BaseInferenceProcess
+from .page_record import PageRecord
+from .skew_estimator import SkewEstimator, rotate_image
 
 
 class PageDeskewProcess(BaseInferenceProcess):
     """
     傾き補正を実行するプロセスのクラス。
     BaseInferenceProcessを継承しています。
+    estimatorが'projection'の場合は、縮小画像の射影から傾きを推定し、
+    傾きがmin_angle未満のページは回転も複製もせずにそのまま出力します。
+    推定した傾き(skew_angle)と探索のコスト(skew_search)はページごとに記録されます。
+    さらにshare_spread_angleが有効な場合は、見開き画像の傾きを1回だけ推定して左右のページで共有し、
+    ページごとの検証で前後spread_angle_tolerance度の角度の方が妥当な場合のみページごとに推定します。
     """
+    cfg_section = 'page_deskew'
+
     def __init__(self, cfg, pid):
         """
         Parameters
@@ -25,20 +35,36 @@ class PageDeskewProcess(BaseInferenceProcess):
             実行される順序を表す数値。
         """
         super().__init__(cfg, pid, '_page_deskew')
+        # projection estimator has no model to load, so it is created here
+        self._skew_estimator = None
+        if self.cfg['page_deskew']['estimator'] == 'projection':
+            self._skew_estimator = SkewEstimator(skew_max=self.cfg['page_deskew']['skew_max'],
+                                                 acc_deg=self.cfg['page_deskew']['acc_deg'],
+                                                 coarse_step=self.cfg['page_deskew']['coarse_step'],
+                                                 roi_w=self.cfg['page_deskew']['roi_w'],
+                                                 roi_h=self.cfg['page_deskew']['roi_h'])
+        # (weak reference to the pyramid of the last spread, skew angle of the spread)
+        self._spread_angle = None
+
+    def _load_model(self):
+        """
+        傾き補正処理のインスタンスを作成します。
+        """
+        if self._skew_estimator is not None:
+            return
         from submodules.deskew_HT.alyn3.deskew import Deskew
         self.deskewer = Deskew('', '',
-                               r_angle=cfg['page_deskew']['r_angle'],
-                               skew_max=cfg['page_deskew']['skew_max'],
-                               acc_deg=cfg['page_deskew']['acc_deg'],
-                               method=cfg['page_deskew']['method'],
-                               gray=cfg['page_deskew']['gray'],
-                               quality=cfg['page_deskew']['quality'],
-                               short=cfg['page_deskew']['short'],
-                               roi_w=cfg['page_deskew']['roi_w'],
-                               roi_h=cfg['page_deskew']['roi_h'])
+                               r_angle=self.cfg['page_deskew']['r_angle'],
+                               skew_max=self.cfg['page_deskew']['skew_max'],
+                               acc_deg=self.cfg['page_deskew']['acc_deg'],
+                               method=self.cfg['page_deskew']['method'],
+                               gray=self.cfg['page_deskew']['gray'],
+                               quality=self.cfg['page_deskew']['quality'],
+                               short=self.cfg['page_deskew']['short'],
+                               roi_w=self.cfg['page_deskew']['roi_w'],
+                               roi_h=self.cfg['page_deskew']['roi_h'])
         self._run_submodule_inference = self.deskewer.deskew_on_memory
 
-
     def _is_valid_input(self, input_data):
         """
         本クラスの推論処理における入力データのバリデーション。
@@ -53,7 +79,7 @@ class PageDeskewProcess(BaseInferenceProcess):
         [変数なし] : bool
             　入力データが正しければTrue, そうでなければFalseを返します。
         """
-        if type(input_data['img']) is not numpy.ndarray:
+        if not isinstance(input_data['img'], numpy.ndarray):
             print('PageDeskewProcess: input img is not numpy.ndarray')
             return False
         return True
@@ -74,12 +100,82 @@ class PageDeskewProcess(BaseInferenceProcess):
             基本的にinput_dataと同じ構造です。
         """
         print('### Page Deskew Process ###')
+        if self._skew_estimator is not None:
+            return [self._deskew_with_projection(input_data)]
         inference_output = self._run_submodule_inference(input_data['img'])
 
         # Create result to pass img_path and img data
         result = []
-        output_data = copy.deepcopy(input_data)
-        output_data['img'] = inference_output
+        output_data = PageRecord.from_data(input_data).replace(img=inference_output)
+        if 'spread_pyramid' in output_data:
+            del output_data['spread_pyramid']
         result.append(output_data)
 
         return result
+
+    def _deskew_with_projection(self, input_data):
+        """
+        縮小画像の射影から傾きを推定し、元の解像度の画像を回転します。
+        傾きがmin_angle未満の場合は入力画像をそのまま出力します。
+
+        Parameters
+        ----------
+        input_data : dict
+            推論処理を実行する対象の入力データ。
+
+        Returns
+        -------
+        output_data : PageRecord
+            傾き補正後の画像と、推定した傾き(skew_angle)、探索のコスト(skew_search)を保持するデータ。
+        """
+        start_search = time.time()
+        page_record = PageRecord.from_data(input_data)
+        thumbnail = page_record.get_pyramid().get_max_side(self.cfg['page_deskew']['thumbnail_max_side'])
+        angle, eval_num, shared = self._estimate_angle(page_record, thumbnail)
+        skew_search = {'evaluations': eval_num, 'time': time.time() - start_search, 'shared': shared}
+        print('skew angle: {0:.3f} deg ({1} angles evaluated, {2:.4f} sec{3})'.format(
+            angle, eval_num, skew_search['time'], ', shared with spread' if shared else ''))
+
+        if abs(angle) < self.cfg['page_deskew']['min_angle']:
+            # keep the input image and its pyramid
+            output_data = page_record.replace(skew_angle=angle, skew_search=skew_search)
+        else:
+            output_data = page_record.replace(img=rotate_image(input_data['img'], angle), skew_angle=angle, skew_search=skew_search)
+        # the spread image is not used after this process
+        if 'spread_pyramid' in output_data:
+            del output_data['spread_pyramid']
+        return output_data
+
+    def _estimate_angle(self, page_record, thumbnail):
+        """
+        ページの傾きを推定します。
+        share_spread_angleが有効で見開き画像から分割されたページの場合は、見開き画像で推定した傾きを検証して利用します。
+
+        Parameters
+        ----------
+        page_record : PageRecord
+            推論処理を実行する対象の入力データ。
+        thumbnail : numpy.ndarray
+            ページの縮小画像。
+
+        Returns
+        -------
+        (angle, eval_num, shared) : tuple
+            傾きを補正する回転角度(度)、探索で評価した角度の数、見開き画像の傾きを利用したかどうか。
+        """
+        eval_num = 0
+        spread_pyramid = page_record.get('spread_pyramid')
+        if self.cfg['page_deskew']['share_spread_angle'] and (spread_pyramid is not None):
+            if (self._spread_angle is None) or (self._spread_angle[0]() is not spread_pyramid):
+                spread_thumbnail = spread_pyramid.get_max_side(self.cfg['page_deskew']['thumbnail_max_side'])
+                spread_angle, spread_eval_num = self._skew_estimator.estimate(spread_thumbnail)
+                eval_num += spread_eval_num
+                self._spread_angle = (weakref.ref(spread_pyramid), spread_angle)
+            spread_angle = self._spread_angle[1]
+            is_valid, verify_eval_num = self._skew_estimator.verify(thumbnail, spread_angle,
+                                                                    self.cfg['page_deskew']['spread_angle_tolerance'])
+            eval_num += verify_eval_num
+            if is_valid:
+                return spread_angle, eval_num, True
+        angle, page_eval_num = self._skew_estimator.estimate(thumbnail)
+        return angle, eval_num + page_eval_num, False
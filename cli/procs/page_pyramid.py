@@ -0,0 +1,105 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import cv2
+
+
+class PagePyramid:
+    """
+    1ページ分の画像の縮小画像を、必要になった時点で作成して保持するクラス。
+    縮小率が2のべき乗の縮小画像(レベル)は、作成済みのレベルのうち最も近い解像度のものから作成します。
+    複数の推論処理が同じページの縮小画像を利用する場合に、縮小処理を繰り返さずに済みます。
+
+    Attributes
+    ----------
+    img : numpy.ndarray
+        元の解像度の画像データです。
+    """
+
+    def __init__(self, img, img_source=None):
+        """
+        Parameters
+        ----------
+        img : numpy.ndarray
+            元の解像度の画像データです。
+        img_source : ImageSource
+            imgの読み込み元です。メモリマップで読み込める場合は縮小画像を画素の間引きで作成します。
+        """
+        self.img = img
+        self._img_source = img_source
+        self._level_dict = {1: img}
+        self._resized_dict = {}
+
+    def get_level(self, factor):
+        """
+        縦横を1/factorに縮小した画像を返します。
+
+        Parameters
+        ----------
+        factor : int
+            縮小率の逆数。2のべき乗である必要があります。
+
+        Returns
+        -------
+        img : numpy.ndarray
+            縮小画像データ。大きさは元の画像の縦横をfactorで割って切り捨てたものです。
+        """
+        if factor < 1 or (factor & (factor - 1)) != 0:
+            raise ValueError('Pyramid level factor must be power of 2 : {0}'.format(factor))
+        if factor in self._level_dict:
+            return self._level_dict[factor]
+
+        height = self.img.shape[0] // factor
+        width = self.img.shape[1] // factor
+        level_img = None
+        # strided read of memory-mapped file does not touch skipped pixels
+        if (self._img_source is not None) and self._img_source.is_mmap() and factor <= 8:
+            level_img = self._img_source.read_reduced(factor)
+            if (level_img is not None) and (level_img.shape[:2] != (height, width)):
+                level_img = None
+        if level_img is None:
+            # resize from the nearest finer level
+            base_factor = max(f for f in self._level_dict.keys() if f < factor)
+            level_img = cv2.resize(self._level_dict[base_factor], (max(1, width), max(1, height)),
+                                   interpolation=cv2.INTER_AREA)
+        self._level_dict[factor] = level_img
+        return level_img
+
+    def get_max_side(self, max_side):
+        """
+        長辺がmax_side画素になるように縮小した画像を返します。
+        元の画像の長辺がmax_side以下の場合は元の画像をそのまま返します。
+
+        Parameters
+        ----------
+        max_side : int
+            縮小画像の長辺の画素数。
+
+        Returns
+        -------
+        img : numpy.ndarray
+            縮小画像データ。
+        """
+        orig_max_side = max(self.img.shape[:2])
+        if orig_max_side <= max_side:
+            return self.img
+        if max_side in self._resized_dict:
+            return self._resized_dict[max_side]
+
+        # start from the smallest level which is still larger than the target
+        factor = 1
+        while orig_max_side // (factor * 2) >= max_side:
+            factor *= 2
+        base_img = self.get_level(factor)
+        scale = max_side / orig_max_side
+        width = max(1, round(self.img.shape[1] * scale))
+        height = max(1, round(self.img.shape[0] * scale))
+        if base_img.shape[:2] == (height, width):
+            resized_img = base_img
+        else:
+            resized_img = cv2.resize(base_img, (width, height), interpolation=cv2.INTER_AREA)
+        self._resized_dict[max_side] = resized_img
+        return resized_img
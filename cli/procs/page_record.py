@@ -0,0 +1,144 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import collections.abc
+
+from .page_pyramid import PagePyramid
+
+
+class PageRecord(collections.abc.MutableMapping):
+    """
+    推論処理間で受け渡す1ページ分のデータを保持するクラス。
+    辞書型データと同じように利用できます。
+    コピーや一部の値を差し替えたレコードの作成は浅いコピーで行い、
+    画像データ(numpy.ndarray)などの値そのものは複製しません。
+    内部の辞書は書き込みが発生した時点で初めて複製されます(copy-on-write)。
+    画像データ(img)を差し替えた場合、元の画像から得られる値(IMG_DERIVED_FIELDS)は削除されます。
+    画像の縮小画像はget_pyramidで取得するPagePyramidで共有します。
+    """
+    __slots__ = ('_fields', '_shared')
+
+    # fields which are valid only for the current img
+    IMG_DERIVED_FIELDS = ('img_source', 'pyramid')
+
+    def __init__(self, fields=None, **kwargs):
+        """
+        Parameters
+        ----------
+        fields : dict
+            レコードの初期値を保持する辞書型データ。
+            辞書そのものは複製せずに参照し、書き込み時に複製します。
+        """
+        if fields is None:
+            self._fields = {}
+            self._shared = False
+        elif isinstance(fields, PageRecord):
+            fields._shared = True
+            self._fields = fields._fields
+            self._shared = True
+        else:
+            self._fields = fields
+            self._shared = True
+        if len(kwargs) > 0:
+            self._detach()
+            if ('img' in kwargs) and (kwargs['img'] is not self._fields.get('img')):
+                self._drop_img_derived_fields()
+            self._fields.update(kwargs)
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        辞書型データまたはPageRecordからPageRecordを取得します。
+
+        Parameters
+        ----------
+        data : dict or PageRecord
+            1ページ分のデータ。
+
+        Returns
+        -------
+        record : PageRecord
+            dataがPageRecordの場合はそのまま、辞書型データの場合はそれを参照するPageRecord。
+        """
+        if isinstance(data, cls):
+            return data
+        return cls(data)
+
+    def replace(self, **updates):
+        """
+        指定した値だけを差し替えた新しいレコードを作成します。
+        差し替えない値は元のレコードと共有されます。
+
+        Returns
+        -------
+        record : PageRecord
+            新しいレコード。
+        """
+        return PageRecord(self, **updates)
+
+    def get_pyramid(self):
+        """
+        画像データ(img)の縮小画像を保持するPagePyramidを返します。
+        初めて呼び出された時点で作成し、このレコードと以降に作成するコピーで共有します。
+
+        Returns
+        -------
+        pyramid : PagePyramid
+            imgに対するPagePyramid。
+        """
+        pyramid = self._fields.get('pyramid')
+        if (pyramid is None) or (pyramid.img is not self._fields['img']):
+            pyramid = PagePyramid(self._fields['img'], self._fields.get('img_source'))
+            self['pyramid'] = pyramid
+        return pyramid
+
+    def copy(self):
+        return PageRecord(self)
+
+    def __copy__(self):
+        return self.copy()
+
+    def __getstate__(self):
+        return dict(self._fields)
+
+    def __setstate__(self, state):
+        self._fields = state
+        self._shared = False
+
+    def __getitem__(self, key):
+        return self._fields[key]
+
+    def __setitem__(self, key, value):
+        self._detach()
+        if key == 'img' and self._fields.get('img') is not value:
+            self._drop_img_derived_fields()
+        self._fields[key] = value
+
+    def __delitem__(self, key):
+        self._detach()
+        del self._fields[key]
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def __repr__(self):
+        return 'PageRecord({0})'.format(', '.join('{0}={1}'.format(k, type(v).__name__) for k, v in self._fields.items()))
+
+    def _drop_img_derived_fields(self):
+        for key in PageRecord.IMG_DERIVED_FIELDS:
+            self._fields.pop(key, None)
+
+    def _detach(self):
+        # copy the shared field dict before the first write
+        if self._shared:
+            self._fields = dict(self._fields)
+            self._shared = False
@@ -4,18 +4,31 @@
 # https://creativecommons.org/licenses/by/4.0/
 
 
-import copy
 import numpy
 import os
 
 from .base_proc import BaseInferenceProcess
+from .batch_detector import BatchDetector
+from .gutter_tracker import GutterTracker
+from .page_record import PageRecord
+from .spread_classifier import SpreadClassifier
 
 
 class PageSeparation(BaseInferenceProcess):
     """
     ノド元分割処理を実行するプロセスのクラス。
     BaseInferenceProcessを継承しています。
+    single_page_checkが有効な場合は、縮小画像から単ページであることが明らかな画像について
+    ノド元検出モデルを実行せず、入力画像をそのまま1ページとして出力します。
+    gutter_trackingが有効な場合は、同じ書籍の直前の見開き画像のノド元の位置で影が確認できれば、
+    ノド元検出モデルを実行せずにその位置で分割します。
+    batch_sizeが2以上の場合は、ノド元検出モデルを実行する画像をbatch_size枚ずつまとめて検出モデルで推論します。
     """
+    cfg_section = 'page_separation'
+
+    # method of GutterDetector which returns output of inference_detector for single image
+    DETECTOR_PREDICT_METHOD = 'detect'
+
     def __init__(self, cfg, pid):
         """
         Parameters
@@ -26,14 +39,45 @@ class PageSeparation(BaseInferenceProcess):
             実行される順序を表す数値。
         """
         super().__init__(cfg, pid, '_page_sep')
+        # number of images detected at once (pages are also passed together in pipeline mode)
+        self._batch_size = max(1, self.cfg['page_separation']['batch_size'])
+        self.batch_pages = self._batch_size
+        self._batch_detector = None
+        self._spread_classifier = None
+        check_cfg = self.cfg['page_separation'].get('single_page_check')
+        if (check_cfg is not None) and check_cfg['enable']:
+            self._spread_classifier = SpreadClassifier.from_cfg(check_cfg)
+        self._gutter_tracker = None
+        tracking_cfg = self.cfg['page_separation'].get('gutter_tracking')
+        if (tracking_cfg is not None) and tracking_cfg['enable']:
+            self._gutter_tracker = GutterTracker.from_cfg(tracking_cfg)
 
-        from submodules.separate_pages_mmdet.inference_divide import divide_facing_page_with_cli, GutterDetector
+    def _load_model(self):
+        """
+        ノド元検出モデルを読み込みます。
+        """
+        from submodules.separate_pages_mmdet import inference_divide
 
         config_path = self.cfg['page_separation']['config_path']
         checkpoint = self.cfg['page_separation']['weight_path']
         device = 'cuda:0'
-        self._detector = GutterDetector(config_path, checkpoint, device)
-        self._run_submodule_inference = divide_facing_page_with_cli
+        self._detector = inference_divide.GutterDetector(config_path, checkpoint, device)
+        self._run_submodule_inference = inference_divide.divide_facing_page_with_cli
+        if self._batch_size > 1:
+            self._batch_detector = BatchDetector.create(self._detector, PageSeparation.DETECTOR_PREDICT_METHOD)
+
+    def finish_output_dir(self, output_dir):
+        """
+        出力ディレクトリ(書籍)の推論処理が終了した際に、その書籍のノド元の位置の記録を削除します。
+
+        Parameters
+        ----------
+        output_dir : str
+            推論処理が終了した出力ディレクトリのパス。
+        """
+        if self._gutter_tracker is not None:
+            self._gutter_tracker.reset(output_dir)
+        return
 
     def _is_valid_input(self, input_data):
         """
@@ -49,7 +93,7 @@ class PageSeparation(BaseInferenceProcess):
         [変数なし] : bool
             　入力データが正しければTrue, そうでなければFalseを返します。
         """
-        if type(input_data['img']) is not numpy.ndarray:
+        if not isinstance(input_data['img'], numpy.ndarray):
             print('PageSeparation: input img is not numpy.ndarray')
             return False
         return True
@@ -70,28 +114,206 @@ class PageSeparation(BaseInferenceProcess):
             基本的にinput_dataと同じ構造です。
         """
         print('### Page Separation ###')
+        result = self._run_without_detector(input_data)
+        if result is not None:
+            return result
+
+        inference_output = self._run_submodule_inference(
+            input_data['img'],
+            self._detector,
+            log=self._get_log_file_path(),
+        )
+        return self._create_detector_result(input_data, inference_output)
+
+    def _run_process_batch(self, input_data_list):
+        """
+        複数の入力データに対する推論処理の本体部分。
+        ノド元検出モデルが必要な画像をbatch_size枚ずつまとめて検出モデルで推論し、結果を入力データごとに分配します。
+        ノド元の位置の再利用は直前のページの分割結果を参照するため、同じ書籍の画像の検出が残っている場合は先に推論します。
+
+        Parameters
+        ----------
+        input_data_list : list
+            推論処理を実行する対象の入力データのリスト。
+
+        Returns
+        -------
+        result_list : list
+            入力データごとの推論処理の結果のリスト。
+        """
+        if self._batch_detector is None:
+            return super()._run_process_batch(input_data_list)
+
+        print('### Page Separation (batch) ###')
+        result_list = [None] * len(input_data_list)
+        detect_idx_list = []
+        for idx, input_data in enumerate(input_data_list):
+            if self._is_single_page(input_data):
+                result_list[idx] = self._create_result(input_data, [input_data['img']])
+                continue
+            if (self._gutter_tracker is not None) and any(
+                    input_data_list[detect_idx]['output_dir'] == input_data['output_dir'] for detect_idx in detect_idx_list):
+                self._detect_batch(input_data_list, detect_idx_list, result_list)
+                detect_idx_list = []
+            tracked_output = self._split_at_tracked_gutter(input_data)
+            if tracked_output is not None:
+                result_list[idx] = self._create_result(input_data, tracked_output)
+                continue
+            detect_idx_list.append(idx)
+            if len(detect_idx_list) >= self._batch_size:
+                self._detect_batch(input_data_list, detect_idx_list, result_list)
+                detect_idx_list = []
+        self._detect_batch(input_data_list, detect_idx_list, result_list)
+        return result_list
+
+    def _detect_batch(self, input_data_list, detect_idx_list, result_list):
+        """
+        ノド元検出モデルが必要な画像をまとめて推論し、結果をresult_listの対応する位置に格納します。
+        分割結果はページの順にノド元の位置の記録へ反映されます。
+
+        Parameters
+        ----------
+        input_data_list : list
+            推論処理を実行する対象の入力データのリスト。
+        detect_idx_list : list
+            ノド元検出モデルで推論する入力データのインデックスのリスト。
+        result_list : list
+            入力データごとの推論処理の結果のリスト。
+        """
+        img_list = [input_data_list[idx]['img'] for idx in detect_idx_list]
+        inference_output_list = self._batch_detector.run(
+            img_list,
+            lambda i, detector: self._run_submodule_inference(img_list[i], detector, log=self._get_log_file_path())
+        )
+        for idx, inference_output in zip(detect_idx_list, inference_output_list):
+            result_list[idx] = self._create_detector_result(input_data_list[idx], inference_output)
+        return
+
+    def _run_without_detector(self, input_data):
+        """
+        単ページの判定とノド元の位置の再利用により、ノド元検出モデルを実行せずに分割できる場合はその結果を返します。
+
+        Parameters
+        ----------
+        input_data : dict
+            推論処理を実行する対象の入力データ。
+
+        Returns
+        -------
+        result : list
+            推論処理の結果を保持するリスト。ノド元検出モデルが必要な場合はNoneを返します。
+        """
+        if self._is_single_page(input_data):
+            return self._create_result(input_data, [input_data['img']])
+        tracked_output = self._split_at_tracked_gutter(input_data)
+        if tracked_output is not None:
+            return self._create_result(input_data, tracked_output)
+        return None
+
+    def _get_log_file_path(self):
         log_file_path = None
         if self.process_dump_dir is not None:
             log_file_path = os.path.join(
                 self.process_dump_dir,
                 self.cfg['page_separation']['log']
             )
-        inference_output = self._run_submodule_inference(
-            input_data['img'],
-            self._detector,
-            log=log_file_path,
-        )
+        return log_file_path
+
+    def _create_detector_result(self, input_data, inference_output):
+        """
+        ノド元検出モデルによる分割結果を検証し、推論結果を作成します。
+
+        Parameters
+        ----------
+        input_data : dict
+            推論処理を実行する対象の入力データ。
+        inference_output : list
+            ノド元分割後の画像データのリスト。
+
+        Returns
+        -------
+        result : list
+            推論処理の結果を保持するリスト。分割結果のページ数が不正な場合はNoneを返します。
+        """
         if (not self.cfg['page_separation']['allow_invalid_num_output']) and (not len(inference_output) in range(1, 3)):
             print('ERROR: Output from page separation must be 1 or 2 pages.')
             return None
+        if self._gutter_tracker is not None:
+            thumbnail = PageRecord.from_data(input_data).get_pyramid().get_max_side(self._gutter_tracker.thumbnail_max_side)
+            self._gutter_tracker.update(input_data['output_dir'], input_data['img'], inference_output, thumbnail)
+        return self._create_result(input_data, inference_output)
+
+    def _is_single_page(self, input_data):
+        """
+        入力画像が単ページであることが明らかで、ノド元検出モデルを実行せずに済むかどうかを判定します。
+
+        Parameters
+        ----------
+        input_data : dict
+            推論処理を実行する対象の入力データ。
+
+        Returns
+        -------
+        [変数なし] : bool
+            単ページと判定した場合はTrue, そうでなければFalseを返します。
+        """
+        if self._spread_classifier is None:
+            return False
+        thumbnail = PageRecord.from_data(input_data).get_pyramid().get_max_side(self._spread_classifier.thumbnail_max_side)
+        is_single, aspect, gutter_score = self._spread_classifier.is_single_page(thumbnail)
+        if is_single:
+            print('single page (aspect: {0:.3f}, gutter score: {1:.3f}), gutter detection is skipped'.format(aspect, gutter_score))
+        return is_single
+
+    def _split_at_tracked_gutter(self, input_data):
+        """
+        同じ書籍の直前の見開き画像のノド元の位置で影が確認できれば、その位置で入力画像を分割します。
+
+        Parameters
+        ----------
+        input_data : dict
+            推論処理を実行する対象の入力データ。
+
+        Returns
+        -------
+        page_img_list : list
+            分割後の左右の画像データのリスト。確認できなかった場合はNoneを返します。
+        """
+        if self._gutter_tracker is None:
+            return None
+        img = input_data['img']
+        thumbnail = PageRecord.from_data(input_data).get_pyramid().get_max_side(self._gutter_tracker.thumbnail_max_side)
+        split_col = self._gutter_tracker.find_split_column(input_data['output_dir'], thumbnail, img.shape[1])
+        if split_col is None:
+            return None
+        print('gutter found at the tracked position (x: {0}), gutter detection is skipped'.format(split_col))
+        page_img_list = [img[:, :split_col], img[:, split_col:]]
+        self._gutter_tracker.update(input_data['output_dir'], img, page_img_list, thumbnail)
+        return page_img_list
 
+    def _create_result(self, input_data, inference_output):
+        """
+        ノド元分割後の画像のリストから推論結果を作成します。
+
+        Parameters
+        ----------
+        input_data : dict
+            推論処理を実行する対象の入力データ。
+        inference_output : list
+            ノド元分割後の画像データのリスト。
+
+        Returns
+        -------
+        result : list
+            推論処理の結果を保持するリスト。
+        """
         # Create result to pass img_path and img data
+        # (both pages of a spread keep the pyramid of the spread to share the skew angle)
+        spread_fields = {}
+        if len(inference_output) == 2:
+            spread_fields['spread_pyramid'] = PageRecord.from_data(input_data).get_pyramid()
         result = []
         for id, single_output_img in enumerate(inference_output):
-            output_data = copy.deepcopy(input_data)
-            output_data['img'] = single_output_img
-            output_data['orig_img_path'] = input_data['img_path']
-
             # make and save separated img file name
             if id == 0:
                 id = 'L'
@@ -99,8 +321,13 @@ class PageSeparation(BaseInferenceProcess):
                 id = 'R'
             orig_img_name = os.path.basename(input_data['img_path'])
             stem, ext = os.path.splitext(orig_img_name)
-            output_data['img_file_name'] = stem + '_' + id + '.jpg'
 
+            output_data = PageRecord.from_data(input_data).replace(
+                img=single_output_img,
+                orig_img_path=input_data['img_path'],
+                img_file_name=stem + '_' + id + '.jpg',
+                **spread_fields
+            )
             result.append(output_data)
 
         return result
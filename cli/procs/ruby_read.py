@@ -12,6 +12,8 @@ class RubyReadingProcess(BaseInferenceProcess):
     ルビ認識推論を実行するプロセスのクラス。
     BaseInferenceProcessを継承しています。
     """
+    cfg_section = 'ruby_read'
+
     def __init__(self, cfg, pid):
         """
         Parameters
@@ -22,6 +24,11 @@ class RubyReadingProcess(BaseInferenceProcess):
             実行される順序を表す数値。
         """
         super().__init__(cfg, pid, '_ruby_read')
+
+    def _load_model(self):
+        """
+        ルビ認識モデルを利用する推論関数を読み込みます。
+        """
         from submodules.ruby_prediction.output_ruby import output_hira_with_cli
         self._run_submodule_inference = output_hira_with_cli
 
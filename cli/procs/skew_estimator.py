@@ -0,0 +1,184 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import cv2
+import numpy
+
+
+class SkewEstimator:
+    """
+    縮小画像の文字の画素の射影(縦方向と横方向の画素数の分布)から、ページの傾きを推定するクラス。
+    回転させた射影が最も鋭くなる(二乗和が最大になる)角度を、粗い間隔の探索から細かい間隔の探索へと絞り込んで求めます。
+    横書きの行と縦書きの列のどちらにも対応するため、縦方向と横方向の射影を合わせて評価します。
+
+    Attributes
+    ----------
+    skew_max : float
+        探索する傾きの最大値(度)です。
+    acc_deg : float
+        最終的な探索の間隔(度)です。
+    coarse_step : float
+        最初の探索の間隔(度)です。
+    roi_w : float
+        推定に利用する画像中央の範囲の、画像の幅に対する比率です。
+    roi_h : float
+        推定に利用する画像中央の範囲の、画像の高さに対する比率です。
+    """
+
+    # ink pixels used for the estimation are subsampled to this number
+    MAX_POINT_NUM = 50000
+
+    def __init__(self, skew_max=4.0, acc_deg=0.1, coarse_step=0.5, roi_w=1.0, roi_h=1.0):
+        """
+        Parameters
+        ----------
+        skew_max : float
+            探索する傾きの最大値(度)です。
+        acc_deg : float
+            最終的な探索の間隔(度)です。
+        coarse_step : float
+            最初の探索の間隔(度)です。
+        roi_w : float
+            推定に利用する画像中央の範囲の、画像の幅に対する比率です。
+        roi_h : float
+            推定に利用する画像中央の範囲の、画像の高さに対する比率です。
+        """
+        self.skew_max = skew_max
+        self.acc_deg = acc_deg
+        self.coarse_step = max(coarse_step, acc_deg)
+        self.roi_w = roi_w
+        self.roi_h = roi_h
+
+    def estimate(self, thumbnail):
+        """
+        縮小画像からページの傾きを補正する回転角度を推定します。
+        角度はcv2.getRotationMatrix2Dと同じく反時計回りを正とします。
+
+        Parameters
+        ----------
+        thumbnail : numpy.ndarray
+            推定するページの縮小画像。
+
+        Returns
+        -------
+        (angle, eval_num) : tuple
+            傾きを補正する回転角度(度)と、探索で評価した角度の数。
+            文字の画素が無い場合は角度0を返します。
+        """
+        points = self._get_ink_points(thumbnail)
+        if points is None:
+            return 0.0, 0
+        center = (thumbnail.shape[1] / 2, thumbnail.shape[0] / 2)
+        score_dict = {}
+
+        def search(center_angle, half_num, step):
+            angle_list = []
+            for i in range(-half_num, half_num + 1):
+                angle = round(center_angle + i * step, 6)
+                if abs(angle) > self.skew_max + 1e-6:
+                    continue
+                if angle not in score_dict:
+                    score_dict[angle] = self._projection_score(points, center, angle)
+                angle_list.append(angle)
+            return max(angle_list, key=lambda angle: score_dict[angle])
+
+        # coarse search over the whole range, then narrow down around the best angle
+        step = self.coarse_step
+        best_angle = search(0.0, int(self.skew_max / step), step)
+        while step > self.acc_deg:
+            next_step = max(self.acc_deg, step / 4)
+            best_angle = search(best_angle, int(numpy.ceil(step / next_step)), next_step)
+            step = next_step
+        return best_angle, len(score_dict)
+
+    def verify(self, thumbnail, angle, tolerance):
+        """
+        指定した角度が縮小画像の傾きとして妥当かどうかを、前後tolerance度の角度と比較して検証します。
+        指定した角度の射影が前後の角度の射影以上に鋭い場合に妥当とします。
+
+        Parameters
+        ----------
+        thumbnail : numpy.ndarray
+            検証するページの縮小画像。
+        angle : float
+            検証する回転角度(度)。
+        tolerance : float
+            比較する前後の角度との差(度)。
+
+        Returns
+        -------
+        (is_valid, eval_num) : tuple
+            妥当な場合はTrue, そうでなければFalseと、評価した角度の数。
+        """
+        points = self._get_ink_points(thumbnail)
+        if points is None:
+            return True, 0
+        center = (thumbnail.shape[1] / 2, thumbnail.shape[0] / 2)
+        score = self._projection_score(points, center, angle)
+        eval_num = 1
+        for neighbor_angle in (angle - tolerance, angle + tolerance):
+            if abs(neighbor_angle) > self.skew_max + 1e-6:
+                continue
+            eval_num += 1
+            if self._projection_score(points, center, neighbor_angle) > score:
+                return False, eval_num
+        return True, eval_num
+
+    def _get_ink_points(self, thumbnail):
+        gray = thumbnail
+        if gray.ndim == 3:
+            gray = cv2.cvtColor(gray, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape[:2]
+        roi_x = int(width * (1.0 - self.roi_w) / 2)
+        roi_y = int(height * (1.0 - self.roi_h) / 2)
+        roi = gray[roi_y:height - roi_y, roi_x:width - roi_x]
+        if roi.size == 0:
+            return None
+        _, binary = cv2.threshold(roi, 0, 1, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+        ys, xs = numpy.nonzero(binary)
+        if len(xs) == 0:
+            return None
+        if len(xs) > SkewEstimator.MAX_POINT_NUM:
+            step = len(xs) // SkewEstimator.MAX_POINT_NUM + 1
+            xs = xs[::step]
+            ys = ys[::step]
+        return (xs + roi_x).astype(numpy.float64), (ys + roi_y).astype(numpy.float64)
+
+    def _projection_score(self, points, center, angle):
+        xs, ys = points
+        matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
+        rotated_x = matrix[0, 0] * xs + matrix[0, 1] * ys + matrix[0, 2]
+        rotated_y = matrix[1, 0] * xs + matrix[1, 1] * ys + matrix[1, 2]
+        score = 0.0
+        for coords in (rotated_x, rotated_y):
+            coords = numpy.floor(coords - coords.min()).astype(numpy.int64)
+            hist = numpy.bincount(coords).astype(numpy.float64)
+            score += float(numpy.dot(hist, hist))
+        return score
+
+
+def rotate_image(img, angle, border_value=(255, 255, 255)):
+    """
+    画像を中心の周りに回転します。回転後の画像の大きさは元の画像と同じです。
+
+    Parameters
+    ----------
+    img : numpy.ndarray
+        回転する画像データ。
+    angle : float
+        回転角度(度)。反時計回りを正とします。
+    border_value : tuple
+        回転により画像の外側になった領域の画素値。
+
+    Returns
+    -------
+    rotated_img : numpy.ndarray
+        回転後の画像データ。
+    """
+    height, width = img.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(img, matrix, (width, height), flags=cv2.INTER_LINEAR,
+                          borderMode=cv2.BORDER_CONSTANT, borderValue=border_value)
@@ -0,0 +1,127 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import cv2
+import numpy
+
+
+class SpreadClassifier:
+    """
+    ページ画像が見開きでないことが明らかかどうかを、縮小画像から簡易に判定するクラス。
+    画像の縦横比と、中央付近の列の濃さ(縦方向の射影)がその外側の列より濃くないこと(ノド元の影が無いこと)の両方が、
+    余裕(margin)を持って閾値を下回る場合のみ単ページと判定します。
+    それ以外の画像はノド元検出モデルによる判定が必要なものとして扱います。
+
+    Attributes
+    ----------
+    max_aspect : float
+        単ページと判定する画像の幅/高さの比の上限です。
+    gutter_band : float
+        ノド元の影を探す中央の範囲の、画像の幅に対する比率です。
+    gutter_contrast : float
+        中央の範囲で最も濃い列と、その外側の濃い列(90パーセンタイル値)の濃さの差(0~1)の上限です。
+    margin : float
+        閾値に対する余裕の比率です。判定値が閾値の(1 - margin)倍以下の場合のみ単ページと判定します。
+    thumbnail_max_side : int
+        判定に利用する縮小画像の長辺の画素数です。
+    """
+
+    def __init__(self, max_aspect=0.9, gutter_band=0.3, gutter_contrast=0.1, margin=0.1, thumbnail_max_side=512):
+        """
+        Parameters
+        ----------
+        max_aspect : float
+            単ページと判定する画像の幅/高さの比の上限です。
+        gutter_band : float
+            ノド元の影を探す中央の範囲の、画像の幅に対する比率です。
+        gutter_contrast : float
+            中央の範囲で最も濃い列と、その外側の濃い列(90パーセンタイル値)の濃さの差(0~1)の上限です。
+        margin : float
+            閾値に対する余裕の比率です。
+        thumbnail_max_side : int
+            判定に利用する縮小画像の長辺の画素数です。
+        """
+        self.max_aspect = max_aspect
+        self.gutter_band = gutter_band
+        self.gutter_contrast = gutter_contrast
+        self.margin = margin
+        self.thumbnail_max_side = thumbnail_max_side
+
+    @classmethod
+    def from_cfg(cls, check_cfg):
+        """
+        設定ファイルのpage_separation.single_page_checkセクションからインスタンスを作成します。
+        """
+        return cls(max_aspect=check_cfg['max_aspect'],
+                   gutter_band=check_cfg['gutter_band'],
+                   gutter_contrast=check_cfg['gutter_contrast'],
+                   margin=check_cfg['margin'],
+                   thumbnail_max_side=check_cfg['thumbnail_max_side'])
+
+    def is_single_page(self, thumbnail):
+        """
+        縮小画像から単ページであることが明らかかどうかを判定します。
+
+        Parameters
+        ----------
+        thumbnail : numpy.ndarray
+            判定するページの縮小画像(BGR形式)。
+
+        Returns
+        -------
+        (is_single, aspect, gutter_score) : tuple
+            単ページと判定した場合はTrue、判定できない場合はFalseと、判定に利用した縦横比と中央の列の濃さの差。
+        """
+        height, width = thumbnail.shape[:2]
+        aspect = width / height
+        if aspect > self.max_aspect * (1.0 - self.margin):
+            return False, aspect, None
+        gutter_score = self.get_gutter_score(thumbnail)
+        is_single = gutter_score <= self.gutter_contrast * (1.0 - self.margin)
+        return is_single, aspect, gutter_score
+
+    def get_gutter_score(self, thumbnail):
+        """
+        中央の範囲で最も濃い列と、その外側の濃い列(90パーセンタイル値)の濃さの差を0~1の値で返します。
+        本文の列は平滑化により平均的な濃さになるため、ノド元の影がある見開き画像でのみ大きな値になります。
+        """
+        profile = get_column_darkness(thumbnail)
+        width = len(profile)
+        band_start = int(width * (0.5 - self.gutter_band / 2))
+        band_end = max(band_start + 1, int(width * (0.5 + self.gutter_band / 2)))
+        outside = numpy.concatenate([profile[:band_start], profile[band_end:]])
+        if len(outside) == 0:
+            return float(profile.max())
+        return max(0.0, float(profile[band_start:band_end].max() - numpy.percentile(outside, 90)))
+
+
+def get_column_darkness(thumbnail, smooth_ratio=0.05):
+    """
+    縮小画像の列ごとの濃さ(0~1)を、画像の幅に対してsmooth_ratioの幅で平滑化して返します。
+    細い罫線や文字の列の影響を抑え、ノド元の影のような幅のある濃い領域を検出するために利用します。
+    平滑化の窓が画像の端をはみ出す部分は端の列の値で補います。
+
+    Parameters
+    ----------
+    thumbnail : numpy.ndarray
+        BGR形式またはグレースケールの縮小画像。
+    smooth_ratio : float
+        平滑化の窓の幅の、画像の幅に対する比率。
+
+    Returns
+    -------
+    profile : numpy.ndarray
+        列ごとの濃さ。値が大きいほど濃い列です。
+    """
+    gray = thumbnail
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_BGR2GRAY)
+    profile = 1.0 - gray.mean(axis=0) / 255.0
+    window = max(1, int(len(profile) * smooth_ratio))
+    if window > 1:
+        padded = numpy.pad(profile, (window // 2, window - 1 - window // 2), mode='edge')
+        profile = numpy.convolve(padded, numpy.ones(window) / window, mode='valid')
+    return profile
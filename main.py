@@ -7,8 +7,9 @@ import click
 import json
 import os
 import sys
+import tempfile
 
-from cli.core import OcrInferrer, OcrResultEvaluator
+# heavy modules (cv2, inference procs, evaluator) are imported in each command
 from cli.core import utils
 
 
@@ -29,7 +30,9 @@ def cmd(ctx):
 @click.option('-x', '--save_xml', type=bool, default=False, is_flag=True, help='Output result XML file with text file.')
 @click.option('-d', '--dump', type=bool, default=False, is_flag=True, help='Dump all intermediate process output.')
 @click.option('-r', '--ruby_only', type=bool, default=False, is_flag=True, help='Do ruby_read inference only.')
-def infer(ctx, input_root, output_root, config_file, proc_range, save_image, save_xml, input_structure, dump, ruby_only):
+@click.option('-w', '--workers', type=click.IntRange(min=1), default=1, help='Number of worker processes to run inference on input directories in parallel. Default is 1.')
+@click.option('-R', '--resume', type=bool, default=False, is_flag=True, help='Resume interrupted inference in OUTPUT_ROOT, skipping completed pages.')
+def infer(ctx, input_root, output_root, config_file, proc_range, save_image, save_xml, input_structure, dump, ruby_only, workers, resume):
     """
     \b
     INPUT_ROOT   \t: Input data directory for inference.
@@ -49,7 +52,9 @@ def infer(ctx, input_root, output_root, config_file, proc_range, save_image, sav
         'save_xml': save_xml,
         'dump': dump,
         'input_structure': input_structure,
-        'ruby_only': ruby_only
+        'ruby_only': ruby_only,
+        'workers': workers,
+        'resume': resume
     }
 
     # check if input_root exists
@@ -64,7 +69,11 @@ def infer(ctx, input_root, output_root, config_file, proc_range, save_image, sav
         exit(1)
 
     # prepare output root derectory
-    infer_cfg['output_root'] = utils.mkdir_with_duplication_check(infer_cfg['output_root'])
+    if infer_cfg['resume']:
+        # reuse output root directory of the interrupted run
+        os.makedirs(infer_cfg['output_root'], exist_ok=True)
+    else:
+        infer_cfg['output_root'] = utils.mkdir_with_duplication_check(infer_cfg['output_root'])
 
     # save inference option
     with open(os.path.join(infer_cfg['output_root'], 'opt.json'), 'w') as fp:
@@ -72,8 +81,63 @@ def infer(ctx, input_root, output_root, config_file, proc_range, save_image, sav
                   sort_keys=True, separators=(',', ': '))
 
     # do inference
-    inferrer = OcrInferrer(infer_cfg)
-    inferrer.run()
+    if infer_cfg['workers'] > 1:
+        from cli.core import run_sharded_inference
+        run_sharded_inference(infer_cfg, infer_cfg['workers'])
+    else:
+        from cli.core import OcrInferrer
+        inferrer = OcrInferrer(infer_cfg)
+        inferrer.run()
+
+
+@cmd.command()
+@click.pass_context
+@click.argument('output_root')
+@click.option('-p', '--proc_range', type=str, default='0..3', help='Inference process range to run. Default is "0..3".')
+@click.option('-c', '--config_file', type=str, default='config.yml', help='Configuration yml file for inference. Default is "config.yml".')
+@click.option('-i', '--save_image', type=bool, default=False, is_flag=True, help='Output result image file with text file.')
+@click.option('-x', '--save_xml', type=bool, default=False, is_flag=True, help='Output result XML file with text file.')
+@click.option('-d', '--dump', type=bool, default=False, is_flag=True, help='Dump all intermediate process output.')
+@click.option('-r', '--ruby_only', type=bool, default=False, is_flag=True, help='Do ruby_read inference only.')
+@click.option('-s', '--input_structure', type=click.Choice(['s', 'i', 't', 'w', 'f'], case_sensitive=True), default='s', help='Default input directory structure type of jobs.')
+@click.option('--host', type=str, default='127.0.0.1', help='Host name to listen. Default is "127.0.0.1".')
+@click.option('--port', type=int, default=8080, help='Port number to listen. Default is 8080.')
+def serve(ctx, output_root, config_file, proc_range, save_image, save_xml, dump, ruby_only, input_structure, host, port):
+    """
+    \b
+    OUTPUT_ROOT   \t: Output directory for inference jobs.
+    """
+    click.echo('start inference server !')
+    click.echo('output_root : {0}'.format(output_root))
+    click.echo('config_file : {0}'.format(config_file))
+
+    cfg = {
+        'input_root': None,
+        'output_root': output_root,
+        'config_file': config_file,
+        'proc_range': proc_range,
+        'save_image': save_image,
+        'save_xml': save_xml,
+        'dump': dump,
+        'input_structure': input_structure,
+        'ruby_only': ruby_only,
+        'workers': 1,
+        'resume': False
+    }
+
+    # parse command line option
+    infer_cfg = utils.parse_cfg(cfg, parse_input=False)
+    if infer_cfg is None:
+        print('[ERROR] Config parse error.', file=sys.stderr)
+        exit(1)
+
+    # prepare output root derectory
+    os.makedirs(infer_cfg['output_root'], exist_ok=True)
+
+    # load models and wait for inference jobs
+    from cli.core import OcrInferenceServer
+    server = OcrInferenceServer(infer_cfg, host, port)
+    server.serve_forever()
 
 
 @cmd.command()
@@ -130,10 +194,75 @@ def evaluate(ctx, input_pred_data, input_gt_data, output_root, input_structure,
                   sort_keys=True, separators=(',', ': '))
 
     # do evaluation
+    from cli.core import OcrResultEvaluator
     evaluator = OcrResultEvaluator(eval_cfg)
     evaluator.run()
 
 
+@cmd.command()
+@click.pass_context
+@click.argument('output_json', default='benchmark.json')
+@click.option('-c', '--config_file', type=str, default='config.yml', help='Configuration yml file for inference. Default is "config.yml".')
+@click.option('-n', '--page_num', type=click.IntRange(min=1), default=16, help='Number of synthetic page images. Default is 16.')
+@click.option('--seed', type=int, default=0, help='Random seed for synthetic page images. Default is 0.')
+@click.option('--repeat', type=click.IntRange(min=1), default=3, help='Number of repetitions of each stage benchmark. Default is 3.')
+@click.option('-b', '--baseline', type=str, default=None, help='Baseline benchmark JSON file to compare with.')
+@click.option('--tolerance', type=float, default=0.1, help='Allowed ratio of slowdown against baseline. Default is 0.1.')
+@click.option('--work_dir', type=str, default=None, help='Directory for synthetic pages and outputs. Temporary directory is used by default.')
+def benchmark(ctx, output_json, config_file, page_num, seed, repeat, baseline, tolerance, work_dir):
+    """
+    \b
+    OUTPUT_JSON   \t: Output JSON file for benchmark result. Default is "benchmark.json".
+    """
+    click.echo('start benchmark !')
+    click.echo('output_json : {0}'.format(output_json))
+    click.echo('config_file : {0}'.format(config_file))
+
+    cfg = {
+        'input_root': None,
+        'output_root': work_dir if work_dir is not None else '.',
+        'config_file': config_file,
+        'proc_range': '0..3',
+        'save_image': False,
+        'save_xml': True,
+        'dump': False,
+        'input_structure': 's',
+        'ruby_only': False,
+        'workers': 1,
+        'resume': False
+    }
+
+    # parse command line option
+    bench_cfg = utils.parse_cfg(cfg, parse_input=False)
+    if bench_cfg is None:
+        print('[ERROR] Config parse error.', file=sys.stderr)
+        exit(1)
+
+    baseline_result = None
+    if baseline is not None:
+        with open(baseline, 'r') as fp:
+            baseline_result = json.load(fp)
+
+    # run benchmark with stub models on synthetic pages
+    from cli.core import OcrBenchmark, compare_benchmark_result
+    if work_dir is None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            result = OcrBenchmark(bench_cfg, tmp_dir, page_num, seed, repeat).run()
+    else:
+        os.makedirs(work_dir, exist_ok=True)
+        result = OcrBenchmark(bench_cfg, work_dir, page_num, seed, repeat).run()
+
+    with open(output_json, 'w') as fp:
+        json.dump(result, fp, ensure_ascii=False, indent=4, separators=(',', ': '))
+    click.echo('benchmark result : {0}'.format(output_json))
+
+    if baseline_result is not None:
+        regression_list = compare_benchmark_result(result, baseline_result, tolerance)
+        if len(regression_list) > 0:
+            print('[ERROR] Performance regression found : {0}'.format(', '.join(regression_list)), file=sys.stderr)
+            exit(1)
+
+
 def main():
     cmd(obj={})
 
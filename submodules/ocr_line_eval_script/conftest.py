@@ -0,0 +1,6 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+# this file makes pytest add the script directory to sys.path so that tests can import ocr_evaluator
@@ -52,6 +52,8 @@ def get_cli_options(args):
     parser.add_argument('--eval_annotation_line_order', action='store_true', help='evaluate only main text')
     parser.add_argument('--ignore_inline_type_to_skip', action='store_true', help='check inline type when gt string is empty')
     parser.add_argument('--eval_all_valid_pred_line', action='store_true', help='evaluate all valid predicted line in line order evaluation')
+    parser.add_argument('--edit_distance_backend', type=str, default='bitparallel', choices=['bitparallel', 'nltk'], help='implementation of edit distance calculation')
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes to evaluate PIDs in parallel')
     options = parser.parse_args(args)
     validate_options(options)
 
@@ -90,6 +92,11 @@ def main():
     else:
         print('### MEDIAN OF LINE ORDER LEVEN DISTANCE : {0} (pid={1})'.format(line_order_edit_distance_median, median_pid_list[0]))
 
+    for percentile, (ocr_edit_distance, pid) in ocr_evaluator.get_ocr_edit_distance_percentiles().items():
+        print('### {0}TH PERCENTILE OF LINE OCR LEVEN DISTANCE : {1} (pid={2})'.format(percentile, ocr_edit_distance, pid))
+    for percentile, (line_order_edit_distance, pid) in ocr_evaluator.get_line_order_edit_distance_percentiles().items():
+        print('### {0}TH PERCENTILE OF LINE ORDER LEVEN DISTANCE : {1} (pid={2})'.format(percentile, line_order_edit_distance, pid))
+
 
 if __name__ == '__main__':
     main()
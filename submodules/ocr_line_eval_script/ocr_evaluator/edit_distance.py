@@ -0,0 +1,58 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+def bit_parallel_edit_distance(s1: str, s2: str) -> int:
+    # Levenshtein distance by bit-parallel algorithm of Myers/Hyyro
+    # bit vectors are python int, so there is no limit of string length
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    pattern_len = len(s2)
+    if pattern_len == 0:
+        return len(s1)
+
+    # bit mask of positions for each character in the (shorter) pattern string
+    peq = {}
+    for i, c in enumerate(s2):
+        peq[c] = peq.get(c, 0) | (1 << i)
+
+    mask = (1 << pattern_len) - 1
+    last_bit = 1 << (pattern_len - 1)
+    pv = mask
+    mv = 0
+    distance = pattern_len
+    for c in s1:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last_bit:
+            distance += 1
+        elif mh & last_bit:
+            distance -= 1
+        ph = (ph << 1) | 1
+        mh = mh << 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv & mask
+    return distance
+
+
+def nltk_edit_distance(s1: str, s2: str) -> int:
+    # nltk is imported only when this backend is used, since importing it is slow
+    import nltk
+    return nltk.edit_distance(s1, s2)
+
+
+EDIT_DISTANCE_BACKENDS = {
+    'bitparallel': bit_parallel_edit_distance,
+    'nltk': nltk_edit_distance,
+}
+
+
+def get_edit_distance_func(backend: str):
+    if backend not in EDIT_DISTANCE_BACKENDS:
+        raise ValueError('Unknown edit distance backend : {0} (choose from {1})'.format(backend, list(EDIT_DISTANCE_BACKENDS.keys())))
+    return EDIT_DISTANCE_BACKENDS[backend]
@@ -3,7 +3,7 @@
 # This software is released under the CC BY 4.0.
 # https://creativecommons.org/licenses/by/4.0/
 
-import nltk
+from .edit_distance import nltk_edit_distance
 
 
 class LineData:
@@ -13,7 +13,7 @@ class LineData:
 
 
 class LineEvaluator:
-    def __init__(self, pred_line_data: LineData, gt_line_data: LineData, correct_line_ocr_log: bool, skip_ocr_evaluation: bool):
+    def __init__(self, pred_line_data: LineData, gt_line_data: LineData, correct_line_ocr_log: bool, skip_ocr_evaluation: bool, edit_distance_func=nltk_edit_distance):
         # input data
         self.pred_line_data = pred_line_data
         self.gt_line_data = gt_line_data
@@ -25,6 +25,7 @@ class LineEvaluator:
         # config
         self.correct_line_ocr_log = correct_line_ocr_log
         self.skip_ocr_evaluation = skip_ocr_evaluation
+        self.edit_distance_func = edit_distance_func
 
     def do_evaluation(self):
         if self.skip_ocr_evaluation:
@@ -32,7 +33,7 @@ class LineEvaluator:
             print('pred line: {0}'.format(self.pred_line_data.string))
             print('  gt line: {0}'.format(self.gt_line_data.string))
             return
-        distance = nltk.edit_distance(self.pred_line_data.string, self.gt_line_data.string)
+        distance = self.edit_distance_func(self.pred_line_data.string, self.gt_line_data.string)
         if distance != 0 or self.correct_line_ocr_log:
             print('### EDIT DIS : {0}'.format(distance))
             print('pred line: {0}'.format(self.pred_line_data.string))
@@ -3,13 +3,32 @@
 # This software is released under the CC BY 4.0.
 # https://creativecommons.org/licenses/by/4.0/
 
+import contextlib
 import glob
+import io
+import multiprocessing
+import numpy
 import os
 import statistics
 from .pid_data_evaluator import PidDataEvaluator
 
 
+def _evaluate_pid(pid_data_evaluator):
+    # evaluate single PID in worker process and return only per-page results,
+    # the log is captured so that the parent process prints it in PID order
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        pid_data_evaluator.load_page_evaluators()
+        pid_data_evaluator.do_evaluation()
+    return pid_data_evaluator.get_page_results(), log.getvalue()
+
+
 class OcrEvaluator:
+    PAGE_DISTANCE_DTYPE = [('pid_idx', numpy.int32), ('line_ocr', numpy.float64), ('line_order', numpy.float64)]
+
+    # percentiles to report in addition to median
+    REPORT_PERCENTILES = [90, 95, 99]
+
     def __init__(self, options):
         # set properties
         self.correct_line_ocr_log = options.correct_line_ocr_log
@@ -18,6 +37,9 @@ class OcrEvaluator:
         self.ocr_edit_distance_list = []
         self.line_order_edit_distance_list = []
         self.output_root_dir = options.output_root_dir
+        # options without workers (e.g. created by other scripts) are evaluated sequentially
+        self.workers = getattr(options, 'workers', 1)
+        self._page_distance_table = numpy.zeros(0, dtype=OcrEvaluator.PAGE_DISTANCE_DTYPE)
 
         # create list of PidDataEvaluator
         self.pid_data_evaluator_list = []
@@ -29,12 +51,24 @@ class OcrEvaluator:
             self.pid_data_evaluator_list = self._create_pid_evaluator_list(options)
 
     def do_evaluation(self):
+        # evaluate PIDs concurrently in worker processes
+        if self.workers > 1 and len(self.pid_data_evaluator_list) > 1:
+            worker_num = min(self.workers, len(self.pid_data_evaluator_list))
+            with multiprocessing.Pool(processes=worker_num) as pool:
+                worker_result_list = pool.map(_evaluate_pid, self.pid_data_evaluator_list, chunksize=1)
+            for pid_data_evaluator, (page_results, log) in zip(self.pid_data_evaluator_list, worker_result_list):
+                print(log, end='')
+                pid_data_evaluator.set_page_results(*page_results)
+        else:
+            for pid_data_evaluator in self.pid_data_evaluator_list:
+                pid_data_evaluator.load_page_evaluators()
+                pid_data_evaluator.do_evaluation()
+
         # create PID dir pair list
         for pid_data_evaluator in self.pid_data_evaluator_list:
-            pid_data_evaluator.load_page_evaluators()
-            pid_data_evaluator.do_evaluation()
             self.ocr_edit_distance_list.append(pid_data_evaluator.get_line_ocr_edit_distance_average())
             self.line_order_edit_distance_list.append(pid_data_evaluator.get_line_order_edit_distance_average())
+        self._page_distance_table = self._create_page_distance_table()
 
     def get_ocr_edit_distance_average(self):
         if len(self.ocr_edit_distance_list) <= 0:
@@ -43,28 +77,10 @@ class OcrEvaluator:
         return sum(self.ocr_edit_distance_list) / len(self.ocr_edit_distance_list)
 
     def get_ocr_edit_distance_median(self):
-        line_ocr_edit_distance_list = []
-        line_ocr_edit_distance_dict = {}
-        for pid_data_evaluator in self.pid_data_evaluator_list:
-            line_ocr_edit_distance_dict[pid_data_evaluator.pid_string] = pid_data_evaluator.get_line_ocr_edit_distance_list()
-            line_ocr_edit_distance_list.extend(pid_data_evaluator.get_line_ocr_edit_distance_list())
-        ocr_edit_distance_median_low = statistics.median_low(line_ocr_edit_distance_list)
-        ocr_edit_distance_median_high = statistics.median_high(line_ocr_edit_distance_list)
-        ocr_edit_distance_median = (ocr_edit_distance_median_low + ocr_edit_distance_median_high) / 2
-
-        median_pid_list = []
-        for pid, single_edit_distance_list in line_ocr_edit_distance_dict.items():
-            if ocr_edit_distance_median_low in single_edit_distance_list:
-                median_pid_list.append(pid)
-                break
-        for pid, single_edit_distance_list in line_ocr_edit_distance_dict.items():
-            if ocr_edit_distance_median_high in single_edit_distance_list:
-                median_pid_list.append(pid)
-                break
+        return self._get_median('line_ocr')
 
-        if median_pid_list[0] == median_pid_list[1]:
-            median_pid_list.pop()
-        return median_pid_list, ocr_edit_distance_median
+    def get_ocr_edit_distance_percentiles(self, percentiles=None):
+        return self._get_percentiles('line_ocr', percentiles)
 
     def get_line_order_edit_distance_average(self):
         if len(self.line_order_edit_distance_list) <= 0:
@@ -73,29 +89,54 @@ class OcrEvaluator:
         return sum(self.line_order_edit_distance_list) / len(self.line_order_edit_distance_list)
 
     def get_line_order_edit_distance_median(self):
-        line_order_edit_distance_list = []
-        line_order_edit_distance_dict = {}
-        for pid_data_evaluator in self.pid_data_evaluator_list:
-            line_order_edit_distance_dict[pid_data_evaluator.pid_string] = pid_data_evaluator.get_line_order_edit_distance_list()
-            line_order_edit_distance_list.extend(pid_data_evaluator.get_line_order_edit_distance_list())
-        line_order_edit_distance_median_low = statistics.median_low(line_order_edit_distance_list)
-        line_order_edit_distance_median_high = statistics.median_high(line_order_edit_distance_list)
-        line_order_edit_distance_median = (line_order_edit_distance_median_low + line_order_edit_distance_median_high) / 2
-
-        median_pid_list = []
-        for pid, single_edit_distance_list in line_order_edit_distance_dict.items():
-            if line_order_edit_distance_median_low in single_edit_distance_list:
-                median_pid_list.append(pid)
-                break
-
-        for pid, single_edit_distance_list in line_order_edit_distance_dict.items():
-            if line_order_edit_distance_median_high in single_edit_distance_list:
-                median_pid_list.append(pid)
-                break
-
+        return self._get_median('line_order')
+
+    def get_line_order_edit_distance_percentiles(self, percentiles=None):
+        return self._get_percentiles('line_order', percentiles)
+
+    def _create_page_distance_table(self):
+        # per-page distance table of all PIDs, rows are ordered by PID and page
+        row_list = []
+        for pid_idx, pid_data_evaluator in enumerate(self.pid_data_evaluator_list):
+            line_ocr_edit_distance_list = pid_data_evaluator.get_line_ocr_edit_distance_list()
+            line_order_edit_distance_list = pid_data_evaluator.get_line_order_edit_distance_list()
+            for line_ocr, line_order in zip(line_ocr_edit_distance_list, line_order_edit_distance_list):
+                row_list.append((pid_idx, line_ocr, line_order))
+        return numpy.array(row_list, dtype=OcrEvaluator.PAGE_DISTANCE_DTYPE)
+
+    def _select(self, field, rank_list):
+        # select values of given ranks in O(N) and find the first PID which has each value
+        value_array = self._page_distance_table[field]
+        selected_array = numpy.partition(value_array, rank_list)
+        result_list = []
+        for rank in rank_list:
+            value = float(selected_array[rank])
+            pid_idx = int(self._page_distance_table['pid_idx'][value_array == value].min())
+            result_list.append((value, self.pid_data_evaluator_list[pid_idx].pid_string))
+        return result_list
+
+    def _get_median(self, field):
+        page_num = len(self._page_distance_table)
+        if page_num == 0:
+            raise statistics.StatisticsError('no median for empty data')
+        # same as statistics.median_low and statistics.median_high
+        (median_low, low_pid), (median_high, high_pid) = self._select(field, [(page_num - 1) // 2, page_num // 2])
+        median = (median_low + median_high) / 2
+
+        median_pid_list = [low_pid, high_pid]
         if median_pid_list[0] == median_pid_list[1]:
             median_pid_list.pop()
-        return median_pid_list, line_order_edit_distance_median
+        return median_pid_list, median
+
+    def _get_percentiles(self, field, percentiles=None):
+        # nearest lower rank percentiles, which are values of pages unlike interpolated ones
+        if percentiles is None:
+            percentiles = OcrEvaluator.REPORT_PERCENTILES
+        page_num = len(self._page_distance_table)
+        if page_num == 0:
+            raise statistics.StatisticsError('no percentile for empty data')
+        rank_list = [int(p * (page_num - 1) // 100) for p in percentiles]
+        return dict(zip(percentiles, self._select(field, rank_list)))
 
     def _create_pid_evaluator_list(self, options):
         pid_evaluator_list = []
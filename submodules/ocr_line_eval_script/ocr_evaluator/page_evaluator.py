@@ -3,8 +3,8 @@
 # This software is released under the CC BY 4.0.
 # https://creativecommons.org/licenses/by/4.0/
 
-import nltk
-from operator import itemgetter
+import numpy
+from .edit_distance import get_edit_distance_func
 from .line_evaluator import LineEvaluator, LineData
 
 
@@ -30,11 +30,18 @@ class PageEvaluator:
         self.eval_annotation_line_order = options.eval_annotation_line_order
         self.ignore_inline_type_to_skip = options.ignore_inline_type_to_skip
         self.eval_all_valid_pred_line = options.eval_all_valid_pred_line
+        # options without edit_distance_backend (e.g. created by other scripts) use nltk as before
+        self.edit_distance_func = get_edit_distance_func(getattr(options, 'edit_distance_backend', 'nltk'))
 
         # internal variables
         self._line_evaluator_list = []
 
     def load_line_evaluators(self):
+        # boxes and reading order indices of pred lines are parsed only once per page
+        pred_line_block_list = None
+        pred_boxes = None
+        pred_line_idx_table = None
+
         gt_idx = 0
         for gt_line_block in self.gt_page_block.iter('LINE'):
             # use only '本文' LINE blocks when eval_main_text_only is enabled
@@ -66,47 +73,29 @@ class PageEvaluator:
             if gt_line_block.attrib['TYPE'] in ['広告文字']:
                 gt_skip_line_order_evaluation = True
 
-            pred_skip_line_order_evaluation = False
-            # search pair of pred/gt line data
-            iou_line_tuple_list = []
-            pred_idx = -1
-            for pred_line_block in self.pred_page_block.iter('LINE'):
-                # use only '本文' LINE blocks when eval_main_text_only is enabled
-                if pred_line_block.attrib['TYPE'] != '本文' and self.eval_main_text_only:
-                    continue
-
-                if pred_line_block.attrib['TYPE'] not in ['本文', '頭注', '割注', '広告文字']:
-                    pred_skip_line_order_evaluation = True
-                elif (pred_line_block.attrib['TYPE'] in ['頭注', '割注']) and (not self.eval_annotation_line_order):
-                    pred_skip_line_order_evaluation = True
-                elif (pred_line_block.attrib['TYPE'] in ['広告文字']):
-                    pred_skip_line_order_evaluation = True
-                else:
-                    pred_skip_line_order_evaluation = False
-
-                if gt_skip_line_order_evaluation and (not pred_skip_line_order_evaluation) and (not self.eval_all_valid_pred_line):
-                    pred_skip_line_order_evaluation = True
+            if pred_line_block_list is None:
+                pred_line_block_list, pred_boxes, pred_line_idx_table = self._load_pred_lines()
 
-                if not pred_skip_line_order_evaluation:
-                    pred_idx += 1
-
-                line_iou = self._get_line_iou(pred_line_block, gt_line_block)
-                if line_iou >= self.iou_thresh:
-                    if pred_skip_line_order_evaluation:
-                        pred_line_data = LineData(pred_line_block.attrib['STRING'], None)
-                    else:
-                        pred_line_data = LineData(pred_line_block.attrib['STRING'], pred_idx)
-                    iou_line_tuple_list.append((line_iou, pred_line_data))
-
-            if len(iou_line_tuple_list) > 0:
-                sorted_tuple_list = sorted(iou_line_tuple_list, key=itemgetter(0))
-                pred_line_data_to_add = sorted_tuple_list[-1][1]
+            # search pair of pred/gt line data
+            # the pred line with the highest IoU (the last one if tied) over iou_thresh is paired
+            pred_line_data_to_add = None
+            if len(pred_line_block_list) > 0:
+                iou_array = self._get_line_iou_array(pred_boxes, self._get_line_box(gt_line_block))
+                matched_idx_array = numpy.flatnonzero(iou_array >= self.iou_thresh)
+                if len(matched_idx_array) > 0:
+                    matched_iou_array = iou_array[matched_idx_array]
+                    best_idx = matched_idx_array[numpy.flatnonzero(matched_iou_array == matched_iou_array.max())[-1]]
+                    pred_line_block = pred_line_block_list[best_idx]
+                    pred_line_idx = pred_line_idx_table[gt_skip_line_order_evaluation][best_idx]
+                    pred_line_data_to_add = LineData(pred_line_block.attrib['STRING'], pred_line_idx)
+
+            if pred_line_data_to_add is not None:
                 if gt_skip_line_order_evaluation:
                     gt_line_data = LineData(gt_line_block.attrib['STRING'], None)
                 else:
                     gt_line_data = LineData(gt_line_block.attrib['STRING'], gt_idx)
                     gt_idx += 1
-                line_evaluator = LineEvaluator(pred_line_data_to_add, gt_line_data, self.correct_line_ocr_log, skip_ocr_evaluation)
+                line_evaluator = LineEvaluator(pred_line_data_to_add, gt_line_data, self.correct_line_ocr_log, skip_ocr_evaluation, self.edit_distance_func)
                 self._line_evaluator_list.append(line_evaluator)
             else:
                 # if pair not found, add empty line data as pred line data
@@ -115,12 +104,54 @@ class PageEvaluator:
                 else:
                     gt_line_data = LineData(gt_line_block.attrib['STRING'], gt_idx)
                 pred_line_data = LineData('', None)
-                line_evaluator = LineEvaluator(pred_line_data, gt_line_data, self.correct_line_ocr_log, skip_ocr_evaluation)
+                line_evaluator = LineEvaluator(pred_line_data, gt_line_data, self.correct_line_ocr_log, skip_ocr_evaluation, self.edit_distance_func)
                 self._line_evaluator_list.append(line_evaluator)
                 print('Predicted line block for gt line "{0}" not found in {1}'.format(gt_line_block.attrib['STRING'], self.gt_page_block.attrib['IMAGENAME']))
                 if not gt_skip_line_order_evaluation:
                     gt_idx += 1
 
+    def _load_pred_lines(self):
+        # returns pred LINE blocks, their boxes as (N, 4) array,
+        # and reading order indices of them for each gt_skip_line_order_evaluation flag value
+        pred_line_block_list = []
+        pred_skip_list = []
+        for pred_line_block in self.pred_page_block.iter('LINE'):
+            # use only '本文' LINE blocks when eval_main_text_only is enabled
+            if pred_line_block.attrib['TYPE'] != '本文' and self.eval_main_text_only:
+                continue
+
+            if pred_line_block.attrib['TYPE'] not in ['本文', '頭注', '割注', '広告文字']:
+                pred_skip_line_order_evaluation = True
+            elif (pred_line_block.attrib['TYPE'] in ['頭注', '割注']) and (not self.eval_annotation_line_order):
+                pred_skip_line_order_evaluation = True
+            elif (pred_line_block.attrib['TYPE'] in ['広告文字']):
+                pred_skip_line_order_evaluation = True
+            else:
+                pred_skip_line_order_evaluation = False
+            pred_line_block_list.append(pred_line_block)
+            pred_skip_list.append(pred_skip_line_order_evaluation)
+
+        pred_boxes = numpy.array([self._get_line_box(pred_line_block) for pred_line_block in pred_line_block_list],
+                                 dtype=numpy.int64).reshape(-1, 4)
+
+        pred_line_idx_table = {}
+        for gt_skip_line_order_evaluation in [False, True]:
+            skip_list = pred_skip_list
+            if gt_skip_line_order_evaluation and (not self.eval_all_valid_pred_line):
+                skip_list = [True] * len(pred_skip_list)
+            # reading order index counts only lines which are not skipped
+            pred_line_idx_list = []
+            pred_idx = -1
+            for pred_skip_line_order_evaluation in skip_list:
+                if pred_skip_line_order_evaluation:
+                    pred_line_idx_list.append(None)
+                else:
+                    pred_idx += 1
+                    pred_line_idx_list.append(pred_idx)
+            pred_line_idx_table[gt_skip_line_order_evaluation] = pred_line_idx_list
+
+        return pred_line_block_list, pred_boxes, pred_line_idx_table
+
     def do_evaluation(self):
         print('#### Start Page Evaluation ####')
         gt_line_order_string = ''
@@ -146,7 +177,7 @@ class PageEvaluator:
             return
 
         # calculate line order edit_distance
-        line_order_edit_distance = nltk.edit_distance(pred_line_order_string, gt_line_order_string)
+        line_order_edit_distance = self.edit_distance_func(pred_line_order_string, gt_line_order_string)
         self.line_order_edit_distance = line_order_edit_distance
         if (len(self._line_evaluator_list) <= 0) or (gt_line_order_counter <= 0):
             print('valid _line_evaluator_list length is 0.')
@@ -173,21 +204,21 @@ class PageEvaluator:
     def get_line_ocr_edit_distance_average(self):
         return self.line_ocr_edit_distance_average
 
-    def _get_line_iou(self, line_a, line_b):
-        # get each bbox coordinate
-        box_a = (int(line_a.attrib['X']), int(line_a.attrib['Y']), int(line_a.attrib['WIDTH']), int(line_a.attrib['HEIGHT']))
-        box_b = (int(line_b.attrib['X']), int(line_b.attrib['Y']), int(line_b.attrib['WIDTH']), int(line_b.attrib['HEIGHT']))
+    def _get_line_box(self, line):
+        return (int(line.attrib['X']), int(line.attrib['Y']), int(line.attrib['WIDTH']), int(line.attrib['HEIGHT']))
 
+    def _get_line_iou_array(self, boxes, box_b):
+        # IoU of each bbox (x, y, width, height) in boxes with box_b
         # compute the overlapping area
-        x_a = max(box_a[0], box_b[0])
-        y_a = max(box_a[1], box_b[1])
-        x_b = min(box_a[0] + box_a[2], box_b[0] + box_b[2])
-        y_b = min(box_a[1] + box_a[3], box_b[1] + box_b[3])
-        overlap_area = max(0, x_b - x_a + 1) * max(0, y_b - y_a + 1)
+        x_a = numpy.maximum(boxes[:, 0], box_b[0])
+        y_a = numpy.maximum(boxes[:, 1], box_b[1])
+        x_b = numpy.minimum(boxes[:, 0] + boxes[:, 2], box_b[0] + box_b[2])
+        y_b = numpy.minimum(boxes[:, 1] + boxes[:, 3], box_b[1] + box_b[3])
+        overlap_area = numpy.maximum(0, x_b - x_a + 1) * numpy.maximum(0, y_b - y_a + 1)
 
         # compute IoU
-        box_a_area = (box_a[2] + 1) * (box_a[3] + 1)
+        boxes_area = (boxes[:, 2] + 1) * (boxes[:, 3] + 1)
         box_b_area = (box_b[2] + 1) * (box_b[3] + 1)
-        iou = overlap_area / float(box_a_area + box_b_area - overlap_area + 1e-6)
+        iou = overlap_area / ((boxes_area + box_b_area - overlap_area).astype(numpy.float64) + 1e-6)
 
         return iou
@@ -27,6 +27,10 @@ class PidDataEvaluator:
 
         self.page_evaluator_list = []
 
+        # per-page results, which are kept after page evaluators are released
+        self._line_ocr_edit_distance_list = None
+        self._line_order_edit_distance_list = None
+
     def load_page_evaluators(self):
         pred_page_block_list = self._extract_page_block_list(self.pred_xml_file_path)
         gt_page_block_list = self._extract_page_block_list(self.gt_xml_file_path)
@@ -52,15 +56,28 @@ class PidDataEvaluator:
             page_evaluator.load_line_evaluators()
             page_evaluator.do_evaluation()
 
+        self._line_ocr_edit_distance_list = [page_evaluator.get_line_ocr_edit_distance_average() for page_evaluator in self.page_evaluator_list]
+        self._line_order_edit_distance_list = [page_evaluator.normalized_line_order_edit_distance for page_evaluator in self.page_evaluator_list]
         self._output_eval_log()
 
+    def get_page_results(self):
+        # compact per-page results to pass from worker process
+        return self._line_ocr_edit_distance_list, self._line_order_edit_distance_list
+
+    def set_page_results(self, line_ocr_edit_distance_list, line_order_edit_distance_list):
+        # set per-page results evaluated in worker process
+        self._line_ocr_edit_distance_list = line_ocr_edit_distance_list
+        self._line_order_edit_distance_list = line_order_edit_distance_list
+
     def get_line_ocr_edit_distance_average(self):
         edit_distance_sum = 0
-        for page_evaluator in self.page_evaluator_list:
-            edit_distance_sum += page_evaluator.get_line_ocr_edit_distance_average()
-        return edit_distance_sum / len(self.page_evaluator_list)
+        for edit_distance in self.get_line_ocr_edit_distance_list():
+            edit_distance_sum += edit_distance
+        return edit_distance_sum / len(self.get_line_ocr_edit_distance_list())
 
     def get_line_ocr_edit_distance_list(self):
+        if self._line_ocr_edit_distance_list is not None:
+            return list(self._line_ocr_edit_distance_list)
         edit_distance_list = []
         for page_evaluator in self.page_evaluator_list:
             edit_distance_list.append(page_evaluator.get_line_ocr_edit_distance_average())
@@ -68,11 +85,13 @@ class PidDataEvaluator:
 
     def get_line_order_edit_distance_average(self):
         edit_distance_sum = 0
-        for page_evaluator in self.page_evaluator_list:
-            edit_distance_sum += page_evaluator.normalized_line_order_edit_distance
-        return edit_distance_sum / len(self.page_evaluator_list)
+        for edit_distance in self.get_line_order_edit_distance_list():
+            edit_distance_sum += edit_distance
+        return edit_distance_sum / len(self.get_line_order_edit_distance_list())
 
     def get_line_order_edit_distance_list(self):
+        if self._line_order_edit_distance_list is not None:
+            return list(self._line_order_edit_distance_list)
         edit_distance_list = []
         for page_evaluator in self.page_evaluator_list:
             edit_distance_list.append(page_evaluator.normalized_line_order_edit_distance)
@@ -0,0 +1,76 @@
+# Copyright (c) 2023, National Diet Library, Japan
+#
+# This software is released under the CC BY 4.0.
+# https://creativecommons.org/licenses/by/4.0/
+
+
+import random
+
+import nltk
+import pytest
+
+from ocr_evaluator.edit_distance import bit_parallel_edit_distance, get_edit_distance_func
+
+
+EDGE_CASE_PAIRS = [
+    ('', ''),
+    ('', 'あいう'),
+    ('国立国会図書館', ''),
+    ('a', 'a'),
+    ('a', 'b'),
+    ('abc', 'abc'),
+    ('kitten', 'sitting'),
+    ('国立国会図書館', '国立図書館'),
+    ('〓〓〓', '〓'),
+    ('ああああああ', 'あああ'),
+    ('aaaaaaaaaa', 'aaaaaaaaab'),
+    ('abababab', 'babababa'),
+    # astral-plane characters
+    ('𠮷野家', '吉野家'),
+    ('𩸽𩸽𩸽', '𩸽'),
+    ('😀😃😄', '😄😃😀'),
+    # longer than 64 characters (multiple machine words)
+    ('あ' * 100, 'あ' * 99 + 'い'),
+    ('ab' * 80, 'ba' * 80),
+]
+
+
+@pytest.mark.parametrize('s1, s2', EDGE_CASE_PAIRS)
+def test_edge_cases(s1, s2):
+    assert bit_parallel_edit_distance(s1, s2) == nltk.edit_distance(s1, s2)
+    assert bit_parallel_edit_distance(s2, s1) == nltk.edit_distance(s2, s1)
+
+
+@pytest.mark.parametrize('alphabet', [
+    'ab',
+    'abcdefghij',
+    'あいうえお国立図書館〓',
+    'a𠮷😀あ〓',
+])
+def test_random_pairs(alphabet):
+    rng = random.Random(0)
+    for _ in range(500):
+        s1 = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+        s2 = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+        assert bit_parallel_edit_distance(s1, s2) == nltk.edit_distance(s1, s2)
+
+
+def test_random_unicode_pairs():
+    rng = random.Random(1)
+    # BMP (excluding surrogates) and astral plane code points
+    ranges = [(0x20, 0x7e), (0x3040, 0x30ff), (0x4e00, 0x4e3f), (0x20000, 0x2003f), (0x1f600, 0x1f60f)]
+
+    def random_string():
+        return ''.join(chr(rng.randint(*rng.choice(ranges))) for _ in range(rng.randint(0, 40)))
+
+    for _ in range(1000):
+        s1 = random_string()
+        s2 = random_string()
+        assert bit_parallel_edit_distance(s1, s2) == nltk.edit_distance(s1, s2)
+
+
+def test_get_edit_distance_func():
+    assert get_edit_distance_func('bitparallel') is bit_parallel_edit_distance
+    assert get_edit_distance_func('nltk')('abc', 'abd') == 1
+    with pytest.raises(ValueError):
+        get_edit_distance_func('unknown')